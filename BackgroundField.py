@@ -4,22 +4,155 @@ changed in moving from one system to another.
 """
 
 import os
+import re
 import subprocess
+import numpy as np
+
+
+def pad_id(id_string):
+    """
+    Pad an ID with white space at the end of the string to the 9 characters of the IMMA ID field
+
+    :param id_string: ID
+    :type id_string: string
+    :return: padded ID
+    :rtype: string
+    """
+    while len(id_string) < 9:
+        id_string = id_string + ' '
+    return id_string
+
+
+class IDExclusionIndex:
+    """
+    A collection of IDs that are to be excluded from the QC. Membership of a single ID can be tested 
+    with the in operator and a whole array of IDs can be tested at once with :meth:`mask`. As well as 
+    exact IDs, the index can hold patterns which are compiled into a single regular expression: glob 
+    patterns, in which * matches any run of characters and ? matches any single character, and prefixes 
+    which match any ID starting with the prefix. Exact IDs are padded to 9 characters. Patterns are 
+    matched against padded IDs, so a glob pattern which should match IDs shorter than 9 characters 
+    must end with a *. Blank and missing IDs are never excluded.
+    """
+
+    def __init__(self, ids=None):
+        """
+        :param ids: optional list of exact IDs to exclude
+        :type ids: list of strings
+        """
+        self.ids = set()
+        self.patterns = []
+        self.regex = None
+        if ids is not None:
+            for id_string in ids:
+                self.add(id_string)
+
+    def add(self, id_string):
+        """
+        Add an exact ID to the index
+
+        :param id_string: ID to exclude
+        :type id_string: string
+        """
+        id_string = pad_id(id_string)
+        if id_string != '         ':
+            self.ids.add(id_string)
+
+    def add_glob(self, pattern):
+        """
+        Add a glob pattern to the index
+
+        :param pattern: pattern in which * matches any run of characters and ? any single character
+        :type pattern: string
+        """
+        regex = ''
+        for character in pattern:
+            if character == '*':
+                regex += '.*'
+            elif character == '?':
+                regex += '.'
+            else:
+                regex += re.escape(character)
+        self.add_regex(regex)
+
+    def add_prefix(self, prefix):
+        """
+        Add a prefix to the index. Any ID starting with the prefix will be excluded.
+
+        :param prefix: start of IDs to exclude
+        :type prefix: string
+        """
+        self.add_regex(re.escape(prefix) + '.*')
+
+    def add_regex(self, regex):
+        """
+        Add a regular expression, which has to match the whole of the padded ID, to the index 
+        and recompile the combined expression
+
+        :param regex: regular expression
+        :type regex: string
+        """
+        self.patterns.append(regex)
+        self.regex = re.compile('(?:' + '|'.join(self.patterns) + r')\Z', re.DOTALL)
+
+    def __contains__(self, id_string):
+        if id_string is None or id_string.isspace() or id_string == '':
+            return False
+        id_string = pad_id(id_string)
+        if id_string in self.ids:
+            return True
+        return self.regex is not None and self.regex.match(id_string) is not None
+
+    def __len__(self):
+        return len(self.ids) + len(self.patterns)
+
+    def mask(self, ids):
+        """
+        Find which of an array of IDs are excluded, giving the same result as the in operator. Each 
+        distinct ID is only tested once.
+
+        :param ids: array of IDs, which may include None for missing IDs
+        :type ids: numpy array or list
+        :return: array which is True where the ID is excluded
+        :rtype: numpy array of booleans
+        """
+        ids = np.array(['' if id_string is None else id_string for id_string in ids], dtype=str)
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+
+        padded_ids = np.array([pad_id(id_string) for id_string in unique_ids.tolist()], dtype=str)
+        excluded = np.in1d(padded_ids, np.array(sorted(self.ids), dtype=str))
+        if self.regex is not None:
+            for i, id_string in enumerate(unique_ids):
+                if not excluded[i] and id_string in self:
+                    excluded[i] = True
+
+        excluded &= np.array([not (id_string == '' or id_string.isspace()) for id_string in unique_ids],
+                             dtype=bool)
+
+        return excluded[inverse]
 
 
 def process_bad_id_file(bad_id_file):
     """
     Read in each entry in the bad id file and if it is shorter than 9 characters
-    pad with white space at the end of the string
+    pad with white space at the end of the string. Lines starting with glob: hold 
+    a glob pattern and lines starting with prefix: hold a prefix to exclude (see 
+    :class:`IDExclusionIndex`).
+
+    :param bad_id_file: name of the file of IDs to exclude
+    :type bad_id_file: string
+    :return: index of the IDs to exclude
+    :rtype: :class:`IDExclusionIndex`
     """
     idfile = open(bad_id_file, 'r')
-    ids_to_exclude = []
+    ids_to_exclude = IDExclusionIndex()
     for line in idfile:
         line = line.rstrip()
-        while len(line) < 9:
-            line = line + ' '
-        if line != '         ':
-            ids_to_exclude.append(line)
+        if line.startswith('glob:'):
+            ids_to_exclude.add_glob(line[5:])
+        elif line.startswith('prefix:'):
+            ids_to_exclude.add_prefix(line[7:])
+        else:
+            ids_to_exclude.add(line)
     idfile.close()
     return ids_to_exclude
 
@@ -1,6 +1,66 @@
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
 import numpy as np
 from netCDF4 import Dataset
 import qc
+import BackgroundField as bf
+
+LAT_SYNONYMS = ['lat', 'lats', 'latitude', 'latitudes']
+LON_SYNONYMS = ['lon', 'lons', 'long', 'longs', 'longitude', 'longitudes']
+
+# number of rows read at a time by read_points from variables which are not chunked
+ROWS_PER_READ = 100
+
+
+def float_dtype(array):
+    """
+    The type of float used to return values taken from an array: the type of the array itself if it 
+    holds floats, so that values are the same as when they are taken one at a time, otherwise float64
+    """
+    if np.issubdtype(array.dtype, np.floating):
+        return array.dtype
+    return np.dtype(np.float64)
+
+
+def read_coordinate(dataset, synonyms, description, infile):
+    """
+    Read a coordinate variable from a NetCDF file, which may be under any one of several names
+
+    :param dataset: the open NetCDF file
+    :param synonyms: the possible names of the coordinate variable
+    :param description: name of the coordinate used in the error message if it is not found
+    :param infile: filename used in the error message
+    :type dataset: netCDF4.Dataset
+    :type synonyms: list of strings
+    :type description: string
+    :type infile: string
+    :return: values of the coordinate
+    :rtype: numpy array
+    """
+    coordinate = None
+    for name in synonyms:
+        if name in dataset.variables:
+            coordinate = dataset.variables[name][:]
+    assert coordinate is not None, 'no readable ' + description + ' information in NetCDF file: ' + infile
+    return coordinate
+
+
+def dense_field(field):
+    """
+    Convert a field, which may be a masked array, into a dense float32 array with NaN where values 
+    are missing. A field which is already a plain float32 array is returned as it is, without a copy.
+
+    :param field: the field
+    :type field: numpy array or masked array
+    :return: the dense field
+    :rtype: numpy array
+    """
+    if not isinstance(field, np.ma.MaskedArray) and field.dtype == np.float32:
+        return field
+    return np.ma.filled(np.ma.asarray(field, dtype=np.float32), np.nan)
 
 
 class Climatology:
@@ -9,48 +69,42 @@ class Climatology:
     Automatically detects if this is a single field, pentad or daily climatology
     """
 
-    def __init__(self, infield):
+    def __init__(self, infield, dense=False):
         """
         Read in the climatology for variable var from infile
         
         :param infield: numpy array containing the climatology
+        :param dense: if True, hold the field as a dense float32 array with NaN for missing values 
+            rather than as a masked array. This takes less memory and makes lookups plain indexing, 
+            but values are rounded to float32.
         :type infield: numpy array
+        :type dense: boolean
         """
+        if dense:
+            infield = dense_field(infield)
         self.field = infield
+        self.dense = dense
         self.n = self.field.shape[0]
         assert self.n in [1, 73, 365], 'weird shaped field'
         self.res = 180. / self.field.shape[1]
 
     @classmethod
-    def from_filename(cls, infile, var):
+    def from_filename(cls, infile, var, dense=False):
         """
         Read in the climatology for variable var from infile
 
         :param infile: filename of a netcdf file
         :param var: the variable name to be extracted from the netcdf file
+        :param dense: if True, hold the field as a dense float32 array, see :class:`.Climatology`
         :type infile: string
         :type var: string
+        :type dense: boolean
         """
         if infile is not None:
             climatology = Dataset(infile)
             field = climatology.variables[var][:]
-
-            lat_synonyms = ['lat', 'lats', 'latitude', 'latitudes']
-            found_lat = False
-            for lat in lat_synonyms:
-                if lat in climatology.variables:
-                    latitudes = climatology.variables[lat][:]
-                    found_lat = True
-            assert found_lat, 'no readable latitude information in NetCDF file: ' + infile
-
-            lon_synonyms = ['lon', 'lons', 'long', 'longs', 'longitude', 'longitudes']
-            found_lon = False
-            for lon in lon_synonyms:
-                if lon in climatology.variables:
-                    longitudes = climatology.variables[lon][:]
-                    found_lon = True
-            assert found_lon, 'no readable longitude information in NetCDF file: ' + infile
-
+            latitudes = read_coordinate(climatology, LAT_SYNONYMS, 'latitude', infile)
+            longitudes = read_coordinate(climatology, LON_SYNONYMS, 'longitude', infile)
             climatology.close()
 
             # transpose the fields if the second axis is longitude
@@ -72,10 +126,12 @@ class Climatology:
             if field.ndim == 4:
                 field = field[:, 0, :, :]
 
+        elif dense:
+            field = np.zeros((1, 180 * 20, 360 * 20), dtype=np.float32) + np.nan
         else:
             field = np.ma.array(np.zeros((1, 180 * 20, 360 * 20)), mask=True)
 
-        return cls(field)
+        return cls(field, dense)
 
     def get_tindex(self, month, day):
         """
@@ -100,6 +156,123 @@ class Climatology:
 
         return tindex
 
+    def get_tindices(self, months, days):
+        """
+        Array version of :meth:`get_tindex`
+        
+        :param months: months for which the time indices are required
+        :param days: days for which the time indices are required
+        :type months: numpy array of integers
+        :type days: numpy array of integers
+        :return: time indices for specified months and days.
+        :rtype: numpy array of integers
+        """
+        if self.n == 1:
+            return np.zeros(np.shape(months), dtype=int)
+        if self.n == 73:
+            return qc.which_pentad_array(months, days) - 1
+        return qc.day_in_year_array(months, days) - 1
+
+    def _gather(self, lats, lons, months, days, lat_to_yindex, lon_to_xindex):
+        """
+        Extract the climatology values for arrays of positions and times with one fancy-indexing 
+        gather, using the given functions to find the grid cells
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        months = np.asarray(months, dtype=float)
+        days = np.asarray(days, dtype=float)
+
+        result = np.zeros(np.broadcast(lats, lons, months, days).shape, dtype=float_dtype(self.field)) + np.nan
+        lats, lons, months, days = np.broadcast_arrays(lats, lons, months, days)
+
+        with np.errstate(invalid='ignore'):
+            valid = np.isfinite(lats) & np.isfinite(lons) & (months >= 1) & (months <= 12)
+            month_lengths = np.asarray(qc.LEAP_MONTH_LENGTHS)
+            valid[valid] = (days[valid] >= 1) & (days[valid] <= month_lengths[months[valid].astype(int) - 1])
+
+        yindex = lat_to_yindex(lats[valid])
+        xindex = lon_to_xindex(lons[valid])
+        # positions which fall off the grid are invalid rather than an error for the whole array
+        on_grid = ((yindex >= -self.field.shape[1]) & (yindex < self.field.shape[1]) &
+                   (xindex >= -self.field.shape[2]) & (xindex < self.field.shape[2]))
+        valid[valid] = on_grid
+
+        tindex = self.get_tindices(months[valid].astype(int), days[valid].astype(int))
+        values = self.field[tindex, yindex[on_grid], xindex[on_grid]]
+        result[valid] = np.ma.filled(np.ma.asarray(values, dtype=result.dtype), np.nan)
+        return result
+
+    def get_values_mds_style(self, lats, lons, months, days):
+        """
+        Array version of :meth:`get_value_mds_style`, which gets the values from the climatology 
+        at many positions and times at once
+        
+        :param lats: latitudes of locations to extract values from in degrees
+        :param lons: longitudes of locations to extract values from in degrees
+        :param months: months for which the values are required
+        :param days: days for which the values are required
+        :type lats: numpy array
+        :type lons: numpy array
+        :type months: numpy array
+        :type days: numpy array
+        :return: climatology values at specified locations and times, NaN where the value is masked 
+            or the position or date is invalid.
+        :rtype: numpy array
+        """
+        return self._gather(lats, lons, months, days, qc.mds_lat_to_yindex_array, qc.mds_lon_to_xindex_array)
+
+    def get_values(self, lats, lons, months, days):
+        """
+        Array version of :meth:`get_value`, which gets the values from the climatology at many 
+        positions and times at once
+        
+        :param lats: latitudes of locations to extract values from in degrees
+        :param lons: longitudes of locations to extract values from in degrees
+        :param months: months for which the values are required
+        :param days: days for which the values are required
+        :type lats: numpy array
+        :type lons: numpy array
+        :type months: numpy array
+        :type days: numpy array
+        :return: climatology values at specified locations and times, NaN where the value is masked 
+            or the position or date is invalid.
+        :rtype: numpy array
+        """
+        return self._gather(lats, lons, months, days,
+                            lambda lat: qc.lat_to_yindex_array(lat, self.res),
+                            lambda lon: qc.lon_to_xindex_array(lon, self.res))
+
+    def lookup(self, tindex, yindex, xindex):
+        """
+        Get the value at a grid point of the climatology
+        
+        :param tindex: time index of the grid point
+        :param yindex: latitude index of the grid point
+        :param xindex: longitude index of the grid point
+        :type tindex: integer
+        :type yindex: integer
+        :type xindex: integer
+        :return: value at the grid point, or None if it is missing
+        :rtype: float
+        """
+        result = self.field[tindex, yindex, xindex]
+
+        if self.dense:
+            if result != result:
+                result = None
+        elif type(result) is np.float64 or type(result) is np.float32:
+            # plain arrays hold NaN where values are missing
+            if np.isnan(result):
+                result = None
+        else:
+            if result.mask:
+                result = None
+            else:
+                result = result.data[0]
+
+        return result
+
     def get_value_ostia(self, lat, lon):
         """
         :param lat: latitude of location to extract value from in degrees of arc
@@ -114,17 +287,7 @@ class Climatology:
         xindex = qc.mds_lon_to_xindex(lon, res=0.05)
         tindex = 0
 
-        result = self.field[tindex, yindex, xindex]
-
-        if type(result) is np.float64 or type(result) is np.float32:
-            pass
-        else:
-            if result.mask:
-                result = None
-            else:
-                result = result.data[0]
-
-        return result
+        return self.lookup(tindex, yindex, xindex)
 
     def get_value_mds_style(self, lat, lon, month, day):
         """
@@ -152,17 +315,7 @@ class Climatology:
         xindex = qc.mds_lon_to_xindex(lon)
         tindex = self.get_tindex(month, day)
 
-        result = self.field[tindex, yindex, xindex]
-
-        if type(result) is np.float64 or type(result) is np.float32:
-            pass
-        else:
-            if result.mask:
-                result = None
-            else:
-                result = result.data[0]
-
-        return result
+        return self.lookup(tindex, yindex, xindex)
 
     def get_value(self, lat, lon, month, day):
         """
@@ -189,17 +342,7 @@ class Climatology:
         xindex = qc.lon_to_xindex(lon, self.res)
         tindex = self.get_tindex(month, day)
 
-        result = self.field[tindex, yindex, xindex]
-
-        if type(result) is np.float64 or type(result) is np.float32:
-            pass
-        else:
-            if result.mask:
-                result = None
-            else:
-                result = result.data[0]
-
-        return result
+        return self.lookup(tindex, yindex, xindex)
 
     def get_interpolated_value(self, lat, lon, mo, dy):
         """
@@ -273,3 +416,415 @@ class Climatology:
         return qc.bilinear_interp(x1, x2, y1, y2,
                                   lon, lat,
                                   q11, q12, q21, q22)
+
+    def get_interpolated_values(self, lats, lons, months, days):
+        """
+        Array version of :meth:`get_interpolated_value`, which interpolates the climatology to many 
+        positions at once. The perturbed positions and the four surrounding grid points of all the 
+        positions are each looked up with one call to :meth:`get_values`.
+        
+        :param lats: latitudes of locations to extract values from in degrees
+        :param lons: longitudes of locations to extract values from in degrees
+        :param months: months for which the values are required
+        :param days: days for which the values are required
+        :type lats: numpy array
+        :type lons: numpy array
+        :type months: numpy array
+        :type days: numpy array
+        :return: interpolated climatology values, NaN where get_interpolated_value gives None. It is also 
+            NaN where get_interpolated_value fails: where the latitude or longitude is out of range or 
+            none of the four surrounding grid points has a value.
+        :rtype: numpy array
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        lats, lons, months, days = np.broadcast_arrays(lats, lons, months, days)
+
+        with np.errstate(invalid='ignore'):
+            valid = (lats >= -90.0) & (lats <= 90.0) & (lons >= -180.0) & (lons <= 180.0)
+
+            # check that the lat lon point falls in a grid cell with a value or on 
+            # the border of one
+            found = np.zeros(lats.shape, dtype=bool)
+            for dlat, probe in [(0.001, lats + 0.001 < 90), (-0.001, lats - 0.001 > -90)]:
+                for dlon in [0.001, -0.001]:
+                    pert = self.get_values(lats + dlat, lons + dlon, months, days)
+                    found |= probe & ~np.isnan(pert)
+            valid &= found
+
+            x1, x2, y1, y2 = qc.get_four_surrounding_points_array(lats, lons, 1)
+            q11 = self.get_values(y1, x1, months, days).astype(float)
+            q22 = self.get_values(y2, x2, months, days).astype(float)
+            q12 = self.get_values(y2, x1, months, days).astype(float)
+            q21 = self.get_values(y1, x2, months, days).astype(float)
+
+            q11, q12, q21, q22 = qc.fill_missing_vals_array(q11, q12, q21, q22)
+
+            x1, x2, y1, y2 = qc.get_four_surrounding_points_array(lats, lons, 0)
+            result = qc.bilinear_interp_array(x1, x2, y1, y2, lons, lats, q11, q12, q21, q22)
+
+        return np.where(valid, result, np.nan)
+
+
+class ClimatologyStore:
+    """
+    A directory of climatology fields which have been read from NetCDF files, arranged as 
+    :meth:`Climatology.from_filename` arranges them and saved as float32 .npy files with NaN for 
+    missing values. The fields are opened as memory maps, so they are ready to use at once and their 
+    pages are shared between processes using the same store. A manifest.json file in the directory 
+    lists the fields, the NetCDF file and variable each came from, and the size and modification time 
+    of the NetCDF file, so that a field is not used if its NetCDF file has changed.
+
+    Fields are added to the store with :meth:`compile`. :meth:`open` gives the field from the store 
+    if it is there and up to date, and otherwise reads the NetCDF file with from_filename.
+    """
+
+    def __init__(self, directory, dense=False):
+        """
+        :param directory: directory holding the store, or None for no store
+        :param dense: if True, fields which are not in the store are also read as dense float32 
+            arrays, like the fields in the store
+        :type directory: string
+        :type dense: boolean
+        """
+        self.directory = directory
+        self.dense = dense
+        self.manifest = {}
+        if directory is not None and os.path.isfile(self.manifest_filename()):
+            with open(self.manifest_filename(), 'r') as infile:
+                self.manifest = json.load(infile)
+
+    def manifest_filename(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    @staticmethod
+    def key(infile, var):
+        """
+        Key of a field in the manifest
+
+        :param infile: filename of a netcdf file
+        :param var: the variable name in the netcdf file
+        :type infile: string
+        :type var: string
+        :return: key
+        :rtype: string
+        """
+        return "{} {}".format(os.path.abspath(infile), var)
+
+    def is_current(self, infile, var):
+        """
+        Check whether the store holds a field for a variable from a NetCDF file, compiled since the 
+        NetCDF file last changed
+
+        :param infile: filename of a netcdf file
+        :param var: the variable name in the netcdf file
+        :type infile: string
+        :type var: string
+        :rtype: boolean
+        """
+        if self.directory is None or infile is None:
+            return False
+        entry = self.manifest.get(self.key(infile, var))
+        if entry is None or not os.path.isfile(infile):
+            return False
+        stats = os.stat(infile)
+        return (entry['size'] == stats.st_size and entry['mtime'] == stats.st_mtime and
+                os.path.isfile(os.path.join(self.directory, entry['file'])))
+
+    def compile(self, infile, var):
+        """
+        Read a variable from a NetCDF file and add it to the store, unless the store already holds 
+        an up to date copy. The field is written under a temporary name and then renamed, and the 
+        manifest is rewritten the same way, so an incomplete field is never read.
+
+        :param infile: filename of a netcdf file
+        :param var: the variable name to be extracted from the netcdf file
+        :type infile: string
+        :type var: string
+        :return: True if the field was compiled, False if the store already held it
+        :rtype: boolean
+        """
+        assert self.directory is not None, 'no directory for the climatology store'
+        if self.is_current(infile, var):
+            return False
+
+        stats = os.stat(infile)
+        field = Climatology.from_filename(infile, var, dense=True).field
+
+        key = self.key(infile, var)
+        digest = hashlib.md5("{} {} {}".format(key, stats.st_size, stats.st_mtime)).hexdigest()[0:16]
+        filename = "{}.{}.{}.npy".format(os.path.basename(infile), var, digest)
+
+        handle, tmpname = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as outfile:
+            np.save(outfile, field)
+        os.rename(tmpname, os.path.join(self.directory, filename))
+
+        old_entry = self.manifest.get(key)
+        self.manifest[key] = {'source': os.path.abspath(infile), 'variable': var, 'file': filename,
+                              'size': stats.st_size, 'mtime': stats.st_mtime, 'shape': list(field.shape)}
+        self.write_manifest()
+        if old_entry is not None and old_entry['file'] != filename:
+            old_filename = os.path.join(self.directory, old_entry['file'])
+            if os.path.isfile(old_filename):
+                os.remove(old_filename)
+        return True
+
+    def write_manifest(self):
+        handle, tmpname = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as outfile:
+            json.dump(self.manifest, outfile, indent=1, sort_keys=True)
+        os.rename(tmpname, self.manifest_filename())
+
+    def open(self, infile, var):
+        """
+        Get a climatology from the store if it holds an up to date copy, otherwise read it from the 
+        NetCDF file
+
+        :param infile: filename of a netcdf file
+        :param var: the variable name to be extracted from the netcdf file
+        :type infile: string
+        :type var: string
+        :return: the climatology
+        :rtype: :class:`.Climatology`
+        """
+        if self.is_current(infile, var):
+            entry = self.manifest[self.key(infile, var)]
+            return Climatology(np.load(os.path.join(self.directory, entry['file']), mmap_mode='r'), dense=True)
+        return Climatology.from_filename(infile, var, self.dense)
+
+
+def load_background_fields(filename):
+    """
+    Read the OSTIA SST and sea-ice fraction fields from a background file
+
+    :param filename: name of the background file, or None if there is no file
+    :type filename: string
+    :return: background SST and sea-ice fraction
+    :rtype: tuple of two :class:`.Climatology`
+    """
+    return (Climatology.from_filename(filename, 'analysed_sst'),
+            Climatology.from_filename(filename, 'sea_ice_fraction'))
+
+
+def fields_nbytes(fields):
+    """
+    Count the bytes held by the arrays of some fields, including the masks of masked arrays
+
+    :param fields: the fields
+    :type fields: tuple of :class:`.Climatology`
+    :return: number of bytes
+    :rtype: integer
+    """
+    nbytes = 0
+    for field in fields:
+        nbytes += field.field.nbytes
+        if np.ma.getmask(field.field) is not np.ma.nomask:
+            nbytes += np.ma.getmask(field.field).nbytes
+    return nbytes
+
+
+class BackgroundFieldCache:
+    """
+    A cache of the daily OSTIA background SST and sea-ice fields, keyed by date, so that each day's file 
+    is read once however often it is needed. The cache holds at most max_bytes of fields (but always at 
+    least the last day used) and when it is full the least recently used day is dropped.
+    """
+
+    def __init__(self, dirstubs, filenamestubs, max_bytes=2 * 1024 ** 3, loader=load_background_fields):
+        """
+        :param dirstubs: list of directory name stubs, as for :func:`.get_background_filename`
+        :param filenamestubs: list of filename stubs, as for :func:`.get_background_filename`
+        :param max_bytes: maximum number of bytes of fields to hold
+        :param loader: function which reads the fields from a filename
+        :type dirstubs: list of strings
+        :type filenamestubs: list of strings
+        :type max_bytes: integer
+        :type loader: function
+        """
+        self.dirstubs = dirstubs
+        self.filenamestubs = filenamestubs
+        self.max_bytes = max_bytes
+        self.loader = loader
+
+        self.fields = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.loads = 0
+
+    def load(self, date):
+        """
+        Read the fields for a date from file
+        """
+        year, month, day = date
+        return self.loader(bf.get_background_filename(self.dirstubs, self.filenamestubs, year, month, day))
+
+    def store(self, date, fields):
+        """
+        Add fields to the cache and drop the least recently used days until the cache is within 
+        its memory bound
+        """
+        self.fields[date] = fields
+        self.nbytes += fields_nbytes(fields)
+        self.loads += 1
+        while self.nbytes > self.max_bytes and len(self.fields) > 1:
+            oldest, old_fields = self.fields.popitem(last=False)
+            self.nbytes -= fields_nbytes(old_fields)
+
+    def get(self, year, month, day):
+        """
+        Get the background SST and sea-ice fields for a date, reading them from file if they are not 
+        in the cache
+
+        :param year: year
+        :param month: month
+        :param day: day
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :return: background SST and sea-ice fraction
+        :rtype: tuple of two :class:`.Climatology`
+        """
+        date = (year, month, day)
+        if date in self.fields:
+            # move to the most recently used end
+            fields = self.fields.pop(date)
+            self.fields[date] = fields
+            self.hits += 1
+            return fields
+
+        fields = self.load(date)
+        self.store(date, fields)
+        return fields
+
+
+def read_variable_points(variable, yindex, xindex):
+    """
+    Read the values of a (time, lat, lon) NetCDF variable at the first time for a set of grid cells. The 
+    cells are sorted into blocks of rows that match the chunks of the variable and, for each block, only 
+    the box spanning the cells in that block is read.
+
+    :param variable: the NetCDF variable
+    :param yindex: row index of each cell in the file
+    :param xindex: column index of each cell in the file
+    :type variable: netCDF4.Variable
+    :type yindex: numpy array of integers
+    :type xindex: numpy array of integers
+    :return: values with NaN where the variable is masked
+    :rtype: numpy array
+    """
+    assert variable.ndim == 3, 'expected a (time, lat, lon) variable'
+    values = None
+
+    chunking = variable.chunking()
+    if chunking == 'contiguous' or chunking is None:
+        rows_per_read = ROWS_PER_READ
+    else:
+        rows_per_read = chunking[1]
+
+    blocks, block_index = np.unique(yindex // rows_per_read, return_inverse=True)
+    order = np.argsort(block_index, kind='mergesort')
+    starts = np.searchsorted(block_index[order], np.arange(len(blocks) + 1))
+    for i in range(len(blocks)):
+        selection = order[starts[i]:starts[i + 1]]
+        y0 = yindex[selection].min()
+        y1 = yindex[selection].max() + 1
+        x0 = xindex[selection].min()
+        x1 = xindex[selection].max() + 1
+        box = variable[0, y0:y1, x0:x1]
+        if values is None:
+            values = np.zeros(len(yindex), dtype=float_dtype(box)) + np.nan
+        box = np.ma.filled(np.ma.asarray(box, dtype=values.dtype), np.nan)
+        values[selection] = box[yindex[selection] - y0, xindex[selection] - x0]
+
+    if values is None:
+        values = np.zeros(0)
+    return values
+
+
+def read_points(infile, varnames, lats, lons, res=0.05):
+    """
+    Read the values of variables from a NetCDF file at arrays of positions without reading whole fields. 
+    The grid cells are chosen as in :meth:`Climatology.get_value_ostia`, allowing for the latitudes 
+    running from south to north and longitudes starting at zero as :meth:`Climatology.from_filename` 
+    does, so the values are the same as those from get_value_ostia on fields read with from_filename.
+
+    :param infile: filename of the NetCDF file, or None if there is no file
+    :param varnames: names of the (time, lat, lon) variables to read
+    :param lats: latitudes of the points in degrees
+    :param lons: longitudes of the points in degrees
+    :param res: resolution of the grid in degrees
+    :type infile: string
+    :type varnames: list of strings
+    :type lats: numpy array
+    :type lons: numpy array
+    :type res: float
+    :return: dictionary of arrays of values for each variable, NaN where the value is masked, 
+        the position is missing or off the grid, or there is no file
+    :rtype: dictionary
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    results = {}
+    for varname in varnames:
+        results[varname] = np.zeros(lats.shape) + np.nan
+    if infile is None:
+        return results
+
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    yindex = qc.mds_lat_to_yindex_array(lats[valid], res)
+    xindex = qc.mds_lon_to_xindex_array(lons[valid], res)
+
+    dataset = Dataset(infile)
+    try:
+        latitudes = read_coordinate(dataset, LAT_SYNONYMS, 'latitude', infile)
+        longitudes = read_coordinate(dataset, LON_SYNONYMS, 'longitude', infile)
+        ny = len(latitudes)
+        nx = len(longitudes)
+
+        # negative indices count back from the end of the field, as they do in get_value_ostia
+        on_grid = (yindex >= -ny) & (yindex < ny) & (xindex >= -nx) & (xindex < nx)
+        valid[valid] = on_grid
+        yindex = yindex[on_grid] % ny
+        xindex = xindex[on_grid] % nx
+
+        # convert indices in the field as from_filename arranges it to indices in the file
+        if latitudes[0] < 0:
+            yindex = ny - 1 - yindex
+        if longitudes[0] > 0.0 and longitudes[0] < 1.0:
+            xindex = (xindex - nx / 2) % nx
+
+        for varname in varnames:
+            values = read_variable_points(dataset.variables[varname], yindex, xindex)
+            results[varname] = np.zeros(lats.shape, dtype=values.dtype) + np.nan
+            results[varname][valid] = values
+    finally:
+        dataset.close()
+
+    return results
+
+
+def read_ostia_points(infile, bg_var, lats, lons, months, days):
+    """
+    Get the OSTIA SST and sea-ice fraction from a daily OSTIA file and the background variance from a 
+    background variance climatology for arrays of positions and dates. Only the parts of the OSTIA file 
+    around the positions are read.
+
+    :param infile: filename of the OSTIA file, or None if there is no file
+    :param bg_var: background variance climatology
+    :param lats: latitudes of the points in degrees
+    :param lons: longitudes of the points in degrees
+    :param months: months of the points
+    :param days: days of the points
+    :type infile: string
+    :type bg_var: :class:`.Climatology`
+    :type lats: numpy array
+    :type lons: numpy array
+    :type months: numpy array
+    :type days: numpy array
+    :return: SST in K, sea-ice fraction and background variance, with NaN where there is no value
+    :rtype: tuple of three numpy arrays
+    """
+    values = read_points(infile, ['analysed_sst', 'sea_ice_fraction'], lats, lons)
+    return (values['analysed_sst'], values['sea_ice_fraction'],
+            bg_var.get_values_mds_style(lats, lons, months, days))
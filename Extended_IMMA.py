@@ -12,6 +12,8 @@ import qc
 import math
 import numpy as np
 from datetime import datetime
+from datetime import timedelta
+from collections import defaultdict
 import spherical_geometry as sph
 import track_check as tc
 import trackqc as tqc
@@ -20,6 +22,223 @@ import CalcHums
 VARLIST = ['YR', 'MO', 'DY', 'HR', 'LAT', 'LON', 'DS', 'VS', 'SLP', 'AT', 'AT2', 'SST', 'DCK', 'PT', 'SID', 'DPT',
            'SHU', 'VAP', 'CRH', 'CWB', 'DPD', 'W', 'WI','D', 'DI', 'WW']
 
+# IMMA1 attachments holding the variables in VARLIST plus ID (core), DCK, PT and SID (ICOADS) and UID (UIDA)
+IMMA_ATTACHMENTS = [0, 1, 98]
+
+# position of each variable in VARLIST and the variables that hold integers
+VARINDEX = dict((var, i) for i, var in enumerate(VARLIST))
+
+# julian day of the day before 1st January AD 1, which is day zero for datetime ordinals
+JULIAN_DAY_OF_ORDINAL_ZERO = 1721425
+INTEGER_VARIABLES = frozenset(['YR', 'MO', 'DY', 'DS', 'VS', 'DCK', 'PT', 'SID'])
+
+# ICOADS platform types of ships, of buoys (moored and drifting) and of drifting buoys
+SHIP_PLATFORM_TYPES = [0, 1, 2, 3, 4, 5, 10, 11, 12, 17]
+BUOY_PLATFORM_TYPES = [6, 7]
+DRIFTER_PLATFORM_TYPES = [7]
+
+# QC areas that can be flagged in addition to the variables in VARLIST
+SPECIAL_QC_TYPES = ['POS', 'SST', 'AT', 'DPT', 'SLP', 'W', 'D']
+
+# allowed values of a QC flag. Flags which have not been set read as 9
+QC_FLAG_VALUES = frozenset(range(10))
+
+
+class QCFlagRegistry:
+    """
+    A registry which gives each QC flag, identified by its general QC area (qc_type) and 
+    its name (specific_flag), a fixed column index. The index is used to store flags compactly, 
+    either in a :class:`.MarineReport` or in a :class:`.QCFlagMatrix`. The QC area is checked 
+    once, when the flag is first registered.
+    """
+
+    def __init__(self):
+        # indices[qc_type][specific_flag], empty for QC areas with no registered flags
+        self.indices = defaultdict(dict)
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, qc_type, specific_flag):
+        """
+        Find the index of a QC flag without registering it
+        
+        :param qc_type: the general QC area e.g. SST, MAT
+        :param specific_flag: the name of the flag e.g. buddy_check, repeated_value
+        :type qc_type: string
+        :type specific_flag: string
+        :return: the index of the flag or None if the flag has not been registered
+        :rtype: integer
+        """
+        return self.indices[qc_type].get(specific_flag)
+
+    def register(self, qc_type, specific_flag):
+        """
+        Find the index of a QC flag, registering it if this is the first time it has been used
+        
+        :param qc_type: the general QC area e.g. SST, MAT. Must be either one of the SPECIAL_QC_TYPES or correspond 
+          to an ICOADS variable name
+        :param specific_flag: the name of the flag e.g. buddy_check, repeated_value
+        :type qc_type: string
+        :type specific_flag: string
+        :return: the index of the flag
+        :rtype: integer
+        """
+        index = self.indices[qc_type].get(specific_flag)
+        if index is None:
+            assert ((qc_type in SPECIAL_QC_TYPES) or
+                    (qc_type in VARLIST)), "unknown data type " + qc_type
+            index = len(self.names)
+            self.indices[qc_type][specific_flag] = index
+            self.names.append((qc_type, specific_flag))
+        return index
+
+
+# registry shared by all reports and decks so that flag indices mean the same thing everywhere
+QC_FLAGS = QCFlagRegistry()
+
+
+class QCFlagMatrix:
+    """
+    QC flags for a set of reports held in a two dimensional int8 array with one row per 
+    flag registered in a :class:`.QCFlagRegistry` and one column per report. Flags which 
+    have not been set have the value 9. Rows are added as new flags are registered.
+    """
+
+    def __init__(self, capacity, registry=QC_FLAGS):
+        """
+        Initialise a :class:`.QCFlagMatrix` with all flags unset
+        
+        :param capacity: the number of reports to allocate space for
+        :param registry: the registry mapping flag names to rows, defaults to the shared registry
+        :type capacity: integer
+        :type registry: :class:`.QCFlagRegistry`
+        """
+        self.registry = registry
+        self.capacity = capacity
+        self.flags = np.zeros((len(registry), capacity), dtype=np.int8) + 9
+
+    def _ensure(self, index):
+        """
+        Make sure there is a row for the flag with the given index
+        """
+        nflags = self.flags.shape[0]
+        if index < nflags:
+            return
+        new_nflags = max(index + 1, len(self.registry))
+        extra = np.zeros((new_nflags - nflags, self.capacity), dtype=np.int8) + 9
+        self.flags = np.concatenate((self.flags, extra))
+
+    def resize(self, capacity):
+        """
+        Change the number of reports there is space for, keeping the flags of the existing reports
+        
+        :param capacity: new number of reports
+        :type capacity: integer
+        """
+        new_flags = np.zeros((self.flags.shape[0], capacity), dtype=np.int8) + 9
+        ncopy = min(capacity, self.capacity)
+        new_flags[:, 0:ncopy] = self.flags[:, 0:ncopy]
+        self.flags = new_flags
+        self.capacity = capacity
+
+    def take(self, indices):
+        """
+        Make a new :class:`.QCFlagMatrix` holding the flags of the reports at the given positions
+        
+        :param indices: positions of the reports
+        :type indices: numpy array of integers
+        :return: the selected flags
+        :rtype: :class:`.QCFlagMatrix`
+        """
+        selection = QCFlagMatrix(0, self.registry)
+        selection.flags = self.flags[:, indices]
+        selection.capacity = selection.flags.shape[1]
+        return selection
+
+    def get(self, position, qc_type, specific_flag):
+        """
+        Get the value of a QC flag for a single report
+        
+        :return: the value of the flag, or 9 if the flag is not set.
+        :rtype: integer
+        """
+        index = self.registry.lookup(qc_type, specific_flag)
+        if index is None or index >= self.flags.shape[0]:
+            return 9
+        return int(self.flags[index, position])
+
+    def set(self, position, qc_type, specific_flag, set_value):
+        """
+        Set the value of a QC flag for a single report
+        """
+        assert set_value in QC_FLAG_VALUES, "value not in 0-9" + str(set_value)
+        index = self.registry.register(qc_type, specific_flag)
+        self._ensure(index)
+        self.flags[index, position] = set_value
+
+    def get_flags(self, qc_type, specific_flag, selection=slice(None)):
+        """
+        Get the values of a QC flag for a selection of reports
+        
+        :param qc_type: the general QC area e.g. SST, MAT..
+        :param specific_flag: the name of the flag
+        :param selection: slice, array of positions or array of booleans selecting the reports. 
+          Default is all reports.
+        :type qc_type: string
+        :type specific_flag: string
+        :return: copy of the flags, 9 where the flag is not set
+        :rtype: numpy array of int8
+        """
+        index = self.registry.lookup(qc_type, specific_flag)
+        if index is None or index >= self.flags.shape[0]:
+            return np.zeros(self.capacity, dtype=np.int8)[selection] + 9
+        return self.flags[index][selection].copy()
+
+    def set_flags(self, qc_type, specific_flag, set_value, selection=slice(None)):
+        """
+        Set the values of a QC flag for a selection of reports
+        
+        :param qc_type: the general QC area e.g. SST, MAT..
+        :param specific_flag: the name of the flag
+        :param set_value: value for the flag, or array of values one per selected report
+        :param selection: slice, array of positions or array of booleans selecting the reports. 
+          Default is all reports.
+        :type qc_type: string
+        :type specific_flag: string
+        """
+        values = np.asarray(set_value)
+        assert np.all((values >= 0) & (values <= 9)), "value not in 0-9" + str(set_value)
+        index = self.registry.register(qc_type, specific_flag)
+        self._ensure(index)
+        self.flags[index][selection] = values
+
+    def get_report_flags(self, position):
+        """
+        Get all the flags for a single report in the compact form used by :class:`.MarineReport`
+        
+        :param position: position of the report
+        :type position: integer
+        :return: flag values ordered by registry index
+        :rtype: bytearray
+        """
+        return bytearray(self.flags[:, position].tostring())
+
+    def set_report_flags(self, position, flags):
+        """
+        Set all the flags for a single report from the compact form used by :class:`.MarineReport`. 
+        Flags beyond the end of flags are unset.
+        
+        :param position: position of the report
+        :param flags: flag values ordered by registry index
+        :type position: integer
+        :type flags: bytearray
+        """
+        self._ensure(len(flags) - 1)
+        self.flags[:, position] = 9
+        self.flags[0:len(flags), position] = np.frombuffer(bytes(flags), dtype=np.int8)
+
 
 def safe_filename(infilename):
     """
@@ -63,13 +282,16 @@ def datestring(year, month, day):
 
 def tostring(variable):
     """
-    print a variable as string, or \N if missing
+    print a variable as string, or \N if missing. Floats are written with the shortest 
+    representation that reads back to the same value
     :type variable: float
     """
-    if variable is not None:
-        repout = str(variable)
-    else:
+    if variable is None:
         repout = "\N"
+    elif isinstance(variable, float):
+        repout = repr(variable)
+    else:
+        repout = str(variable)
     return repout
 
 
@@ -214,6 +436,50 @@ class ClimatologyLibrary:
         assert variable_name in self.climlib, 'unnkown variable name: ' + variable_name
         return self.climlib[variable_name].get_statistic(statistic_name)
 
+    def annotate(self, deck, lookups):
+        """
+        Add climate variables to every report in a :class:`.Deck` in bulk. Each lookup is one 
+        array extraction from a field in the library, rather than one per report, but the 
+        result is the same as calling add_climate_variable for each report with the values 
+        from get_value, get_value_mds_style or get_interpolated_value.
+        
+        :param deck: the reports to be annotated
+        :param lookups: list of (variable name, statistic name, lookup style) tuples. The 'mean' statistic 
+            gives the climatological average of the climate variable and 'stdev' gives its standard 
+            deviation. The lookup style is 'mds' to use :meth:`.Climatology.get_values_mds_style`, 
+            'standard' to use :meth:`.Climatology.get_values` and 'interpolated' to use 
+            :meth:`.Climatology.get_interpolated_values`.
+        :type deck: :class:`.Deck`
+        :type lookups: list of tuples
+        """
+        lats = deck.getvar('LAT')
+        lons = deck.getvar('LON')
+        lons = np.where(lons > 180, lons - 360.0, lons)
+        months = deck.getvar('MO')
+        days = deck.getvar('DY')
+
+        variable_names = []
+        values = {}
+        for variable_name, statistic_name, lookup in lookups:
+            assert statistic_name in ['mean', 'stdev'], 'unknown statistic ' + str(statistic_name)
+            assert lookup in ['mds', 'standard', 'interpolated'], 'unknown lookup style ' + str(lookup)
+            field = self.get_field(variable_name, statistic_name)
+            if lookup == 'mds':
+                result = field.get_values_mds_style(lats, lons, months, days)
+            elif lookup == 'interpolated':
+                result = field.get_interpolated_values(lats, lons, months, days)
+            else:
+                result = field.get_values(lats, lons, months, days)
+            if variable_name not in values:
+                variable_names.append(variable_name)
+                values[variable_name] = {}
+            values[variable_name][statistic_name] = result
+
+        for variable_name in variable_names:
+            deck.add_climate_variable(variable_name,
+                                      values[variable_name].get('mean'),
+                                      values[variable_name].get('stdev'))
+
 
 class QC_filter:
     """
@@ -282,12 +548,14 @@ class QC_filter:
         return passes, fails
 
 
-class ClimVariable:
+class ClimVariable(object):
     """
     A simple class for defining a climate variable which is an object with a climatological 
     average and an optional standard deviation.
     """
 
+    __slots__ = ('clim', 'stdev')
+
     def __init__(self, clim, stdev=None):
         """
         Initialise a :class:`.ClimVariable`
@@ -337,13 +605,22 @@ class ClimVariable:
             self.clim = float(clim)
 
 
-class MarineReport:
+class MarineReport(object):
     """
     A class for holding and working with marine reports. The core of the report is a set of data 
     which are taken from an IMMA record used to initialise the class. The report also has an extendible 
     set of QC flags, climate variables and a dictionary for adding new variables that might be needed.
+    The attributes are held in __slots__, so subclasses which also define __slots__ have no instance 
+    dictionary.
     """
 
+    __slots__ = ('data', 'id', 'uid', 'qc', 'climate_variables', 'ext', 'epoch_hours')
+
+    special_qc_types = SPECIAL_QC_TYPES
+
+    # reports define __eq__ and are not hashable
+    __hash__ = None
+
     def __init__(self, imma_rec):
 
         # ['YR','MO','DY','HR','LAT','LON','DS','VS','SLP','AT','SST','DCK','PT','SID','DPT']
@@ -359,18 +636,17 @@ class MarineReport:
             self.uid = None
         # dictionary copied element by element to reduce memory usage
         for k in imma_rec.data:
-            if imma_rec.data[k] is not None and k in VARLIST:
-                self.setvar(k, imma_rec.data[k])
+            if imma_rec.data[k] is not None and k in VARINDEX:
+                self.data[VARINDEX[k]] = imma_rec.data[k]
 
-        self.qc = {}
+        # QC flags indexed by their position in the QC_FLAGS registry, 9 for flags that are not set
+        self.qc = bytearray()
         self.climate_variables = {}
         self.ext = {}
 
         self.calculate_dt()
         self.calculate_dsi_vsi()
 
-        self.special_qc_types = ['POS', 'SST', 'AT', 'DPT', 'SLP', 'W', 'D']
-
     def lat(self):
         """
         Return latitude in range [-90,90]
@@ -392,18 +668,18 @@ class MarineReport:
         """
         ds_convert = [0, 45, 90, 135, 180, 225, 270, 315, 360, None]
 
-        self.ext['dsi'] = None
+        self.setext('dsi', None)
         if self.getvar('DS') is not None:
-            self.ext['dsi'] = ds_convert[self.getvar('DS')]
+            self.setext('dsi', ds_convert[self.getvar('DS')])
 
-        self.ext['vsi'] = None
+        self.setext('vsi', None)
         if self.getvar('VS') is not None:
             if self.getvar('YR') >= 1968:
-                self.ext['vsi'] = self.getvar('VS') * 5.0 - 2.0
+                self.setext('vsi', self.getvar('VS') * 5.0 - 2.0)
             else:
-                self.ext['vsi'] = self.getvar('VS') * 3.0 - 1.0
+                self.setext('vsi', self.getvar('VS') * 3.0 - 1.0)
             if self.getvar('VS') == 0:
-                self.ext['vsi'] = 0.0
+                self.setext('vsi', 0.0)
 
     def calculate_humidity_variables(self, hum_vars):
         """
@@ -423,7 +699,7 @@ class MarineReport:
                     hum_vars]), 'Not all hum vars are present: SHU,VAP,CRH,CWB,DPD'
 
         # Need climatological SLP for calculations
-        slpclim = self.climate_variables['SLP'].getclim()
+        slpclim = self.getnorm('SLP')
         if slpclim is None:
             for var in hum_vars:
                 self.setvar(var, None)
@@ -453,29 +729,64 @@ class MarineReport:
         self.ext = {}
         self.calculate_dsi_vsi()
 
+    def save_state(self):
+        """
+        Take a copy of the QC flags and extra data of the report. The copy can be passed to 
+        :meth:`restore_state` to undo any changes made to them in the meantime.
+        
+        :return: copy of the QC flags and extra data
+        """
+        return bytearray(self.qc), self.ext.copy()
+
+    def restore_state(self, state):
+        """
+        Reset the QC flags and extra data of the report to a copy taken by :meth:`save_state`
+        
+        :param state: copy of the QC flags and extra data from :meth:`save_state`
+        """
+        saved_qc, saved_ext = state
+        self.qc = bytearray(saved_qc)
+        self.ext = saved_ext.copy()
+
     def calculate_dt(self):
         """
         Used to set the internal julian day time in the marine report. This might need to be 
         updated if any of the time variables are changed.
-        """
-        if self.getvar('YR') is not None:
-            mlen = qc.get_month_lengths(self.getvar('YR'))
-            if (self.getvar('MO') is not None and
-                    self.getvar('HR') is not None and
-                    self.getvar('DY') is not None and
-                    0 < self.getvar('DY') <= mlen[self.getvar('MO') - 1]):
-                rounded_hour = int(math.floor(self.getvar('HR')))
-                rounded_minute = int(math.floor(60 *
-                                                (self.getvar('HR') - rounded_hour)))
-                self.dt = datetime(self.getvar('YR'),
-                                   self.getvar('MO'),
-                                   int(self.getvar('DY')),
-                                   rounded_hour,
-                                   rounded_minute)
-            else:
-                self.dt = None
+
+        The time is held in epoch_hours as the number of hours since the start of the julian day 
+        count, rounded down to the minute, or None if the date or time is missing or invalid.
+        """
+        year = self.getvar('YR')
+        month = self.getvar('MO')
+        day = self.getvar('DY')
+        hour = self.getvar('HR')
+        if (year is not None and month is not None and hour is not None and day is not None and
+                0 < day <= qc.get_month_lengths(year)[month - 1]):
+            rounded_hour = int(math.floor(hour))
+            rounded_minute = int(math.floor(60 * (hour - rounded_hour)))
+            self.epoch_hours = (24.0 * qc.jul_day(year, month, int(day)) +
+                                rounded_hour + rounded_minute / 60.)
         else:
-            self.dt = None
+            self.epoch_hours = None
+
+    @property
+    def dt(self):
+        """
+        The time of the report as a datetime, rounded down to the minute, or None if the date or 
+        time is missing or invalid
+        """
+        if self.epoch_hours is None:
+            return None
+        days = int(self.epoch_hours // 24)
+        minutes = int(round(60 * (self.epoch_hours - 24 * days)))
+        return datetime.fromordinal(days - JULIAN_DAY_OF_ORDINAL_ZERO) + timedelta(minutes=minutes)
+
+    def sort_key(self):
+        """
+        Key for sorting reports into ID-then-time order, as used by :meth:`Deck.sort` and 
+        :meth:`Voyage.sort`. Reports with no valid time go after the other reports with the same ID.
+        """
+        return self.getvar('ID'), self.epoch_hours is None, self.epoch_hours
 
     def __sub__(self, other):
         """
@@ -506,7 +817,7 @@ class MarineReport:
         """
         Two marine reports are equal if their ID is equal and they were taken at the same time
         """
-        if self.getvar('ID') == other.getvar('ID') and self.dt == other.dt:
+        if self.getvar('ID') == other.getvar('ID') and self.epoch_hours == other.epoch_hours:
             return True
         else:
             return False
@@ -519,9 +830,9 @@ class MarineReport:
         if self.getvar('ID') > other.getvar('ID'):
             return True
         if (self.getvar('ID') == other.getvar('ID') and
-                self.dt is not None and
-                other.dt is not None and
-                self.dt > other.dt):
+                self.epoch_hours is not None and
+                other.epoch_hours is not None and
+                self.epoch_hours > other.epoch_hours):
             return True
         else:
             return False
@@ -534,7 +845,7 @@ class MarineReport:
         if self.getvar('ID') > other.getvar('ID'):
             return True
         if (self.getvar('ID') == other.getvar('ID') and
-                self.dt >= other.dt):
+                self.epoch_hours >= other.epoch_hours):
             return True
         else:
             return False
@@ -547,7 +858,7 @@ class MarineReport:
         if self.getvar('ID') < other.getvar('ID'):
             return True
         if (self.getvar('ID') == other.getvar('ID') and
-                self.dt <= other.dt):
+                self.epoch_hours <= other.epoch_hours):
             return True
         else:
             return False
@@ -565,6 +876,13 @@ class MarineReport:
         """
         self.climate_variables[name] = ClimVariable(clim, stdev)
 
+    def climate_variable_names(self):
+        """
+        :return: the names of the climate variables that have been added to the report
+        :rtype: list of strings
+        """
+        return self.climate_variables.keys()
+
     def getnorm(self, varname, intype='clim'):
         """
         Retrieve the climatological average for a particular climate variable
@@ -591,12 +909,9 @@ class MarineReport:
         :return: the anomaly (if the climate variable exists), None otherwise.
         :rtype: float
         """
-        if varname in self.climate_variables:
-            clim = self.climate_variables[varname].getclim()
-            if self.getvar(varname) is not None and clim is not None:
-                return self.getvar(varname) - clim
-            else:
-                return None
+        clim = self.getnorm(varname)
+        if self.getvar(varname) is not None and clim is not None:
+            return self.getvar(varname) - clim
         else:
             return None
 
@@ -609,13 +924,10 @@ class MarineReport:
         :return: the anomaly (if the climate variable exists) standardised by the standard deviation, None otherwise.
         :rtype: float
         """
-        if varname in self.climate_variables:
-            clim = self.climate_variables[varname].getclim()
-            stdev = self.climate_variables[varname].getclim('stdev')
-            if self.getvar(varname) is not None and clim is not None and stdev is not None:
-                return (self.getvar(varname) - clim) / stdev
-            else:
-                return None
+        clim = self.getnorm(varname)
+        stdev = self.getnorm(varname, 'stdev')
+        if self.getvar(varname) is not None and clim is not None and stdev is not None:
+            return (self.getvar(varname) - clim) / stdev
         else:
             return None
 
@@ -642,6 +954,13 @@ class MarineReport:
         """
         self.ext[varname] = varvalue
 
+    def ext_variables(self):
+        """
+        :return: the extended variables that have been set for the report
+        :rtype: dictionary
+        """
+        return self.ext.copy()
+
     def setvar(self, varname, varvalue):
         """
         Set a particular variable in the data
@@ -689,6 +1008,20 @@ class MarineReport:
         else:
             return self.ext[varname]
 
+    def getvars(self, varnames):
+        """
+        Get several variables at once. Variables in VARLIST are read straight from the data, 
+        so missing values come back as None or NaN and integer variables are not converted. 
+        This is used by :class:`.Deck` to read columns of values quickly.
+        
+        :param varnames: names of the variables to be retrieved
+        :type varnames: list of strings
+        :return: the values of the variables
+        :rtype: list
+        """
+        return [self.data[VARINDEX[varname]] if varname in VARINDEX else self.getvar(varname)
+                for varname in varnames]
+
     def set_qc(self, qc_type, specific_flag, set_value):
         """
         Set a particular QC flag
@@ -703,12 +1036,32 @@ class MarineReport:
         The specified flag in the general QC area of qc_type is set to the given value. This 
         should be a reasonably flexible system to which new QC flags can be easily added.
         """
-        assert set_value in [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], \
-            "value not in 0-9" + str(set_value)
-        assert ((qc_type in self.special_qc_types) or
-                (qc_type in VARLIST)), "unknown data type " + qc_type
+        assert set_value in QC_FLAG_VALUES, "value not in 0-9" + str(set_value)
+
+        flag_indices = QC_FLAGS.indices[qc_type]
+        if specific_flag in flag_indices:
+            index = flag_indices[specific_flag]
+        else:
+            index = QC_FLAGS.register(qc_type, specific_flag)
+        if index >= len(self.qc):
+            self.qc.extend([9] * (index + 1 - len(self.qc)))
+        self.qc[index] = set_value
 
-        self.qc[qc_type + specific_flag] = set_value
+    def set_qc_row(self, indices, values):
+        """
+        Set several QC flags at once, given by their indices in the QC_FLAGS registry. The values 
+        are not checked. This is used by :class:`.Deck` to write flags for many reports quickly.
+        
+        :param indices: indices of the flags in QC_FLAGS
+        :param values: the values which are to be given to the flags
+        :type indices: list of integers
+        :type values: list of integers in 0-9
+        """
+        size = max(indices) + 1
+        if size > len(self.qc):
+            self.qc.extend([9] * (size - len(self.qc)))
+        for index, value in zip(indices, values):
+            self.qc[index] = value
 
     def get_qc(self, qc_type, specific_flag):
         """
@@ -723,10 +1076,12 @@ class MarineReport:
         
         Returns the value of a specific_flag or 9 if the specific_flag is not set.
         """
-        if qc_type + specific_flag in self.qc:
-            return self.qc[qc_type + specific_flag]
-        else:
-            return 9
+        flag_indices = QC_FLAGS.indices[qc_type]
+        if specific_flag in flag_indices:
+            index = flag_indices[specific_flag]
+            if index < len(self.qc):
+                return self.qc[index]
+        return 9
 
     def saturated(self):
         """
@@ -1087,6 +1442,8 @@ class MarineReportQC(MarineReport):
     and QI (Quality Improvement) to the reports.
     """
 
+    __slots__ = ()
+
     def perform_base_qc(self, parameters):
         """
         Run all the base QC checks defined in the Class
@@ -1095,12 +1452,13 @@ class MarineReportQC(MarineReport):
 
         self.is_buoy()
         self.is_ship()
+        self.is_generic()
         self.is_deck_780()
 
         self.do_position_check()
         self.do_date_check()
         self.do_time_check()
-        self.do_blacklist()
+        self.do_blacklist(parameters)
         self.do_day_check(parameters['base']['time_since_sun_above_horizon'])
 
         self.humidity_blacklist()
@@ -1133,13 +1491,14 @@ class MarineReportQC(MarineReport):
 
         self.is_buoy()
         self.is_ship()
+        self.is_generic()
 
         self.wind_blacklist()
 
         self.do_position_check()
         self.do_date_check()
         self.do_time_check()
-        self.do_blacklist()
+        self.do_blacklist(parameters)
 
         self.do_base_wind_qc(parameters['W'])
 
@@ -1151,13 +1510,14 @@ class MarineReportQC(MarineReport):
 
         self.is_buoy()
         self.is_ship()
+        self.is_generic()
 
         self.mat_blacklist()
 
         self.do_position_check()
         self.do_date_check()
         self.do_time_check()
-        self.do_blacklist()
+        self.do_blacklist(parameters)
         self.do_day_check(parameters['base']['time_since_sun_above_horizon'])
 
         self.do_base_dat_qc(parameters['DAT'])
@@ -1170,12 +1530,13 @@ class MarineReportQC(MarineReport):
 
         self.is_buoy()
         self.is_ship()
+        self.is_generic()
         self.is_deck_780()
 
         self.do_position_check()
         self.do_date_check()
         self.do_time_check()
-        self.do_blacklist()
+        self.do_blacklist(parameters)
         self.do_day_check(parameters['base']['time_since_sun_above_horizon'])
 
         self.do_base_slp_qc(parameters['SLP'])
@@ -1188,12 +1549,13 @@ class MarineReportQC(MarineReport):
 
         self.is_buoy()
         self.is_ship()
+        self.is_generic()
         self.is_deck_780()
 
         self.do_position_check()
         self.do_date_check()
         self.do_time_check()
-        self.do_blacklist()
+        self.do_blacklist(parameters)
         self.do_day_check(parameters['base']['time_since_sun_above_horizon'])
 
         self.do_base_sst_qc(parameters['SST'])
@@ -1216,8 +1578,7 @@ class MarineReportQC(MarineReport):
         Deck 701 has a whole bunch of otherwise good obs with missing Hours.
         Set to 0000UTC and recalculate the ob time
         """
-        if (self.getvar('DCK') == 701 and self.getvar('YR') < 1860 and
-                self.getvar('HR') is None):
+        if qc.deck_701_missing_hour(self.getvar('DCK'), self.getvar('YR'), self.getvar('HR')):
             self.setvar('HR', 0)
             self.calculate_dt()
 
@@ -1262,18 +1623,25 @@ class MarineReportQC(MarineReport):
         else:
             self.set_qc('POS', 'day', 1)
 
-    def do_blacklist(self):
+    def do_blacklist(self, parameters=None):
         """
         Do basic blacklisting on the report
+
+        :param parameters: the QC parameters. The blacklist is compiled from their rules, see 
+            :meth:`qc.Blacklist.from_parameters`. If they are not given the default rules are used.
+        :type parameters: dictionary
         """
+        blacklist = qc.DEFAULT_BLACKLIST
+        if parameters is not None:
+            blacklist = qc.Blacklist.from_parameters(parameters)
         self.set_qc('POS', 'blklst',
-                    qc.blacklist(self.getvar('ID'),
-                                 self.getvar('DCK'),
-                                 self.getvar('YR'),
-                                 self.getvar('MO'),
-                                 self.lat(),
-                                 self.lon(),
-                                 self.getvar('PT')))
+                    blacklist.check(self.getvar('ID'),
+                                    self.getvar('DCK'),
+                                    self.getvar('YR'),
+                                    self.getvar('MO'),
+                                    self.lat(),
+                                    self.lon(),
+                                    self.getvar('PT')))
 
     def do_base_wind_qc(self, parameters):
         """
@@ -1393,22 +1761,13 @@ class MarineReportQC(MarineReport):
         """
         Flag certain sources as ineligible for wind QC. Based on Shawn Smith's list
         """
-        self.set_qc('W', 'wind_blacklist', 0)
-
-        if self.getvar('DCK') in [708, 780]:
-            self.set_qc('W', 'wind_blacklist', 1)
-
-        pass
+        self.set_qc('W', 'wind_blacklist', qc.wind_blacklist(self.getvar('DCK')))
 
     def humidity_blacklist(self):
         """
         Flag certain sources as ineligible for humidity QC. 
         """
-        self.set_qc('DPT', 'hum_blacklist', 0)
-        if self.getvar('PT') in [0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 15]:
-            self.set_qc('DPT', 'hum_blacklist', 0)
-        else:
-            self.set_qc('DPT', 'hum_blacklist', 1)
+        self.set_qc('DPT', 'hum_blacklist', qc.humidity_blacklist(self.getvar('PT')))
 
     def mat_blacklist(self):
         """
@@ -1418,36 +1777,20 @@ class MarineReportQC(MarineReport):
         Indian Ocean area in the 19th Century.
         """
         # See Kent et al. HadNMAT2 QC section
-        self.set_qc('AT', 'mat_blacklist', 0)
-
-        if self.getvar('PT') == 5 and self.getvar('DCK') == 780:
-            self.set_qc('AT', 'mat_blacklist', 1)
-
-        # make sure lons are in range -180 to 180
-        lon = self.lon()
-        lat = self.lat()
-        # North Atlantic, Suez and indian ocean to be excluded from MAT processing
-        if (self.getvar('DCK') == 193 and
-                1880 <= self.getvar('YR') <= 1892 and
-                ((-80.0 <= lon <= 0.0 and 40.0 <= lat <= 55.0) or
-                 (-10.0 <= lon <= 30.0 and 35.0 <= lat <= 45.0) or
-                 (15.0 <= lon <= 45.0 and -10.0 <= lat <= 40.0) or
-                 (15.0 <= lon <= 95.0 and lat >= -10.0 and lat <= 15.0) or
-                 (95.0 <= lon <= 105.0 and -10.0 <= lat <= 5.0)
-                )):
-            self.set_qc('AT', 'mat_blacklist', 1)
+        self.set_qc('AT', 'mat_blacklist', qc.mat_blacklist(self.getvar('PT'), self.getvar('DCK'), self.getvar('YR'),
+                                                            self.lat(), self.lon()))
 
     def is_buoy(self):
         """
         Identify whether report is from a moored or drifting buoy based 
         on ICOADS platform type PT. Set additional flag to pick out drifters only
         """
-        if self.getvar('PT') in [6, 7]:
+        if self.getvar('PT') in BUOY_PLATFORM_TYPES:
             self.set_qc('POS', 'isbuoy', 1)
         else:
             self.set_qc('POS', 'isbuoy', 0)
 
-        if self.getvar('PT') == 7:
+        if self.getvar('PT') in DRIFTER_PLATFORM_TYPES:
             self.set_qc('POS', 'isdrifter', 1)
         else:
             self.set_qc('POS', 'isdrifter', 0)
@@ -1457,101 +1800,354 @@ class MarineReportQC(MarineReport):
         Identify whether report is from a ship based 
         on ICOADS platform type PT
         """
-        if self.getvar('PT') in [0, 1, 2, 3, 4, 5, 10, 11, 12, 17]:
+        if self.getvar('PT') in SHIP_PLATFORM_TYPES:
             self.set_qc('POS', 'isship', 1)
         else:
             self.set_qc('POS', 'isship', 0)
 
+    def is_generic(self):
+        """
+        Identify whether the ID of the report is one of the generic IDs shared 
+        by many ships, see :func:`qc.id_is_generic`
+        """
+        if qc.id_is_generic(self.getvar('ID'), self.getvar('YR')):
+            self.set_qc('POS', 'isgeneric', 1)
+        else:
+            self.set_qc('POS', 'isgeneric', 0)
+
 
-class Voyage:
+class NameRegistry:
     """
-    Class for handling lists of MarineReports as coherent sets of measurements 
-    from a single ship. Includes track check and repeated value checks which 
-    operate on all the observations in the :class:`.Voyage`.
+    A registry which gives each name a fixed index the first time it is used, so that
+    values can be stored by position in a list rather than in a dictionary.
     """
 
     def __init__(self):
-        self.reps = []
-
-    def __len__(self):
-        return len(self.reps)
+        self.indices = {}
+        self.names = []
 
-    def rep_feed(self):
+    def register(self, name):
         """
-        Function for iterating over the MarineReports in a Voyage
+        Find the index of a name, registering it if this is the first time it has been used
+
+        :param name: the name
+        :type name: string
+        :return: the index of the name
+        :rtype: integer
         """
-        for rep in self.reps:
-            yield rep
+        if name in self.indices:
+            return self.indices[name]
+        index = len(self.names)
+        self.indices[name] = index
+        self.names.append(name)
+        return index
 
-    def getrep(self, position):
+
+# registries of the extended variables and climate variables held by CompactMarineReport
+EXT_VARIABLES = NameRegistry()
+CLIMATE_VARIABLES = NameRegistry()
+
+
+class _NotSet(object):
+    """
+    Marker for the extended variables and climate variables of a :class:`.CompactMarineReport`
+    which have not been set. There is only one and copying it gives the same object.
+    """
+
+    __slots__ = ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+NOT_SET = _NotSet()
+
+
+class CompactMarineReport(MarineReportQC):
+    """
+    A memory-lean version of :class:`.MarineReportQC` for holding large numbers of reports.
+    Attributes are held in __slots__ rather than an instance dictionary. The data are held as
+    native Python numbers in a list indexed by position in VARLIST, with None for missing values,
+    rather than in a numpy array, and integer variables are stored as int so getvar does not
+    have to convert them. Extended variables and climatological averages and standard deviations
+    are held in lists indexed through the EXT_VARIABLES and CLIMATE_VARIABLES registries rather
+    than in dictionaries.
+
+    The getvar/setvar/getext/setext, climatology and QC methods are the same as for
+    :class:`.MarineReportQC`, but floats come back as Python floats rather than numpy floats.
+    """
+
+    __slots__ = ('norms',)
+
+    def __init__(self, imma_rec):
+        self.data = [None] * len(VARLIST)
+        self.id = imma_rec.data.get('ID')
+        self.uid = imma_rec.data.get('UID')
+        for k in imma_rec.data:
+            if imma_rec.data[k] is not None and k in VARINDEX:
+                self._setdata(k, imma_rec.data[k])
+
+        self.qc = bytearray()
+        # climatological average and standard deviation of each climate variable, in pairs
+        self.norms = []
+        self.ext = []
+
+        self.calculate_dt()
+        self.calculate_dsi_vsi()
+
+    def reset_ext(self):
         """
-        Get the report for a particular location in the list
-        
-        :param position: the position the desired report occupies in the list
-        :type position: integer
-        :return: MarineReport at required index in the Voyage
-        :rtype: MarineReport
+        Remove all extra data and recalculate the unpacked speeds and directions
         """
-        return self.reps[position]
+        self.ext = []
+        self.calculate_dsi_vsi()
 
-    def last_rep(self):
+    def save_state(self):
         """
-        Get the last report in the Voyage
-        
-        :return: last MarineReport in the Voyage
-        :rtype: MarineReport
+        Take a copy of the QC flags and extra data of the report. The copy can be passed to
+        :meth:`restore_state` to undo any changes made to them in the meantime.
+
+        :return: copy of the QC flags and extra data
         """
-        nreps = len(self.reps)
-        return self.reps[nreps - 1]
+        return bytearray(self.qc), list(self.ext)
 
-    def setvar(self, position, varname, value):
+    def restore_state(self, state):
         """
-        Set a particular variable from a particular report
-        
-        :param position: the position the desired report occupies in the list
-        :param varname: the variable name to recover
-        :param value: the variable value
-        :type position: integer
-        :type varname: string
-        :type value: float or string
+        Reset the QC flags and extra data of the report to a copy taken by :meth:`save_state`
+
+        :param state: copy of the QC flags and extra data from :meth:`save_state`
         """
-        return self.reps[position].setvar(varname, value)
+        saved_qc, saved_ext = state
+        self.qc = bytearray(saved_qc)
+        self.ext = list(saved_ext)
 
-    def getvar(self, position, varname):
+    def add_climate_variable(self, name, clim, stdev=None):
         """
-        Get a particular variable from a particular report
-        
-        :param position: the position the desired report occupies in the list
-        :param varname: the variable name to recover
-        :type position: integer
-        :type varname: string
-        :return: variable value at required index
-        :rtype: string, float
+        Add a climate variable to a marine report
+
+        :param name: the name of the climate variable
+        :param clim: the climatological average of the climate variable
+        :param stdev: optional standard deviation, default is None
+        :type name: string
+        :type clim: float
+        :type stdev: float
         """
-        return self.reps[position].getvar(varname)
+        i = 2 * CLIMATE_VARIABLES.register(name)
+        if i >= len(self.norms):
+            self.norms.extend([NOT_SET] * (i + 2 - len(self.norms)))
+        self.norms[i] = None if clim is None else float(clim)
+        self.norms[i + 1] = None if stdev is None else float(stdev)
 
-    def set_qc(self, position, qc_type, specific_flag, set_value):
+    def climate_variable_names(self):
         """
-        Set the QC flag of a report at a specified position to a specified value
-        
-        :param position: the position the desired report occupies in the list
-        :param qc_type: the general QC area e.g. SST, MAT...
-        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
-        :param set_value: the value which is to be given to the flag
-        :type position: integer
-        :type qc_type: string
-        :type specific_flag: string
-        :type set_value: integer in 0-9
+        :return: the names of the climate variables that have been added to the report
+        :rtype: list of strings
         """
-        self.reps[position].set_qc(qc_type, specific_flag, set_value)
+        return [name for i, name in enumerate(CLIMATE_VARIABLES.names)
+                if 2 * i < len(self.norms) and self.norms[2 * i] is not NOT_SET]
 
-    def get_qc(self, position, qc_type, specific_flag):
+    def getnorm(self, varname, intype='clim'):
         """
-        Get the QC flag for a report at a specified position
-        
-        :param position: the position the desired report occupies in the list
-        :param qc_type: the general QC area e.g. SST, MAT...
-        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
+        Retrieve the climatological average for a particular climate variable
+
+        :param varname: the name of the climate variable for which you want the climatological average
+        :param intype: the type of norm required 'clim' for climatological average and 'stdev' for standard deviation,
+            default is 'clim'
+        :type varname: string
+        :type intype: string
+        :return: the climatological average (if the climate variable exists), None otherwise.
+        :rtype: float
+        """
+        assert intype in ['clim', 'stdev'], 'unknown type ' + str(intype)
+        if varname not in CLIMATE_VARIABLES.indices:
+            return None
+        i = 2 * CLIMATE_VARIABLES.indices[varname]
+        if intype == 'stdev':
+            i += 1
+        if i >= len(self.norms) or self.norms[i] is NOT_SET:
+            return None
+        return self.norms[i]
+
+    def getext(self, varname):
+        """
+        Function to get a particular variable from the extended data
+
+        :param varname: variable name to be retrieved from the extended data
+        :type varname: string
+        :return: the named variable
+        :rtype: depends on the variable
+        """
+        i = EXT_VARIABLES.indices.get(varname)
+        assert (i is not None and i < len(self.ext) and
+                self.ext[i] is not NOT_SET), "unknown extended variable name " + varname
+        return self.ext[i]
+
+    def setext(self, varname, varvalue):
+        """
+        Set a particular variable in the extended data
+
+        :param varvalue: value of variable to be set
+        :param varname: variable name to be set in the extended data
+        :type varvalue: float
+        :type varname: string
+        """
+        i = EXT_VARIABLES.register(varname)
+        if i >= len(self.ext):
+            self.ext.extend([NOT_SET] * (i + 1 - len(self.ext)))
+        self.ext[i] = varvalue
+
+    def ext_variables(self):
+        """
+        :return: the extended variables that have been set for the report
+        :rtype: dictionary
+        """
+        return dict((EXT_VARIABLES.names[i], value) for i, value in enumerate(self.ext) if value is not NOT_SET)
+
+    def setvar(self, varname, varvalue):
+        """
+        Set a particular variable in the data
+
+        :param varvalue: value of variable to be set
+        :param varname: variable name to be set
+        :type varvalue: float
+        :type varname: string
+        """
+        if varname == 'ID':
+            self.id = varvalue
+        elif varname == 'UID':
+            self.uid = varvalue
+        else:
+            self._setdata(varname, varvalue)
+
+        if varname in ['YR', 'DY', 'HR']:
+            self.calculate_dt()
+
+    def _setdata(self, varname, varvalue):
+        """
+        Store a variable from VARLIST as a native Python number, or None if it is missing
+        """
+        i = VARINDEX[varname]
+        if varvalue is None or varvalue != varvalue:
+            self.data[i] = None
+        elif varname in INTEGER_VARIABLES:
+            self.data[i] = int(varvalue)
+        else:
+            self.data[i] = float(varvalue)
+
+    def getvar(self, varname):
+        """
+        Get a variable which is either in the data or extended data. Both data and extended data
+        will be queried and the function returns None if the varname is not found in either one.
+
+        :param varname: variable name to be retrieved
+        :type varname: string
+        :return: the named variable from either the data or extended data
+        :rtype: depends on the variable
+        """
+        if varname in VARINDEX:
+            return self.data[VARINDEX[varname]]
+        if varname == 'ID':
+            return self.id
+        if varname == 'UID':
+            return self.uid
+        i = EXT_VARIABLES.indices.get(varname)
+        if i is not None and i < len(self.ext) and self.ext[i] is not NOT_SET:
+            return self.ext[i]
+        return None
+
+
+class Voyage:
+    """
+    Class for handling lists of MarineReports as coherent sets of measurements 
+    from a single ship. Includes track check and repeated value checks which 
+    operate on all the observations in the :class:`.Voyage`.
+    """
+
+    def __init__(self):
+        self.reps = []
+
+    def __len__(self):
+        return len(self.reps)
+
+    def rep_feed(self):
+        """
+        Function for iterating over the MarineReports in a Voyage
+        """
+        for rep in self.reps:
+            yield rep
+
+    def getrep(self, position):
+        """
+        Get the report for a particular location in the list
+        
+        :param position: the position the desired report occupies in the list
+        :type position: integer
+        :return: MarineReport at required index in the Voyage
+        :rtype: MarineReport
+        """
+        return self.reps[position]
+
+    def last_rep(self):
+        """
+        Get the last report in the Voyage
+        
+        :return: last MarineReport in the Voyage
+        :rtype: MarineReport
+        """
+        nreps = len(self.reps)
+        return self.reps[nreps - 1]
+
+    def setvar(self, position, varname, value):
+        """
+        Set a particular variable from a particular report
+        
+        :param position: the position the desired report occupies in the list
+        :param varname: the variable name to recover
+        :param value: the variable value
+        :type position: integer
+        :type varname: string
+        :type value: float or string
+        """
+        return self.reps[position].setvar(varname, value)
+
+    def getvar(self, position, varname):
+        """
+        Get a particular variable from a particular report
+        
+        :param position: the position the desired report occupies in the list
+        :param varname: the variable name to recover
+        :type position: integer
+        :type varname: string
+        :return: variable value at required index
+        :rtype: string, float
+        """
+        return self.reps[position].getvar(varname)
+
+    def set_qc(self, position, qc_type, specific_flag, set_value):
+        """
+        Set the QC flag of a report at a specified position to a specified value
+        
+        :param position: the position the desired report occupies in the list
+        :param qc_type: the general QC area e.g. SST, MAT...
+        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
+        :param set_value: the value which is to be given to the flag
+        :type position: integer
+        :type qc_type: string
+        :type specific_flag: string
+        :type set_value: integer in 0-9
+        """
+        self.reps[position].set_qc(qc_type, specific_flag, set_value)
+
+    def get_qc(self, position, qc_type, specific_flag):
+        """
+        Get the QC flag for a report at a specified position
+        
+        :param position: the position the desired report occupies in the list
+        :param qc_type: the general QC area e.g. SST, MAT...
+        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
         :type position: integer
         :type qc_type: string
         :type specific_flag: string
@@ -1586,7 +2182,7 @@ class Voyage:
         """
         Sorts the reports into time order
         """
-        self.reps.sort()
+        self.reps.sort(key=lambda rep: rep.sort_key())
         # then recalculate times, speeds etc.
         if len(self.reps) > 1:
             for i in range(1, len(self.reps)):
@@ -1730,10 +2326,10 @@ class Voyage:
         for i, rep in enumerate(self.reps):
             if rep.getvar(intype) is not None:
                 allcount += 1
-                if str(rep.getvar(intype)) in valcount:
-                    valcount[str(rep.getvar(intype))].append(i)
+                if repr(rep.getvar(intype)) in valcount:
+                    valcount[repr(rep.getvar(intype))].append(i)
                 else:
-                    valcount[str(rep.getvar(intype))] = [i]
+                    valcount[repr(rep.getvar(intype))] = [i]
 
         if allcount > min_count:
             wholenums = 0
@@ -1780,10 +2376,10 @@ class Voyage:
         for i, rep in enumerate(self.reps):
             if rep.getvar(intype) is not None:
                 allcount += 1
-                if str(rep.getvar(intype)) in valcount:
-                    valcount[str(rep.getvar(intype))].append(i)
+                if repr(rep.getvar(intype)) in valcount:
+                    valcount[repr(rep.getvar(intype))].append(i)
                 else:
-                    valcount[str(rep.getvar(intype))] = [i]
+                    valcount[repr(rep.getvar(intype))] = [i]
 
         if allcount > min_count:
             for key in valcount:
@@ -2006,6 +2602,19 @@ class Voyage:
 
         return midpoint_discrepancies
 
+    def id_is_generic(self):
+        """
+        Test whether the ID of the reports in the :class:`.Voyage` is generic. The isgeneric flag set by the 
+        base QC is used where there is one, see :meth:`.MarineReportQC.is_generic`.
+
+        :return: True if the ID is generic and False otherwise
+        :rtype: logical
+        """
+        flag = self.get_qc(0, 'POS', 'isgeneric')
+        if flag == 9:
+            return qc.id_is_generic(self.getvar(0, 'ID'), self.getvar(0, 'YR'))
+        return flag == 1
+
     def iquam_track_check(self, parameters):
         """
         Perform the IQUAM track check as detailed in Xu and Ignatov 2013
@@ -2029,8 +2638,7 @@ class Voyage:
         if numobs == 0:
             return
 
-        if qc.id_is_generic(self.getvar(0, 'ID'),
-                            self.getvar(0, 'YR')):
+        if self.id_is_generic():
             for i in range(0, numobs):
                 self.set_qc(i, 'POS', 'iquam_track', 0)
             return
@@ -2106,7 +2714,7 @@ class Voyage:
             return
 
         # Generic ids and buoys get a free pass on the track check
-        if (qc.id_is_generic(self.getvar(0, 'ID'), self.getvar(0, 'YR')) or
+        if (self.id_is_generic() or
                 self.getvar(0, 'PT') == 6 or
                 self.getvar(0, 'PT') == 7):
             nobs = len(self)
@@ -2889,6 +3497,64 @@ class Np_Super_Ob:
         return self.buddy_stdev[xindex][yindex][pindex]
 
 
+class IDClassification:
+    """
+    Classification of a set of reports by ID: whether the ID is generic (see :func:`qc.id_is_generic`) 
+    and whether the reports are from ships, buoys, drifting buoys or Deck 780. The reports are grouped 
+    by ID and year with :func:`numpy.unique` and whether the ID is generic is worked out once for each 
+    ID and year. The other classifications are made directly from the platform types and decks. The 
+    results are arrays with one value for each report.
+    """
+
+    def __init__(self, ids, years, platforms, decks):
+        """
+        :param ids: IDs of the reports
+        :param years: years of the reports, NaN where missing
+        :param platforms: platform types of the reports, NaN where missing
+        :param decks: decks of the reports, NaN where missing
+        :type ids: list of strings
+        :type years: numpy array
+        :type platforms: numpy array
+        :type decks: numpy array
+        """
+        ids = np.asarray(ids, dtype=object)
+        years = np.asarray(years, dtype=float)
+        platforms = np.asarray(platforms, dtype=float)
+        decks = np.asarray(decks, dtype=float)
+
+        # missing IDs get a code of their own, after those of the IDs which are present
+        missing_ids = np.equal(ids, None)
+        id_values, id_codes = np.unique(np.where(missing_ids, '', ids).astype(str), return_inverse=True)
+        id_codes = np.where(missing_ids, len(id_values), id_codes)
+        id_values = id_values.tolist() + [None]
+        year_values = np.unique(years[~np.isnan(years)]).tolist() + [None]
+        year_codes = np.where(np.isnan(years), len(year_values) - 1, np.searchsorted(year_values[:-1], years))
+
+        # whether each ID is generic in each year, looked up for every report by its ID and year codes
+        generic_table = np.array([[qc.id_is_generic(inid, inyear) for inyear in year_values] for inid in id_values],
+                                 dtype=bool).reshape(len(id_values), len(year_values))
+        self.generic = generic_table[id_codes, year_codes]
+        self.isship = np.in1d(platforms, SHIP_PLATFORM_TYPES)
+        self.isbuoy = np.in1d(platforms, BUOY_PLATFORM_TYPES)
+        self.isdrifter = np.in1d(platforms, DRIFTER_PLATFORM_TYPES)
+        self.is780 = decks == 780
+
+    @classmethod
+    def from_deck(cls, deck):
+        """
+        Classify the reports in a :class:`.Deck`
+
+        :param deck: the reports
+        :type deck: :class:`.Deck`
+        :return: the classification
+        :rtype: :class:`.IDClassification`
+        """
+        return cls(deck.getvar('ID'), deck.getvar('YR'), deck.getvar('PT'), deck.getvar('DCK'))
+
+    def __len__(self):
+        return len(self.generic)
+
+
 class Deck:
     """
     A class for aggregating individual MarineReports and doing things to them. For example, 
@@ -2930,12 +3596,88 @@ class Deck:
         else:
             self.idtracker[rep.getvar('ID')] = [i]
 
+    def getvar(self, varname):
+        """
+        Get the values of a variable for all the reports in the :class:`.Deck`
+        
+        :param varname: name of the variable
+        :type varname: string
+        :return: array of values, NaN where missing, or an object array for ID and UID
+        :rtype: numpy array
+        """
+        values = [rep.getvar(varname) for rep in self.reps]
+        if varname in ['ID', 'UID']:
+            return np.array(values, dtype=object)
+        return np.array(values, dtype=float)
+
+    def add_climate_variable(self, name, clim, stdev=None):
+        """
+        Add a climate variable to every report in the :class:`.Deck`
+        
+        :param name: the name of the climate variable
+        :param clim: climatological averages, one per report, NaN where missing
+        :param stdev: climatological standard deviations, one per report, NaN where missing. Default is None
+        :type name: string
+        :type clim: numpy array
+        :type stdev: numpy array
+        """
+        for i, rep in enumerate(self.reps):
+            rep_clim = None
+            if clim is not None and not np.isnan(clim[i]):
+                rep_clim = clim[i]
+            rep_stdev = None
+            if stdev is not None and not np.isnan(stdev[i]):
+                rep_stdev = stdev[i]
+            rep.add_climate_variable(name, rep_clim, rep_stdev)
+
+    def getnorm(self, varname, intype='clim'):
+        """
+        Get the climatological averages or standard deviations of a climate variable for all the 
+        reports in the :class:`.Deck`
+        
+        :param varname: the name of the climate variable
+        :param intype: 'clim' for climatological average and 'stdev' for standard deviation
+        :type varname: string
+        :type intype: string
+        :return: array of values, NaN where there is no climatology
+        :rtype: numpy array
+        """
+        return np.array([rep.getnorm(varname, intype) for rep in self.reps], dtype=float)
+
+    def getvars(self, varnames):
+        """
+        Get the values of several variables for all the reports in the :class:`.Deck`, reading 
+        all of them in one pass over the reports
+        
+        :param varnames: names of the variables, not including ID or UID
+        :type varnames: list of strings
+        :return: arrays of values, NaN where missing, by variable name
+        :rtype: dictionary of numpy arrays
+        """
+        values = np.array([rep.getvars(varnames) for rep in self.reps], dtype=float)
+        values = values.reshape(len(self), len(varnames))
+        return dict((varname, values[:, i]) for i, varname in enumerate(varnames))
+
+    def getnorms(self, varnames):
+        """
+        Get the climatological averages and standard deviations of several climate variables for 
+        all the reports in the :class:`.Deck`, reading all of them in one pass over the reports
+        
+        :param varnames: names of the climate variables
+        :type varnames: list of strings
+        :return: arrays of climatological averages and of standard deviations, NaN where there is 
+            no climatology, by variable name
+        :rtype: dictionary of pairs of numpy arrays
+        """
+        values = np.array([[rep.getnorm(varname, intype) for varname in varnames for intype in ['clim', 'stdev']]
+                           for rep in self.reps], dtype=float).reshape(len(self), 2 * len(varnames))
+        return dict((varname, (values[:, 2 * i], values[:, 2 * i + 1])) for i, varname in enumerate(varnames))
+
     def sort(self):
         """
-        Sort the MarineReports into ID-then-time order. This can be very slow 
-        for large numbers of observations. 
+        Sort the MarineReports into ID-then-time order and rebuild the index of IDs
         """
-        self.reps.sort()
+        self.reps.sort(key=lambda rep: rep.sort_key())
         self.index_by_id()
 
     def index_by_id(self):
@@ -2944,11 +3686,13 @@ class Deck:
         get_one_platform_at_a_time to yield a bunch of objects of class :class:`.Voyage` 
         corresponding to all obs from a single ID.
         """
+        self.idtracker = {}
         for i, rep in enumerate(self.reps):
-            if rep.getvar('ID') in self.idtracker:
-                self.idtracker[rep.getvar('ID')].append(i)
+            rep_id = rep.getvar('ID')
+            if rep_id in self.idtracker:
+                self.idtracker[rep_id].append(i)
             else:
-                self.idtracker[rep.getvar('ID')] = [i]
+                self.idtracker[rep_id] = [i]
 
     def pop(self, pos=0):
         """
@@ -2965,7 +3709,7 @@ class Deck:
 
         :param qc_type: the general QC area e.g. SST, MAT...
         :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
-        :param set_value: the value which is to be given to the flag
+        :param set_value: the value which is to be given to the flag, or an array of values, one per report
         :type qc_type: string
         :type specific_flag: string
         :type set_value: integer in 0-9
@@ -2973,11 +3717,167 @@ class Deck:
         The specified flag in the general QC area of qc_type is set to the given value. This 
         should be a reasonably flexible system to which new QC flags can be easily added.
         """
-
-        for rep in self.reps:
-            rep.set_qc(qc_type, specific_flag, set_value)
+        if np.ndim(set_value) == 0:
+            for rep in self.reps:
+                rep.set_qc(qc_type, specific_flag, set_value)
+        else:
+            for rep, value in zip(self.reps, np.asarray(set_value, dtype=int).tolist()):
+                rep.set_qc(qc_type, specific_flag, value)
         return
 
+    def set_qc_flags(self, flags):
+        """
+        Set several QC flags for all the MarineReports in the :class:`.Deck`, writing all of them 
+        in one pass over the reports
+        
+        :param flags: the QC area, flag name and array of values, one per report, of each flag
+        :type flags: list of tuples
+        """
+        if len(flags) == 0 or len(self) == 0:
+            return
+        indices = [QC_FLAGS.register(qc_type, specific_flag) for qc_type, specific_flag, values in flags]
+        values = np.array([np.asarray(values, dtype=int) for qc_type, specific_flag, values in flags])
+        assert np.all((values >= 0) & (values <= 9)), "value not in 0-9"
+        for rep, rep_values in zip(self.reps, values.T.tolist()):
+            rep.set_qc_row(indices, rep_values)
+
+    def perform_base_qc(self, parameters, ephemeris=None):
+        """
+        Run all the base QC checks on every report in the :class:`.Deck`. This gives the same flags as 
+        :meth:`.MarineReportQC.perform_base_qc` applied to each report, but the checks are done on 
+        whole columns of values with the array versions of the QC functions in :mod:`qc`. The 
+        columns are read in one pass over the reports and the flags are written in another. The 
+        blacklist is compiled from the rules in the parameters, see :meth:`qc.Blacklist.from_parameters`. 
+        Unlike perform_base_qc, reports with a missing latitude, longitude, year or month fail the 
+        position and date checks rather than raising an error.
+        
+        :param parameters: the QC parameters, as for :meth:`.MarineReportQC.perform_base_qc`
+        :param ephemeris: optional cache of the position of the sun used for the day check. If it is 
+            not given the day check uses :func:`qc.day_test_array`
+        :type parameters: dictionary
+        :type ephemeris: :class:`qc.SolarEphemeris`
+        """
+        columns = self.getvars(['DCK', 'YR', 'MO', 'DY', 'HR', 'LAT', 'LON', 'PT',
+                                'SST', 'AT', 'AT2', 'DPT', 'SHU', 'RH', 'SLP', 'W', 'D'])
+        norms = self.getnorms(['SST', 'AT', 'AT2', 'DPT', 'SLP'])
+        ids = self.getvar('ID')
+
+        deck_ids = columns['DCK']
+        years = columns['YR']
+        months = columns['MO']
+        days = columns['DY']
+        hours = columns['HR']
+        lats = columns['LAT']
+        lons = columns['LON']
+        platforms = columns['PT']
+
+        # Deck 701 has a whole bunch of otherwise good obs with missing Hours
+        missing_hours = qc.deck_701_missing_hour_array(deck_ids, years, hours)
+        for i in np.nonzero(missing_hours)[0]:
+            rep = self.reps[i]
+            rep.setvar('HR', 0)
+            rep.calculate_dt()
+        hours = np.where(missing_hours, 0.0, hours)
+
+        flags = []
+
+        classification = IDClassification(ids, years, platforms, deck_ids)
+        flags.append(('POS', 'isbuoy', classification.isbuoy))
+        flags.append(('POS', 'isdrifter', classification.isdrifter))
+        flags.append(('POS', 'isship', classification.isship))
+        flags.append(('POS', 'is780', classification.is780))
+        flags.append(('POS', 'isgeneric', classification.generic))
+
+        position_flags = qc.position_check_array(lats, lons)
+        # make sure lons are in range -180 to 180 for the other checks
+        lons = np.where(lons > 180, lons - 360.0, lons)
+        date_flags = qc.date_check_array(years, months, days)
+        time_flags = qc.time_check_array(hours)
+        flags.append(('POS', 'pos', position_flags))
+        flags.append(('POS', 'date', date_flags))
+        flags.append(('POS', 'time', time_flags))
+
+        blacklist = qc.Blacklist.from_parameters(parameters)
+        flags.append(('POS', 'blklst', blacklist.mask(ids, deck_ids, years, months, lats, lons, platforms)))
+
+        day_flags = np.ones(len(self), dtype=int)
+        good_times = (position_flags == 0) & (date_flags == 0) & (time_flags == 0)
+        day_test_array = qc.day_test_array if ephemeris is None else ephemeris.day_test_array
+        day_flags[good_times] = day_test_array(years[good_times], months[good_times], days[good_times],
+                                               hours[good_times], lats[good_times], lons[good_times],
+                                               parameters['base']['time_since_sun_above_horizon'])
+        flags.append(('POS', 'day', day_flags))
+
+        flags.append(('DPT', 'hum_blacklist', qc.humidity_blacklist_array(platforms)))
+        flags.append(('W', 'wind_blacklist', qc.wind_blacklist_array(deck_ids)))
+        flags.append(('AT', 'mat_blacklist', qc.mat_blacklist_array(platforms, deck_ids, years, lats, lons)))
+
+        sst = columns['SST']
+        sst_norm = norms['SST'][0]
+        sst_parameters = parameters['SST']
+        assert 'freezing_point' in sst_parameters
+        assert 'freeze_check_n_sigma' in sst_parameters
+        assert 'maximum_anomaly' in sst_parameters
+        flags.append(('SST', 'noval', qc.value_check_array(sst)))
+        flags.append(('SST', 'freez', qc.sst_freeze_check_array(sst, 0.0, sst_parameters['freezing_point'],
+                                                                sst_parameters['freeze_check_n_sigma'])))
+        flags.append(('SST', 'clim', qc.climatology_check_array(sst, sst_norm, sst_parameters['maximum_anomaly'])))
+        flags.append(('SST', 'nonorm', qc.no_normal_check_array(sst_norm)))
+        flags.append(('SST', 'hardlimit', qc.hard_limit_array(sst, sst_parameters['hard_limits'])))
+
+        at = columns['AT']
+        at_norm = norms['AT'][0]
+        at_parameters = parameters['AT']
+        assert 'maximum_anomaly' in at_parameters
+        flags.append(('AT', 'noval', qc.value_check_array(at)))
+        flags.append(('AT', 'clim', qc.climatology_check_array(at, at_norm, at_parameters['maximum_anomaly'])))
+        flags.append(('AT', 'nonorm', qc.no_normal_check_array(at_norm)))
+        flags.append(('AT', 'hardlimit', qc.hard_limit_array(at, at_parameters['hard_limits'])))
+
+        at2 = columns['AT2']
+        dpt = columns['DPT']
+        dpt_norm, dpt_stdev = norms['DPT']
+        dpt_parameters = parameters['DPT']
+        flags.append(('DPT', 'clim', qc.climatology_plus_stdev_check_array(
+            dpt, dpt_norm, dpt_stdev,
+            dpt_parameters['minmax_standard_deviation'], dpt_parameters['maximum_standardised_anomaly'])))
+        flags.append(('DPT', 'noval', qc.value_check_array(dpt)))
+        flags.append(('DPT', 'nonorm', qc.no_normal_check_array(dpt_norm)))
+        flags.append(('DPT', 'ssat', qc.supersat_check_array(dpt, at2)))
+
+        slp = columns['SLP']
+        slp_norm, slp_stdev = norms['SLP']
+        slp_parameters = parameters['SLP']
+        assert 'maximum_anomaly' in slp_parameters
+        flags.append(('SLP', 'noval', qc.value_check_array(slp)))
+        flags.append(('SLP', 'clim', qc.climatology_plus_stdev_with_lowbar_array(
+            slp, slp_norm, slp_stdev, slp_parameters['maximum_standardised_anomaly'], slp_parameters['lowbar'])))
+        flags.append(('SLP', 'nonorm', qc.no_normal_check_array(slp_norm)))
+
+        wind = columns['W']
+        flags.append(('W', 'noval', qc.value_check_array(wind)))
+        flags.append(('W', 'hardlimit', qc.hard_limit_array(wind, parameters['W']['hard_limits'])))
+        flags.append(('W', 'consistency', qc.wind_consistency_array(wind, columns['D'],
+                                                                    parameters['W']['variable_limit'])))
+
+        # special check for silly values in all humidity-related variables
+        # and set DPT hardlimit flag if necessary
+        humidity_hardlimit = np.zeros(len(self), dtype=int)
+        for var in ['AT', 'DPT', 'SHU', 'RH']:
+            humidity_hardlimit |= qc.hard_limit_array(columns[var], parameters[var]['hard_limits'])
+        flags.append(('DPT', 'hardlimit', humidity_hardlimit))
+
+        # Kate's modified MAT checks
+        at2_norm, at2_stdev = norms['AT2']
+        flags.append(('AT2', 'clim', qc.climatology_plus_stdev_check_array(
+            at2, at2_norm, at2_stdev,
+            at_parameters['minmax_standard_deviation'], at_parameters['maximum_standardised_anomaly'])))
+        flags.append(('AT2', 'noval', qc.value_check_array(at2)))
+        flags.append(('AT2', 'nonorm', qc.no_normal_check_array(at2_norm)))
+        flags.append(('AT2', 'hardlimit', qc.hard_limit_array(at, at_parameters['hard_limits'])))
+
+        self.set_qc_flags(flags)
+
     def add_filter(self, infilter):
         """
         Add a QC_filter to the Deck. This will be used to decide which observations will 
@@ -3243,3 +4143,753 @@ class Deck:
         print("wrote out {} obs".format(count_write))
 
         return
+
+
+class ReportView(MarineReportQC):
+    """
+    A :class:`.MarineReportQC` look-alike which reads and writes a single row of a 
+    :class:`.ColumnarDeck`. It offers the same getvar, setvar, get_qc, set_qc, getext, setext 
+    and climatology methods as a :class:`.MarineReport` so that existing per-report checks and 
+    :class:`.Voyage` methods can be run on a :class:`.ColumnarDeck`. 
+    
+    A view refers to a row by position, so views taken before the deck is sorted or 
+    reports are popped from it should not be used afterwards.
+    """
+
+    __slots__ = ('deck', 'index')
+
+    def __init__(self, deck, index):
+        """
+        Initialise a :class:`.ReportView`
+        
+        :param deck: the deck holding the report
+        :param index: the position of the report in the deck
+        :type deck: :class:`.ColumnarDeck`
+        :type index: integer
+        """
+        self.deck = deck
+        self.index = index
+        self.calculate_dt()
+
+    def reset_ext(self):
+        """
+        Remove all extra data and recalculate the unpacked speeds and directions
+        """
+        for column in self.deck.ext.values():
+            column[self.index] = np.nan
+        self.calculate_dsi_vsi()
+
+    def save_state(self):
+        """
+        Take a copy of the QC flags and extra data of the report. The copy can be passed to 
+        :meth:`restore_state` to undo any changes made to them in the meantime.
+        
+        :return: copy of the QC flags and extra data
+        """
+        saved_qc = self.deck.qc.get_report_flags(self.index)
+        saved_ext = {}
+        for key in self.deck.ext:
+            saved_ext[key] = self.deck.ext[key][self.index]
+        return saved_qc, saved_ext
+
+    def restore_state(self, state):
+        """
+        Reset the QC flags and extra data of the report to a copy taken by :meth:`save_state`
+        
+        :param state: copy of the QC flags and extra data from :meth:`save_state`
+        """
+        saved_qc, saved_ext = state
+        self.deck.qc.set_report_flags(self.index, saved_qc)
+        for key in self.deck.ext:
+            self.deck.ext[key][self.index] = saved_ext.get(key, np.nan)
+
+    def add_climate_variable(self, name, clim, stdev=None):
+        """
+        Add a climate variable to the report
+        
+        :param name: the name of the climate variable
+        :param clim: the climatological average of the climate variable
+        :param stdev: optional standard deviation, default is None
+        :type name: string
+        :type clim: float
+        :type stdev: float
+        """
+        self.deck.set_norm_value(self.index, name, clim, 'clim')
+        self.deck.set_norm_value(self.index, name, stdev, 'stdev')
+
+    def getnorm(self, varname, intype='clim'):
+        """
+        Retrieve the climatological average or standard deviation for a particular climate variable
+        
+        :param varname: the name of the climate variable
+        :param intype: 'clim' for climatological average and 'stdev' for standard deviation
+        :type varname: string
+        :type intype: string
+        :return: the climatological value (if the climate variable exists), None otherwise.
+        :rtype: float
+        """
+        assert intype in ['clim', 'stdev'], 'unknown type ' + str(intype)
+        columns = self.deck.norms[intype]
+        if varname not in columns:
+            return None
+        value = columns[varname][self.index]
+        if np.isnan(value):
+            return None
+        return float(value)
+
+    def climate_variable_names(self):
+        """
+        :return: the names of the climate variables held by the deck
+        :rtype: list of strings
+        """
+        return self.deck.norms['clim'].keys()
+
+    def ext_variables(self):
+        """
+        :return: the extended variables held by the deck and their values for this report
+        :rtype: dictionary
+        """
+        return dict((varname, self.getext(varname)) for varname in self.deck.ext)
+
+    def getext(self, varname):
+        """
+        Function to get a particular variable from the extended data. Extended data are held 
+        as floats in the deck, so integer values come back as floats.
+
+        :param varname: variable name to be retrieved from the extended data
+        :type varname: string
+        :return: the named variable
+        :rtype: float
+        """
+        assert varname in self.deck.ext, "unknown extended variable name " + varname
+        value = self.deck.ext[varname][self.index]
+        if np.isnan(value):
+            return None
+        return float(value)
+
+    def setext(self, varname, varvalue):
+        """
+        Set a particular variable in the extended data
+
+        :param varvalue: value of variable to be set
+        :param varname: variable name to be set in the extended data
+        :type varvalue: float
+        :type varname: string
+        """
+        self.deck.set_ext_value(self.index, varname, varvalue)
+
+    def setvar(self, varname, varvalue):
+        """
+        Set a particular variable in the data
+
+        :param varvalue: value of variable to be set
+        :param varname: variable name to be set
+        :type varvalue: float
+        :type varname: string
+        """
+        if varname == 'ID':
+            self.deck.ids[self.index] = varvalue
+        elif varname == 'UID':
+            self.deck.uids[self.index] = varvalue
+        else:
+            assert varname in VARLIST, "unknown variable name " + varname
+            if varvalue is None:
+                varvalue = np.nan
+            self.deck.data[varname][self.index] = varvalue
+
+        if varname in ['YR', 'DY', 'HR']:
+            self.calculate_dt()
+
+    def getvar(self, varname):
+        """
+        Get a variable which is either in the data or extended data. Both data and extended data 
+        will be queried and the function returns None if the varname is not found in either one.
+        
+        :param varname: variable name to be retrieved
+        :type varname: string
+        :return: the named variable from either the data or extended data
+        :rtype: depends on the variable
+        """
+        if varname == 'ID':
+            return self.deck.ids[self.index]
+        if varname == 'UID':
+            return self.deck.uids[self.index]
+        if varname in self.deck.data:
+            value = self.deck.data[varname][self.index]
+            if np.isnan(value):
+                return None
+            if varname in ['YR', 'MO', 'DY', 'DS', 'VS', 'DCK', 'PT', 'SID']:
+                return int(value)  # these are integer data types
+            return value
+        if varname in self.deck.ext:
+            return self.getext(varname)
+        return None
+
+    def getvars(self, varnames):
+        """
+        Get several variables at once
+        
+        :param varnames: names of the variables to be retrieved
+        :type varnames: list of strings
+        :return: the values of the variables
+        :rtype: list
+        """
+        return [self.getvar(varname) for varname in varnames]
+
+    def set_qc(self, qc_type, specific_flag, set_value):
+        """
+        Set a particular QC flag
+        
+        :param qc_type: the general QC area e.g. SST, MAT. Must be either 'POS' or correspond to an ICOADS variable name
+        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
+        :param set_value: the value which is to be given to the flag
+        :type qc_type: string
+        :type specific_flag: string
+        :type set_value: integer in 0-9
+        """
+        self.deck.qc.set(self.index, qc_type, specific_flag, set_value)
+
+    def set_qc_row(self, indices, values):
+        """
+        Set several QC flags at once, given by their indices in the QC_FLAGS registry
+        
+        :param indices: indices of the flags in QC_FLAGS
+        :param values: the values which are to be given to the flags
+        :type indices: list of integers
+        :type values: list of integers in 0-9
+        """
+        for index, value in zip(indices, values):
+            qc_type, specific_flag = QC_FLAGS.names[index]
+            self.set_qc(qc_type, specific_flag, value)
+
+    def get_qc(self, qc_type, specific_flag):
+        """
+        Get the value of a particular QC flag
+        
+        :param qc_type: the general QC area e.g. SST, MAT..
+        :param specific_flag: the name of the flag whose value is to be returned e.g. buddy_check, repeated_value
+        :type qc_type: string
+        :type specific_flag: string
+        :return: the value of the flag, or 9 if the flag is not set.
+        :rtype: integer
+        """
+        return self.deck.qc.get(self.index, qc_type, specific_flag)
+
+
+class ColumnarReports:
+    """
+    Read-only sequence of :class:`.ReportView` objects over the rows of a :class:`.ColumnarDeck`. 
+    It stands in for the list of reports held by a :class:`.Deck` so that the :class:`.Deck` 
+    methods which loop over reports also work on a :class:`.ColumnarDeck`.
+    """
+
+    def __init__(self, deck):
+        self.deck = deck
+
+    def __len__(self):
+        return len(self.deck)
+
+    def __getitem__(self, index):
+        nreps = len(self.deck)
+        if index < 0:
+            index += nreps
+        if not 0 <= index < nreps:
+            raise IndexError('report index out of range')
+        return ReportView(self.deck, index)
+
+    def __iter__(self):
+        for i in range(len(self.deck)):
+            yield ReportView(self.deck, i)
+
+
+class ColumnarDeck(Deck):
+    """
+    A :class:`.Deck` which stores its reports as contiguous numpy columns (a structure of 
+    arrays) rather than as a list of :class:`.MarineReport` objects. There is one float 
+    column for each variable in VARLIST, one per climatological average, standard deviation 
+    and extended variable. QC flags are held in a :class:`.QCFlagMatrix` with one int8 row 
+    per flag (9 where the flag is not set). Missing values are stored as NaN.
+    
+    The columns can be used directly for deck-wide operations. For per-report access, indexing 
+    the deck or iterating over it gives :class:`.ReportView` objects which behave like 
+    :class:`.MarineReportQC` objects, so existing checks keep working on the deck.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Initialise an empty :class:`.ColumnarDeck`
+        
+        :param capacity: number of reports to allocate space for. The columns grow as needed.
+        :type capacity: integer
+        """
+        self.nreps = 0
+        self.capacity = max(capacity, 1)
+        self.data = {}
+        for var in VARLIST:
+            self.data[var] = self._new_column(np.float64, np.nan)
+        self.ids = self._new_column(object, None)
+        self.uids = self._new_column(object, None)
+        self.norms = {'clim': {}, 'stdev': {}}
+        self.ext = {}
+        self.qc = QCFlagMatrix(self.capacity)
+
+        self.reps = ColumnarReports(self)
+        self.idtracker = {}
+        self.filter = QC_filter()
+
+    def __len__(self):
+        return self.nreps
+
+    def __getitem__(self, index):
+        return self.reps[index]
+
+    def __iter__(self):
+        return iter(self.reps)
+
+    def _new_column(self, dtype, fill_value):
+        column = np.empty(self.capacity, dtype=dtype)
+        column.fill(fill_value)
+        return column
+
+    def _all_columns(self):
+        """
+        Yield (dictionary, key) pairs for every column held by the deck
+        """
+        for column_dict in [self.data, self.norms['clim'], self.norms['stdev'], self.ext]:
+            for key in column_dict:
+                yield column_dict, key
+
+    def _reserve(self, nreps):
+        """
+        Make sure there is space for at least nreps reports in every column
+        """
+        if nreps <= self.capacity:
+            return
+        new_capacity = max(nreps, 2 * self.capacity)
+        for column_dict, key in self._all_columns():
+            column_dict[key] = self._grown(column_dict[key], new_capacity)
+        self.ids = self._grown(self.ids, new_capacity)
+        self.uids = self._grown(self.uids, new_capacity)
+        self.qc.resize(new_capacity)
+        self.capacity = new_capacity
+
+    def _grown(self, column, new_capacity):
+        if column.dtype == object:
+            fill_value = None
+        else:
+            fill_value = np.nan
+        new_column = np.empty(new_capacity, dtype=column.dtype)
+        new_column.fill(fill_value)
+        new_column[0:self.nreps] = column[0:self.nreps]
+        return new_column
+
+    def set_ext_value(self, index, varname, varvalue):
+        """
+        Set an extended variable for a single report, adding the column if it does not exist yet
+        """
+        if varname not in self.ext:
+            self.ext[varname] = self._new_column(np.float64, np.nan)
+        if varvalue is None:
+            varvalue = np.nan
+        self.ext[varname][index] = varvalue
+
+    def set_norm_value(self, index, varname, value, intype='clim'):
+        """
+        Set a climatological average or standard deviation for a single report, adding the 
+        column if it does not exist yet
+        """
+        columns = self.norms[intype]
+        if varname not in columns:
+            columns[varname] = self._new_column(np.float64, np.nan)
+        if value is None:
+            value = np.nan
+        columns[varname][index] = value
+
+    def append(self, rep):
+        """
+        Add a :class:`.MarineReport` to the :class:`.ColumnarDeck`. The contents of the report 
+        are copied into the columns of the deck.
+        
+        :param rep: :class:`.MarineReport` to be added to the :class:`.ColumnarDeck`
+        :type rep: :class:`.MarineReport`
+        """
+        self._reserve(self.nreps + 1)
+        i = self.nreps
+        self.nreps += 1
+
+        if isinstance(rep, ReportView):
+            self._copy_row(rep.deck, rep.index, i)
+        else:
+            for var in VARLIST:
+                value = rep.getvar(var)
+                if value is not None:
+                    self.data[var][i] = value
+            self.ids[i] = rep.getvar('ID')
+            self.uids[i] = rep.getvar('UID')
+
+            self.qc.set_report_flags(i, rep.qc)
+            ext = rep.ext_variables()
+            for varname in ext:
+                self.set_ext_value(i, varname, ext[varname])
+            for varname in rep.climate_variable_names():
+                self.set_norm_value(i, varname, rep.getnorm(varname, 'clim'), 'clim')
+                self.set_norm_value(i, varname, rep.getnorm(varname, 'stdev'), 'stdev')
+
+        if self.ids[i] in self.idtracker:
+            self.idtracker[self.ids[i]].append(i)
+        else:
+            self.idtracker[self.ids[i]] = [i]
+
+    def _copy_row(self, other, index, i):
+        """
+        Copy the report at position index in another :class:`.ColumnarDeck` to position i
+        """
+        for var in VARLIST:
+            self.data[var][i] = other.data[var][index]
+        self.ids[i] = other.ids[index]
+        self.uids[i] = other.uids[index]
+        self.qc.set_report_flags(i, other.qc.get_report_flags(index))
+        for varname in other.ext:
+            self.set_ext_value(i, varname, other.ext[varname][index])
+        for intype in other.norms:
+            for varname in other.norms[intype]:
+                self.set_norm_value(i, varname, other.norms[intype][varname][index], intype)
+
+    def append_columns(self, columns):
+        """
+        Add reports to the deck directly from columns of IMMA data, for example from 
+        :func:`IMMA1.read_columns`, without making any intermediate report objects. 
+        The unpacked ship speeds and directions are calculated as they would be by 
+        :meth:`MarineReport.calculate_dsi_vsi`.
+        
+        :param columns: dictionary of arrays of equal length keyed by IMMA parameter name. Missing 
+          numbers should be NaN and missing IDs None. Parameters not in VARLIST, ID or UID are ignored.
+        :type columns: dictionary
+        """
+        keys = [key for key in columns if key in VARLIST or key in ['ID', 'UID']]
+        if len(keys) == 0:
+            return
+        nnew = len(columns[keys[0]])
+        start = self.nreps
+        self._reserve(start + nnew)
+        self.nreps += nnew
+
+        for key in keys:
+            assert len(columns[key]) == nnew, "columns are different lengths"
+            if key == 'ID':
+                self.ids[start:self.nreps] = columns[key]
+            elif key == 'UID':
+                self.uids[start:self.nreps] = columns[key]
+            else:
+                self.data[key][start:self.nreps] = columns[key]
+
+        ds_convert = np.array([0, 45, 90, 135, 180, 225, 270, 315, 360, np.nan])
+        ds = self.data['DS'][start:self.nreps]
+        dsi = np.zeros(nnew) + np.nan
+        valid = np.isfinite(ds)
+        dsi[valid] = ds_convert[ds[valid].astype(int)]
+        self.set_ext_column('dsi', dsi, start)
+
+        vs = self.data['VS'][start:self.nreps]
+        with np.errstate(invalid='ignore'):
+            vsi = np.where(self.data['YR'][start:self.nreps] >= 1968, vs * 5.0 - 2.0, vs * 3.0 - 1.0)
+        vsi[vs == 0] = 0.0
+        self.set_ext_column('vsi', vsi, start)
+
+        for i in range(start, self.nreps):
+            if self.ids[i] in self.idtracker:
+                self.idtracker[self.ids[i]].append(i)
+            else:
+                self.idtracker[self.ids[i]] = [i]
+
+    def set_ext_column(self, varname, values, start=0):
+        """
+        Set an extended variable for a run of reports starting at position start
+        """
+        if varname not in self.ext:
+            self.ext[varname] = self._new_column(np.float64, np.nan)
+        self.ext[varname][start:start + len(values)] = values
+
+    def getvar(self, varname):
+        """
+        Get the column of values for a variable in VARLIST, ID or UID, or an extended variable. 
+        The array returned is a view on the deck so changes to it change the deck.
+        
+        :param varname: name of the variable
+        :type varname: string
+        :return: column of values, or None if the variable is not found
+        :rtype: numpy array
+        """
+        if varname == 'ID':
+            return self.ids[0:self.nreps]
+        if varname == 'UID':
+            return self.uids[0:self.nreps]
+        if varname in self.data:
+            return self.data[varname][0:self.nreps]
+        if varname in self.ext:
+            return self.ext[varname][0:self.nreps]
+        return None
+
+    def getnorm(self, varname, intype='clim'):
+        """
+        Get the column of climatological averages or standard deviations for a climate variable
+        
+        :param varname: the name of the climate variable
+        :param intype: 'clim' for climatological average and 'stdev' for standard deviation
+        :type varname: string
+        :type intype: string
+        :return: column of values with NaN where there is no climatology
+        :rtype: numpy array
+        """
+        assert intype in ['clim', 'stdev'], 'unknown type ' + str(intype)
+        if varname not in self.norms[intype]:
+            return np.zeros(self.nreps) + np.nan
+        return self.norms[intype][varname][0:self.nreps]
+
+    def getvars(self, varnames):
+        """
+        Get the columns of values for several variables
+        
+        :param varnames: names of the variables, not including ID or UID
+        :type varnames: list of strings
+        :return: columns of values, all NaN if the variable is not found, by variable name
+        :rtype: dictionary of numpy arrays
+        """
+        columns = {}
+        for varname in varnames:
+            values = self.getvar(varname)
+            if values is None:
+                values = np.zeros(self.nreps) + np.nan
+            columns[varname] = values
+        return columns
+
+    def getnorms(self, varnames):
+        """
+        Get the columns of climatological averages and standard deviations for several climate variables
+        
+        :param varnames: names of the climate variables
+        :type varnames: list of strings
+        :return: columns of climatological averages and of standard deviations, NaN where there is 
+            no climatology, by variable name
+        :rtype: dictionary of pairs of numpy arrays
+        """
+        return dict((varname, (self.getnorm(varname), self.getnorm(varname, 'stdev'))) for varname in varnames)
+
+    def getanom(self, varname):
+        """
+        Get the column of anomalies for a climate variable, NaN where either the value or 
+        the climatology is missing
+        """
+        return self.getvar(varname) - self.getnorm(varname)
+
+    def add_climate_variable(self, name, clim, stdev=None):
+        """
+        Set the climatological averages, and optionally standard deviations, for all reports in the deck
+        
+        :param name: the name of the climate variable
+        :param clim: climatological averages, one per report, NaN where missing
+        :param stdev: climatological standard deviations, one per report, NaN where missing
+        :type name: string
+        :type clim: numpy array
+        :type stdev: numpy array
+        """
+        for intype, values in [('clim', clim), ('stdev', stdev)]:
+            if name not in self.norms[intype]:
+                self.norms[intype][name] = self._new_column(np.float64, np.nan)
+            if values is None:
+                values = np.nan
+            self.norms[intype][name][0:self.nreps] = values
+
+    def get_qc(self, qc_type, specific_flag, mask=None):
+        """
+        Get the values of a QC flag for all reports in the :class:`.ColumnarDeck`, or for those 
+        selected by a mask
+        
+        :param qc_type: the general QC area e.g. SST, MAT..
+        :param specific_flag: the name of the flag
+        :param mask: optional array of booleans or indices selecting the reports
+        :type qc_type: string
+        :type specific_flag: string
+        :type mask: numpy array
+        :return: copy of the flags, 9 where the flag is not set
+        :rtype: numpy array of int8
+        """
+        flags = self.qc.get_flags(qc_type, specific_flag, slice(0, self.nreps))
+        if mask is not None:
+            flags = flags[mask]
+        return flags
+
+    def set_qc(self, qc_type, specific_flag, set_value, mask=None):
+        """
+        Set a QC flag for all reports in the :class:`.ColumnarDeck`, or for those selected by a mask
+
+        :param qc_type: the general QC area e.g. SST, MAT...
+        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
+        :param set_value: the value which is to be given to the flag, or an array of values
+        :param mask: optional array of booleans or indices selecting the reports to be set
+        :type qc_type: string
+        :type specific_flag: string
+        :type set_value: integer in 0-9
+        :type mask: numpy array
+        """
+        if mask is None:
+            self.qc.set_flags(qc_type, specific_flag, set_value, slice(0, self.nreps))
+        else:
+            self.qc.set_flags(qc_type, specific_flag, set_value, np.arange(self.nreps)[mask])
+
+    def set_qc_flags(self, flags):
+        """
+        Set several QC flags for all the reports in the :class:`.ColumnarDeck`
+        
+        :param flags: the QC area, flag name and array of values, one per report, of each flag
+        :type flags: list of tuples
+        """
+        for qc_type, specific_flag, values in flags:
+            self.set_qc(qc_type, specific_flag, values)
+
+    def filter_mask(self):
+        """
+        Find which reports pass the :class:`.QC_filter` of the deck
+        
+        :return: array which is True for reports that pass the filter
+        :rtype: numpy array of booleans
+        """
+        passes = np.ones(self.nreps, dtype=bool)
+        for qc_type, specific_flag, qc_status in self.filter.filter:
+            passes &= (self.get_qc(qc_type, specific_flag) == qc_status)
+        return passes
+
+    def take(self, indices):
+        """
+        Make a new :class:`.ColumnarDeck` from the reports at the given positions
+        
+        :param indices: positions of the reports to be copied, or an array of booleans
+        :type indices: numpy array
+        :return: a new deck holding copies of the selected reports
+        :rtype: :class:`.ColumnarDeck`
+        """
+        indices = np.arange(self.nreps)[np.asarray(indices)]
+        selection = ColumnarDeck(capacity=len(indices))
+        selection.nreps = len(indices)
+        selection.capacity = len(indices)
+        for var in self.data:
+            selection.data[var] = self.data[var][indices]
+        for intype in self.norms:
+            for var in self.norms[intype]:
+                selection.norms[intype][var] = self.norms[intype][var][indices]
+        for var in self.ext:
+            selection.ext[var] = self.ext[var][indices]
+        selection.qc = self.qc.take(indices)
+        selection.ids = self.ids[indices]
+        selection.uids = self.uids[indices]
+        selection.filter = self.filter
+        selection.index_by_id()
+        return selection
+
+    def _reorder(self, indices):
+        """
+        Replace the contents of the deck with the reports at the given positions
+        """
+        selection = self.take(indices)
+        self.nreps = selection.nreps
+        self.capacity = selection.capacity
+        self.data = selection.data
+        self.norms = selection.norms
+        self.ext = selection.ext
+        self.qc = selection.qc
+        self.ids = selection.ids
+        self.uids = selection.uids
+        self.idtracker = selection.idtracker
+
+    def epoch_hours(self):
+        """
+        Calculate the time of every report in the deck as a number of hours since the start of the 
+        julian day count, rounded down to the minute, in the same way as :meth:`MarineReport.calculate_dt`
+
+        :return: times of the reports, NaN where the date or time is missing or invalid
+        :rtype: numpy array
+        """
+        year = self.getvar('YR')
+        month = self.getvar('MO')
+        day = self.getvar('DY')
+        hour = self.getvar('HR')
+        epoch = np.zeros(self.nreps) + np.nan
+
+        valid = ~(np.isnan(year) | np.isnan(month) | np.isnan(day) | np.isnan(hour))
+        valid[valid] = (month[valid] >= 1) & (month[valid] <= 12)
+        year = year[valid].astype(int)
+        month = month[valid].astype(int)
+        day = day[valid]
+        hour = hour[valid]
+        in_month = (day > 0) & (day <= qc.month_lengths_array(year, month))
+
+        rounded_hour = np.floor(hour)
+        rounded_minute = np.floor(60 * (hour - rounded_hour))
+        epoch_valid = (24.0 * qc.jul_days(year, month, day.astype(int)) +
+                       rounded_hour + rounded_minute / 60.)
+        epoch_valid[~in_month] = np.nan
+        epoch[valid] = epoch_valid
+        return epoch
+
+    def sort(self):
+        """
+        Sort the reports into ID-then-time order using the same ordering as :meth:`Deck.sort`.
+        The order is found with a single lexsort of the IDs and times, rather than by comparing reports.
+        """
+        ids = self.ids[0:self.nreps]
+        if self.nreps == 0:
+            return
+        # rank of each ID in sorted order. None, which sorts before any string, is given rank -1
+        has_id = np.array([rep_id is not None for rep_id in ids], dtype=bool)
+        id_rank = np.zeros(self.nreps, dtype=int) - 1
+        if np.any(has_id):
+            id_rank[has_id] = np.unique(ids[has_id].astype(str), return_inverse=True)[1]
+        # lexsort is stable and puts NaN times after the others
+        self._reorder(np.lexsort((self.epoch_hours(), id_rank)))
+
+    def index_by_id(self):
+        """
+        Build an index of where obs from each ship are. This is then used by the method 
+        get_one_platform_at_a_time to yield a bunch of objects of class :class:`.Voyage` 
+        corresponding to all obs from a single ID.
+        """
+        self.idtracker = {}
+        for i in range(self.nreps):
+            if self.ids[i] in self.idtracker:
+                self.idtracker[self.ids[i]].append(i)
+            else:
+                self.idtracker[self.ids[i]] = [i]
+
+    def pop(self, pos=0):
+        """
+        Remove a single report from the :class:`.ColumnarDeck`
+
+        :param pos: position in the deck of the observation to be popped.
+        :type pos: integer
+        :return: view of a copy of the report
+        :rtype: :class:`.ReportView`
+        """
+        if pos < 0:
+            pos += self.nreps
+        popped = self.take([pos])
+        self._reorder(np.arange(self.nreps) != pos)
+        return popped[0]
+
+    def get_one_platform_at_a_time(self):
+        """
+        Generator which yields one Voyage at a time for each unique ID in the Deck. 
+        Only reports that pass the QC_filter of the Deck will be returned. The reports 
+        in each :class:`.Voyage` are views of the rows of the deck so QC flags set on 
+        them are set in the deck.
+        
+        :return: Yields a :class:`.Voyage` made of all ships with a single ID. 
+        :rtype: :class:`.Voyage`
+        """
+        passes = self.filter_mask()
+        for one_id in self.idtracker:
+            out_voyage = Voyage()
+            for i in self.idtracker[one_id]:
+                if passes[i]:
+                    out_voyage.add_report(ReportView(self, i))
+
+            yield out_voyage
@@ -0,0 +1,449 @@
+"""
+Reading of monthly ICOADS IMMA1 files for the QC. Records from a single month are passed to the QC one
+at a time as :class:`IMMA1.IMMA` objects. The month can either be decoded a line at a time, or a whole
+file can be decoded into columns which are kept in an on-disk cache so that later runs do not need to
+decode the file again.
+
+The gzipped files can be decompressed in several ways (see :func:`open_icoads_file`), all of which give
+the same lines.
+"""
+
+import os
+import gzip
+import zlib
+import hashlib
+import tempfile
+import threading
+import subprocess
+import Queue
+import cStringIO
+from distutils.spawn import find_executable
+import numpy as np
+import IMMA1
+import BackgroundField as bf
+from IMMA1 import IMMA, line_could_match
+
+# change this if the contents of the cache files change
+CACHE_VERSION = 1
+
+# size of the blocks of compressed data read in by ZlibLineReader
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# commands for external decompression programs which write a decompressed file to stdout
+EXTERNAL_DECOMPRESSORS = {'pigz': ['pigz', '-dc'],
+                          'igzip': ['igzip', '-dc']}
+
+
+class ZlibLineReader:
+    """
+    Read lines from a gzipped file by decompressing large blocks with zlib and splitting the lines out of 
+    each block, which is much quicker than reading lines one at a time with the gzip module. Files made up 
+    of several gzip members are handled in the same way as they are by the gzip module.
+    """
+
+    def __init__(self, filename, block_size=BLOCK_SIZE):
+        self.infile = open(filename, 'rb')
+        self.block_size = block_size
+
+    def __iter__(self):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        remainder = ''
+        block = self.infile.read(self.block_size)
+
+        while block != '':
+            data = decompressor.decompress(block)
+            # start a new decompressor for each new gzip member, ignoring any zero padding at the end
+            while decompressor.unused_data.lstrip('\x00') != '':
+                unused = decompressor.unused_data.lstrip('\x00')
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                data += decompressor.decompress(unused)
+
+            data = remainder + data
+            last_newline = data.rfind('\n')
+            remainder = data[last_newline + 1:]
+            for line in cStringIO.StringIO(data[0:last_newline + 1]):
+                yield line
+
+            block = self.infile.read(self.block_size)
+
+        # a complete gzip member passes any extra data through to unused_data
+        try:
+            decompressor.decompress('\x00')
+        except zlib.error:
+            pass
+        if decompressor.unused_data == '':
+            raise IOError("Compressed file ended before the end-of-stream marker was reached")
+
+        for line in cStringIO.StringIO(remainder):
+            yield line
+
+    def close(self):
+        self.infile.close()
+
+
+class ExternalLineReader:
+    """
+    Read lines from a gzipped file decompressed by an external program such as pigz or igzip
+    """
+
+    def __init__(self, filename, command):
+        """
+        :param filename: name of the gzipped file
+        :param command: command, as a list, which writes the decompressed file to stdout when the filename 
+          is added to it
+        :type filename: string
+        :type command: list of strings
+        """
+        self.process = subprocess.Popen(command + [filename], stdout=subprocess.PIPE, bufsize=BLOCK_SIZE)
+        self.command = command
+
+    def __iter__(self):
+        for line in self.process.stdout:
+            yield line
+        if self.process.wait() != 0:
+            raise IOError("{} failed with return code {}".format(' '.join(self.command), self.process.returncode))
+
+    def close(self):
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+
+
+def available_external_decompressor():
+    """
+    Find an external decompression program that is installed
+
+    :return: name of the first of pigz and igzip that is installed, or None if neither is
+    """
+    for name in ['pigz', 'igzip']:
+        if find_executable(EXTERNAL_DECOMPRESSORS[name][0]) is not None:
+            return name
+    return None
+
+
+def open_icoads_file(filename, decompression='zlib'):
+    """
+    Open a gzipped ICOADS file for reading line by line. The lines are the same whichever method of 
+    decompression is chosen.
+
+    :param filename: name of the gzipped ICOADS file
+    :param decompression: how the file is decompressed. One of 'gzip' (the gzip module), 'zlib' (see 
+      :class:`ZlibLineReader`), 'pigz' or 'igzip' (see :class:`ExternalLineReader`), or 'auto' which uses 
+      an external program if one is available and zlib if not.
+    :type filename: string
+    :type decompression: string
+    :return: an object which can be iterated over to get the lines of the file and has a close method
+    """
+    if decompression == 'auto':
+        decompression = available_external_decompressor()
+        if decompression is None:
+            decompression = 'zlib'
+
+    if decompression == 'gzip':
+        return gzip.open(filename, 'r')
+    if decompression == 'zlib':
+        return ZlibLineReader(filename)
+
+    assert decompression in EXTERNAL_DECOMPRESSORS, "unknown decompression method " + str(decompression)
+    command = EXTERNAL_DECOMPRESSORS[decompression]
+    if find_executable(command[0]) is None:
+        raise IOError("{} is not installed".format(command[0]))
+    return ExternalLineReader(filename, command)
+
+
+def cache_filename(cache_dir, filename, attachments):
+    """
+    Get the name of the cache file for an ICOADS file. The name depends on the full path, size and
+    modification time of the ICOADS file, so a cache file is not used if the ICOADS file changes.
+
+    :param cache_dir: directory holding cache files
+    :param filename: name of the ICOADS file
+    :param attachments: list of the IMMA1 attachments held in the cache
+    :type cache_dir: string
+    :type filename: string
+    :type attachments: list of integers
+    :return: name of the cache file
+    :rtype: string
+    """
+    stats = os.stat(filename)
+    key = "{} {} {} {} {}".format(CACHE_VERSION, os.path.abspath(filename), stats.st_size, stats.st_mtime,
+                                  ','.join([str(i) for i in sorted(attachments)]))
+    digest = hashlib.md5(key).hexdigest()[0:16]
+    return os.path.join(cache_dir, "{}.{}.npz".format(os.path.basename(filename), digest))
+
+
+def write_cache(outfilename, columns, rejected):
+    """
+    Write decoded columns and the lines that could not be decoded to a cache file. The file is written
+    under a temporary name and then renamed so that an incomplete cache file is never read.
+
+    :param outfilename: name of the cache file
+    :param columns: dictionary of columns from :func:`IMMA1.read_columns`
+    :param rejected: list of lines that could not be decoded
+    """
+    arrays = {}
+    for p in columns:
+        if columns[p].dtype == object:
+            arrays[p] = np.array(['' if v is None else v for v in columns[p]], dtype=str)
+        else:
+            arrays[p] = columns[p]
+    arrays['rejected_lines'] = np.array(rejected, dtype=str)
+
+    handle, tmpname = tempfile.mkstemp(dir=os.path.dirname(outfilename), suffix='.tmp')
+    outfile = os.fdopen(handle, 'wb')
+    np.savez(outfile, **arrays)
+    outfile.close()
+    os.rename(tmpname, outfilename)
+
+
+def read_cache(infilename):
+    """
+    Read columns and rejected lines from a cache file written by :func:`write_cache`
+
+    :param infilename: name of the cache file
+    :return: dictionary of columns and list of lines that could not be decoded
+    """
+    columns = {}
+    rejected = []
+    contents = np.load(infilename)
+    for p in contents.files:
+        if p == 'rejected_lines':
+            rejected = list(contents[p])
+        elif contents[p].dtype.kind == 'S':
+            column = contents[p].astype(object)
+            column[column == ''] = None
+            columns[p] = column
+        else:
+            columns[p] = contents[p]
+    contents.close()
+    return columns, rejected
+
+
+def decode_icoads_file(filename, attachments, cache_dir=None, decompression='zlib'):
+    """
+    Decode every record in an ICOADS file into columns holding all the fields in the selected attachments.
+    If a cache directory is given, the columns are read from the cache if the file has been decoded before,
+    otherwise they are written to the cache.
+
+    :param filename: name of the gzipped ICOADS file
+    :param attachments: list of the IMMA1 attachments to decode
+    :param cache_dir: directory holding cache files, or None for no caching
+    :param decompression: method of decompression, see :func:`open_icoads_file`
+    :type filename: string
+    :type attachments: list of integers
+    :type cache_dir: string
+    :type decompression: string
+    :return: dictionary of columns and list of lines that could not be decoded
+    """
+    fields = []
+    for i in sorted(attachments):
+        fields.extend(IMMA1.getParameters(i))
+
+    cachefile = None
+    if cache_dir is not None:
+        cachefile = cache_filename(cache_dir, filename, attachments)
+        if os.path.isfile(cachefile):
+            return read_cache(cachefile)
+
+    rejected = []
+    icoads_file = open_icoads_file(filename, decompression)
+    columns = IMMA1.read_columns(icoads_file, fields, rejected=rejected)
+    icoads_file.close()
+
+    if cachefile is not None:
+        write_cache(cachefile, columns, rejected)
+
+    return columns, rejected
+
+
+class MonthReader:
+    """
+    Iterate over the records in an ICOADS file from a particular year and month whose IDs are not excluded.
+    Other records are rejected. Records that cannot be decoded are reported and rejected. The number of
+    records rejected without being fully decoded is kept in early_rejects.
+
+    If cache_dir is None the file is read a line at a time. Otherwise the whole file is decoded into columns
+    which are cached in cache_dir (see :func:`decode_icoads_file`). Either way the same records are produced.
+    """
+
+    def __init__(self, filename, year, month, ids_to_exclude, attachments, cache_dir=None, decompression='zlib'):
+        """
+        :param filename: name of the gzipped ICOADS file
+        :param year: year of records to keep
+        :param month: month of records to keep
+        :param ids_to_exclude: IDs to reject, either as a list or an index from :func:`.process_bad_id_file`
+        :param attachments: list of the IMMA1 attachments to decode
+        :param cache_dir: directory holding cache files, or None for no caching
+        :param decompression: method of decompression, see :func:`open_icoads_file`
+        :type filename: string
+        :type year: integer
+        :type month: integer
+        :type attachments: list of integers
+        :type cache_dir: string
+        :type decompression: string
+        :raises IOError: if the file does not exist
+        """
+        if filename is None or not os.path.isfile(filename):
+            raise IOError("no ICOADS file {}".format(filename))
+        self.filename = filename
+        self.year = year
+        self.month = month
+        if not isinstance(ids_to_exclude, bf.IDExclusionIndex):
+            ids_to_exclude = bf.IDExclusionIndex(ids_to_exclude)
+        self.ids_to_exclude = ids_to_exclude
+        self.attachments = attachments
+        self.cache_dir = cache_dir
+        self.decompression = decompression
+        self.early_rejects = 0
+
+    def __iter__(self):
+        if self.cache_dir is None:
+            return self.read_lines()
+        return self.read_columns()
+
+    def read_lines(self):
+        """
+        Read the file a line at a time
+        """
+        icoads_file = open_icoads_file(self.filename, self.decompression)
+
+        rec = IMMA()
+
+        for line in icoads_file:
+
+            if not line_could_match(line, self.year, self.month, self.ids_to_exclude):
+                self.early_rejects += 1
+                continue
+
+            try:
+                rec.readstr(line, attachments=self.attachments)
+                readob = True
+            except:
+                readob = False
+                print("Rejected ob {}".format(line))
+
+            if (readob and
+                    not (rec.data['ID'] in self.ids_to_exclude) and
+                    rec.data['YR'] == self.year and
+                    rec.data['MO'] == self.month):
+                yield rec
+
+            rec = IMMA()
+
+        icoads_file.close()
+
+    def decode(self):
+        """
+        Decode (or read from the cache) the whole file at once
+
+        :return: dictionary of columns and list of lines that could not be decoded, see :func:`decode_icoads_file`
+        """
+        return decode_icoads_file(self.filename, self.attachments, self.cache_dir, self.decompression)
+
+    def read_columns(self, decoded=None):
+        """
+        Decode (or read from the cache) the whole file at once and select records from the columns
+
+        :param decoded: columns and rejected lines from :meth:`decode` if the file has already been decoded
+        :type decoded: tuple
+        """
+        if decoded is None:
+            decoded = self.decode()
+        columns, rejected = decoded
+
+        for line in rejected:
+            if line_could_match(line, self.year, self.month, self.ids_to_exclude):
+                print("Rejected ob {}".format(line))
+            else:
+                self.early_rejects += 1
+
+        keep = ((columns['YR'] == self.year) &
+                (columns['MO'] == self.month) &
+                ~self.ids_to_exclude.mask(columns['ID']))
+        self.early_rejects += int(np.count_nonzero(~keep))
+
+        selected = {}
+        for p in columns:
+            selected[p] = columns[p][keep]
+
+        for rec in IMMA1.columns_to_records(selected):
+            yield rec
+
+
+class Prefetcher:
+    """
+    Read the records from a :class:`MonthReader` in a background thread, so that the file can be decompressed 
+    and decoded while other work is going on. If the reader decodes the file into columns (it has a cache_dir) 
+    only the decoding, or reading of the cache, is done in the background and the records are made from the 
+    columns as they are used. Otherwise records are passed back through a bounded queue of chunks, so at most 
+    chunk_size * max_chunks records are held waiting to be used and the background thread waits when the 
+    queue is full. A max_chunks of 0 lets the whole month be read ahead, at the cost of holding all of its 
+    records in memory. Iterating over the Prefetcher gives the same records, in the same order, as iterating 
+    over the reader. Any exception raised while reading is raised again in 
+    the thread which iterates over the Prefetcher.
+    """
+
+    def __init__(self, reader, chunk_size=1000, max_chunks=100):
+        """
+        :param reader: the reader to read from in the background
+        :param chunk_size: number of records put on the queue at a time
+        :param max_chunks: maximum number of chunks waiting on the queue, 0 for no limit
+        :type reader: :class:`MonthReader`
+        :type chunk_size: integer
+        :type max_chunks: integer
+        """
+        self.reader = reader
+        self.chunk_size = chunk_size
+        self.early_rejects = 0
+        self.error = None
+        self.decoded = None
+        self.queue = Queue.Queue(max_chunks)
+        if reader.cache_dir is None:
+            self.thread = threading.Thread(target=self.fill_queue)
+        else:
+            self.thread = threading.Thread(target=self.decode)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def fill_queue(self):
+        """
+        Read records into the queue, ending with None
+        """
+        try:
+            chunk = []
+            for rec in self.reader:
+                chunk.append(rec)
+                if len(chunk) == self.chunk_size:
+                    self.queue.put(chunk)
+                    chunk = []
+            if len(chunk) > 0:
+                self.queue.put(chunk)
+        except Exception as error:
+            self.error = error
+        self.queue.put(None)
+
+    def decode(self):
+        """
+        Decode the file into columns
+        """
+        try:
+            self.decoded = self.reader.decode()
+        except Exception as error:
+            self.error = error
+
+    def __iter__(self):
+        if self.reader.cache_dir is None:
+            while True:
+                chunk = self.queue.get()
+                if chunk is None:
+                    break
+                for rec in chunk:
+                    yield rec
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        if self.reader.cache_dir is not None:
+            for rec in self.reader.read_columns(self.decoded):
+                yield rec
+        self.early_rejects = self.reader.early_rejects
@@ -2,6 +2,8 @@
 #  IMMA documentation is at http://icoads.noaa.gov/e-doc/imma
 
 #import re     #  Regular Expressions
+import gzip
+import numpy as np
 
 class IMMA:
     
@@ -24,16 +26,23 @@ class IMMA:
         return self.readstr(line)
 
  # Read in a record from a file
-    def readstr(self,line):
+    def readstr(self,line,attachments=None):
         '''
         Read in an IMMA1 record from a file
         
         :param fh: file handle
         :type fh: file handle
+        :param attachments: optional list of the attachments to decode. Other attachments are skipped 
+          over using their ID/length headers without being decoded and are not added to the record. 
+          The default, None, decodes every attachment.
+        :type attachments: list of integers
         '''
 #        line = fh.readline();
         if(line == ""): return   # EOF
         line=line.rstrip("\n")       # Remove trailing newline
+
+        if attachments is not None:
+            still_wanted = set(attachments)
     
     # Core is always present (and first)
         Attachment = 0;
@@ -47,13 +56,18 @@ class IMMA:
                 sfmt = "%%%ds" % (Length-len(line))
                 line += sfmt % " "
 
-            self.decode(
-                line,
-                getAttachment(Attachment),
-                getParameters(Attachment),
-                getDefinitions(Attachment)
-            )
-            self.attachments.append(int(Attachment))
+            if attachments is None or Attachment in still_wanted:
+                self.decode(
+                    line,
+                    getAttachment(Attachment),
+                    getParameters(Attachment),
+                    getDefinitions(Attachment)
+                )
+                self.attachments.append(int(Attachment))
+                if attachments is not None:
+                    still_wanted.discard(Attachment)
+                    if len(still_wanted) == 0:
+                        break
             if ( Length==None or Length == 0 ):
                 break
             line = line[Length:len(line)]
@@ -205,6 +219,421 @@ def decode_base36(t):
 def encode_base36(t):
     return '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[t:t+1]
 
+###
+### Bulk (columnar) decoding of whole IMMA files
+###
+
+_BASE36_LOOKUP = np.zeros(256, dtype=np.int64) - 1
+for _i, _c in enumerate('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
+    _BASE36_LOOKUP[ord(_c)] = _i
+
+
+def split_attachments(line):
+    '''
+    Split an IMMA1 record into its attachments, walking the ID/length headers in 
+    exactly the same way as :meth:`IMMA.readstr`
+    
+    :param line: the IMMA1 record as a string
+    :type line: string
+    :return: yields (attachment number, string representation of the attachment, length)
+      where length is None for an attachment of undefined length which runs to the end of the record
+    '''
+    line = line.rstrip("\n")
+    Attachment = 0
+    Length = 108
+
+    while ( len(line) > 0 ):
+
+        if ( Length != None and Length > 0 and len(line) < Length ):
+            line += " " * (Length - len(line))
+
+        if ( Length == None or Length == 0 ):
+            yield Attachment, line, None
+            break
+
+        yield Attachment, line[0:Length], Length
+
+        line = line[Length:len(line)]
+        if ( len(line) > 0 ):
+            Attachment = int(line[0:2])
+            if Attachment == 8:
+                Length = "102" # Ugly!
+            else:
+                Length     = line[2:4]
+            if Length.isspace():
+                Length = None
+            if ( Length != None ):
+                Length = int(Length)
+                if ( Length != 0 ):
+                    Length = int(Length)-4
+                    line = line[4:len(line)]
+            getAttachment(Attachment)
+
+
+def attachments_for_fields(fields):
+    '''
+    Find the attachments that have to be decoded to recover a list of IMMA1 fields
+    
+    :param fields: IMMA1 parameter names e.g. ['YR', 'MO', 'DCK', 'UID']
+    :type fields: list of strings
+    :return: sorted list of attachment numbers. The core (0) is always included.
+    :rtype: list of integers
+    '''
+    needed = set([0])
+    for field in fields:
+        found = False
+        for key in parameters:
+            if field in parameters[key]:
+                needed.add(int(key))
+                found = True
+        assert found, 'unknown IMMA1 parameter ' + str(field)
+    return sorted(needed)
+
+
+_CORE_OFFSETS = {}
+
+def core_field(line, parameter):
+    '''
+    Decode a single field of the core attachment directly from the raw IMMA1 record, 
+    without decoding the rest of the record. The value is the same as that found by 
+    :meth:`IMMA.readstr`, None if the field is blank.
+    
+    :param line: the IMMA1 record as a string
+    :param parameter: name of a parameter in the core, e.g. 'YR'
+    :type line: string
+    :type parameter: string
+    :return: the decoded value
+    :raises ValueError: if the field cannot be decoded
+    '''
+    if len(_CORE_OFFSETS) == 0:
+        _CORE_OFFSETS.update(_field_offsets(0))
+    offset, length = _CORE_OFFSETS[parameter]
+    value = line.rstrip("\n")[offset:offset+length]
+    if len(value) < length:
+        value += " " * (length - len(value))
+
+    if value.isspace():
+        return None
+
+    definition = getDefinitions(0)[parameter]
+    if definition[6] == 2:
+        value = decode_base36(value)
+    if definition[6] == 1:
+        value = int(value)
+    if definition[5] is not None and definition[5] != 1.0:
+        value = int(value) * definition[5]
+
+    return value
+
+
+def line_could_match(line, year, month, ids_to_exclude=None):
+    '''
+    Cheap test on a raw IMMA1 record, made before decoding it, of whether the record is from the 
+    specified year and month and has an ID that is not in ids_to_exclude. Records with a YR or MO 
+    that cannot be decoded are passed so that they are rejected by the full decode.
+    
+    :param line: the IMMA1 record as a string
+    :param year: year the record must be from
+    :param month: month the record must be from
+    :param ids_to_exclude: optional collection of IDs (padded to nine characters) which are to be rejected
+    :type line: string
+    :type year: integer
+    :type month: integer
+    :return: False if the record can be rejected without decoding it, True otherwise
+    '''
+    try:
+        if core_field(line, 'YR') != year or core_field(line, 'MO') != month:
+            return False
+    except ValueError:
+        return True
+    if ids_to_exclude is None:
+        return True
+    return core_field(line, 'ID') not in ids_to_exclude
+
+
+def _field_offsets(i):
+    '''
+    Return a dictionary giving the (offset, length) of each parameter within attachment i. 
+    Fields of undefined length have a length of None.
+    '''
+    offsets = {}
+    position = 0
+    for p in getParameters(i):
+        length = getDefinitions(i)[p][0]
+        offsets[p] = (position, length)
+        if length is not None:
+            position += length
+    return offsets
+
+
+def _decode_integers(block):
+    '''
+    Decode a two-dimensional array of bytes (one row per record) holding right- or 
+    left-justified signed integers, following the rules used by int().
+    
+    :return: values, blank (all spaces) and valid (either blank or a good integer) flags
+    '''
+    nrows, width = block.shape
+    is_space = (block == 32) | (block == 0)
+    is_digit = (block >= 48) & (block <= 57)
+    is_sign = (block == 45) | (block == 43)
+
+    blank = np.all(is_space, axis=1)
+
+    # the non-blank characters must be contiguous, an optional sign followed by digits
+    not_space = ~is_space
+    previous_space = np.ones((nrows, width), dtype=bool)
+    previous_space[:, 1:] = is_space[:, :-1]
+    starts = np.sum(not_space & previous_space, axis=1)
+    first = np.argmax(not_space, axis=1)
+    leading_sign = is_sign & (np.arange(width)[np.newaxis, :] == first[:, np.newaxis])
+    valid = ((starts <= 1) &
+             np.all(is_digit | is_space | leading_sign, axis=1) &
+             np.any(is_digit, axis=1))
+
+    values = np.zeros(nrows, dtype=np.int64)
+    for j in range(width):
+        values = np.where(is_digit[:, j], values * 10 + (block[:, j].astype(np.int64) - 48), values)
+    values = np.where(np.any(block == 45, axis=1), -1 * values, values)
+
+    return values, blank, valid | blank
+
+
+def _decode_fixed_width(strings, i, fields):
+    '''
+    Decode a list of string representations of attachment i into columns
+    
+    :param strings: list of strings, one per record
+    :param i: attachment number
+    :param fields: list of parameters in the attachment that are wanted
+    :return: dictionary of columns and an array flagging records that decoded successfully
+    '''
+    definitions_i = getDefinitions(i)
+    offsets = _field_offsets(i)
+    nrows = len(strings)
+
+    fixed_length = sum([definitions_i[p][0] for p in getParameters(i) if definitions_i[p][0] is not None])
+    fixed_length = max(fixed_length, 1)
+    as_bytes = np.array(strings, dtype='S%d' % fixed_length)
+    buffer = as_bytes.view(np.uint8).reshape(nrows, fixed_length)
+
+    columns = {}
+    valid = np.ones(nrows, dtype=bool)
+
+    for p in fields:
+        position, length = offsets[p]
+        encoding = definitions_i[p][6]
+        scale = definitions_i[p][5]
+
+        if length is None:
+            # undefined length - slurp the rest of each string
+            column = np.empty(nrows, dtype=object)
+            for k, astring in enumerate(strings):
+                value = astring[position:len(astring)].rstrip("\n")
+                if value.isspace():
+                    value = None
+                elif encoding == 1:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        valid[k] = False
+                        value = None
+                column[k] = value
+            columns[p] = column
+            continue
+
+        block = buffer[:, position:position + length]
+
+        if encoding == 3:
+            column = np.ascontiguousarray(block).view('S%d' % length).ravel()
+            blank = np.all((block == 32) | (block == 0), axis=1)
+            # numpy strips trailing nulls, so restore the blank padding that readstr would see
+            column = np.array([s.ljust(length) for s in column], dtype=object)
+            column[blank] = None
+            columns[p] = column
+            continue
+
+        if encoding == 2:
+            values = _BASE36_LOOKUP[block[:, 0]]
+            blank = np.all((block == 32) | (block == 0), axis=1)
+        else:
+            values, blank, good = _decode_integers(block)
+            valid &= good
+
+        column = values.astype(np.float64)
+        if scale is not None and scale != 1.0:
+            column = values * scale
+        column[blank] = np.nan
+        columns[p] = column
+
+    return columns, valid
+
+
+def _empty_column(i, p, nrows):
+    if getDefinitions(i)[p][6] == 3:
+        return np.empty(nrows, dtype=object)
+    return np.zeros(nrows) + np.nan
+
+
+def _read_column_chunk(lines, fields_by_attachment):
+    '''
+    Decode a list of IMMA1 records into a dictionary of columns
+    '''
+    nrows = len(lines)
+    valid = np.ones(nrows, dtype=bool)
+    columns = {}
+
+    # the core is always first and always 108 characters long
+    core = [line.rstrip("\n") for line in lines]
+    if 0 in fields_by_attachment:
+        core_columns, core_valid = _decode_fixed_width(core, 0, fields_by_attachment[0])
+        columns.update(core_columns)
+        valid &= core_valid
+
+    others = [i for i in sorted(fields_by_attachment) if i != 0]
+    if len(others) == 0:
+        return columns, valid
+
+    # walk the attachment headers to find the requested attachments in each record, stopping 
+    # once they have all been found as readstr does when it is given a list of attachments
+    found = dict([(i, ([], [])) for i in others])
+    for k, line in enumerate(core):
+        nfound = 0
+        try:
+            for i, astring, length in split_attachments(line):
+                if i in found:
+                    found[i][0].append(k)
+                    found[i][1].append(astring)
+                    nfound += 1
+                    if nfound == len(others):
+                        break
+        except (ValueError, KeyError):
+            valid[k] = False
+
+    for i in others:
+        rows, strings = found[i]
+        rows = np.array(rows, dtype=np.int64)
+        if len(rows) > 0:
+            att_columns, att_valid = _decode_fixed_width(strings, i, fields_by_attachment[i])
+            valid[rows[~att_valid]] = False
+        for p in fields_by_attachment[i]:
+            if p not in columns:
+                columns[p] = _empty_column(i, p, nrows)
+            # later attachments overwrite earlier ones, as they do in readstr
+            if len(rows) > 0:
+                columns[p][rows] = att_columns[p]
+
+    return columns, valid
+
+
+def read_columns(source, fields=None, chunk_size=100000, rejected=None):
+    '''
+    Decode the selected fields of every record in an IMMA1 file into NumPy arrays. This 
+    gives the same values as reading each record with :meth:`IMMA.readstr` but decodes 
+    a whole column at a time.
+    
+    :param source: either the name of an IMMA1 file (gzipped if the name ends in .gz) or an 
+      iterable of IMMA1 records such as an open file
+    :param fields: list of IMMA1 parameter names to decode, defaults to all core parameters
+    :param chunk_size: number of records to decode at once
+    :param rejected: if a list is given, records which cannot be decoded are appended to it
+    :type source: string or iterable
+    :type fields: list of strings
+    :type chunk_size: integer
+    :type rejected: list
+    :return: dictionary of columns, one entry per field. Numeric fields are float64 arrays 
+      with NaN where the value is missing. Character fields are object arrays with None 
+      where the value is missing.
+    :rtype: dictionary of numpy arrays
+    
+    Records which cannot be decoded (for example, a requested numeric field contains a 
+    non-numeric character) are dropped, as they would be rejected by readstr. Only the 
+    attachments that hold the requested fields are decoded, so a problem in any other 
+    attachment does not cause a record to be dropped.
+    '''
+    if fields is None:
+        fields = list(getParameters(0))
+
+    fields_by_attachment = {}
+    for i in attachments_for_fields(fields):
+        wanted = [p for p in getParameters(i) if p in fields]
+        if len(wanted) > 0:
+            fields_by_attachment[i] = wanted
+
+    close_when_done = False
+    if isinstance(source, basestring):
+        if source.endswith('.gz'):
+            source = gzip.open(source, 'r')
+        else:
+            source = open(source, 'r')
+        close_when_done = True
+
+    chunks = dict([(p, []) for p in fields])
+
+    def add_chunk(lines):
+        chunk_columns, chunk_valid = _read_column_chunk(lines, fields_by_attachment)
+        for p in fields:
+            chunks[p].append(chunk_columns[p][chunk_valid])
+        if rejected is not None:
+            rejected.extend([lines[k] for k in np.nonzero(~chunk_valid)[0]])
+
+    lines = []
+    for line in source:
+        if line == "":
+            continue
+        lines.append(line)
+        if len(lines) >= chunk_size:
+            add_chunk(lines)
+            lines = []
+    if len(lines) > 0 or len(chunks[fields[0]]) == 0:
+        add_chunk(lines)
+
+    if close_when_done:
+        source.close()
+
+    columns = {}
+    for p in fields:
+        columns[p] = np.concatenate(chunks[p])
+
+    return columns
+
+
+def _parameter_definition(p):
+    for i in sorted(parameters):
+        if p in parameters[i]:
+            return definitions[i][p]
+    assert False, "unknown IMMA1 parameter " + p
+
+
+def columns_to_records(columns):
+    '''
+    Turn columns of IMMA1 fields, as returned by :func:`read_columns`, back into 
+    :class:`IMMA` records, one per row. Values have the same types they would have 
+    if the record had been read by :meth:`IMMA.readstr`: integers for unscaled 
+    numeric fields, floats for scaled fields, strings for character fields and None 
+    for missing values. The attachments list of each record is left empty.
+    
+    :param columns: dictionary of columns
+    :type columns: dictionary of numpy arrays
+    :return: yields one :class:`IMMA` per row
+    '''
+    names = list(columns.keys())
+    values = []
+    for p in names:
+        definition = _parameter_definition(p)
+        column = columns[p]
+        if definition[6] == 3:
+            values.append(list(column))
+        elif definition[6] == 2 or definition[5] is None or definition[5] == 1.0:
+            values.append([None if v != v else int(v) for v in column.tolist()])
+        else:
+            values.append([None if v != v else v for v in column.tolist()])
+
+    for row in zip(*values):
+        rec = IMMA()
+        rec.data = dict(zip(names, row))
+        yield rec
+
 
 ###
 ### Data for each attachment type
@@ -0,0 +1,44 @@
+"""
+Measure how much memory the climatologies used by the base QC take up when they are held as
+masked arrays, as read from the NetCDF files, and when they are held as dense float32 arrays
+(the dense option of :class:`.Climatology`).
+
+The climatologies measured are those listed under climatologies in the parameter file named in
+the configuration file, i.e. the full climatology library used by marine_qc.py.
+
+Usage: python benchmark_climatology_memory.py -config configuration.txt
+"""
+
+import sys
+import json
+import argparse
+import ConfigParser
+import Climatology as clim
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure memory used by the climatology library')
+    parser.add_argument('-config', type=str, default='configuration.txt', help='name of config file')
+    args = parser.parse_args(argv)
+
+    config = ConfigParser.ConfigParser()
+    config.read(args.config)
+
+    with open(config.get('Files', 'parameter_file'), 'r') as f:
+        parameters = json.load(f)
+
+    total_masked = 0
+    total_dense = 0
+    for entry in parameters['climatologies']:
+        masked = clim.fields_nbytes([clim.Climatology.from_filename(entry[2], entry[3])])
+        dense = clim.fields_nbytes([clim.Climatology.from_filename(entry[2], entry[3], dense=True)])
+        print("{:4s} {:6s} masked {:8.1f} MB  dense {:8.1f} MB".format(entry[0], entry[1],
+                                                                      masked / 1024.**2, dense / 1024.**2))
+        total_masked += masked
+        total_dense += dense
+
+    print("total       masked {:8.1f} MB  dense {:8.1f} MB".format(total_masked / 1024.**2, total_dense / 1024.**2))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,138 @@
+"""
+Measure how much memory each report takes up when a realistic deck of reports is held as
+:class:`.MarineReportQC` objects, as :class:`.CompactMarineReport` objects, or in a
+:class:`.ColumnarDeck`.
+
+The reports are given the variables, QC flags, climatological values and extended variables
+that they would have after base QC, climatology matching and the track check in marine_qc.py.
+Memory is counted by following references from the reports and adding up the sizes of all the
+objects reached, counting objects shared between reports (e.g. interned strings and small
+integers) only once.
+
+Usage: python benchmark_report_memory.py -n 20000
+"""
+
+import sys
+import types
+import random
+import argparse
+import numpy as np
+from SimpleIMMA import IMMA
+import Extended_IMMA as ex
+
+BASE_QC_FLAGS = {'POS': ['day', 'isship', 'trk', 'date', 'time', 'pos', 'blklst', 'isbuoy', 'is780', 'few'],
+                 'SST': ['bud', 'clim', 'nonorm', 'freez', 'noval', 'bbud', 'rep', 'hardlimit'],
+                 'AT': ['bud', 'clim', 'nonorm', 'noval', 'mat_blacklist', 'bbud', 'rep', 'hardlimit'],
+                 'DPT': ['bud', 'clim', 'nonorm', 'noval', 'hum_blacklist', 'rep', 'ssat', 'round', 'hardlimit'],
+                 'SLP': ['bud', 'clim', 'nonorm', 'noval'],
+                 'W': ['noval', 'hardlimit', 'consistency', 'wind_blacklist']}
+
+EXTENDED_VARIABLES = ['speed', 'course', 'distance', 'time_diff',
+                      'alt_speed', 'alt_course', 'alt_distance', 'alt_time_diff', 'OSTIA', 'ICE', 'BGVAR']
+
+
+def deep_size(obj, seen):
+    """
+    Add up the sizes of obj and everything it refers to that has not already been seen
+
+    :param obj: object to be measured
+    :param seen: set of ids of objects that have already been counted. Updated in place.
+    :return: size in bytes
+    :rtype: integer
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        for key in obj:
+            size += deep_size(key, seen) + deep_size(obj[key], seen)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += deep_size(item, seen)
+    elif isinstance(obj, np.ndarray):
+        if obj.base is not None:
+            size += deep_size(obj.base, seen)
+        if obj.dtype == object:
+            for item in obj:
+                size += deep_size(item, seen)
+    elif isinstance(obj, types.InstanceType):
+        size += deep_size(vars(obj), seen)
+    elif '__slots__' in type(obj).__dict__:
+        for cls in type(obj).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if hasattr(obj, name):
+                    size += deep_size(getattr(obj, name), seen)
+        if hasattr(obj, '__dict__'):
+            size += deep_size(vars(obj), seen)
+    return size
+
+
+def make_records(nreps, seed=0):
+    """
+    Make IMMA records with the variables that are typically present in an ICOADS ship report
+    """
+    rng = random.Random(seed)
+    ship_ids = ['SHIP{:05d}'.format(i) for i in range(nreps // 50 + 1)]
+    records = []
+    for i in range(nreps):
+        rec = IMMA()
+        values = {'ID': rng.choice(ship_ids), 'UID': 'U{:05d}'.format(i),
+                  'YR': 2003, 'MO': 1, 'DY': rng.randint(1, 31), 'HR': rng.randint(0, 23) + 0.0,
+                  'LAT': round(rng.uniform(-70, 70), 2), 'LON': round(rng.uniform(0, 360), 2),
+                  'DS': rng.randint(0, 8), 'VS': rng.randint(0, 9),
+                  'SLP': round(rng.uniform(980, 1040), 1), 'AT': round(rng.uniform(-5, 30), 1),
+                  'SST': round(rng.uniform(-1, 30), 1), 'DPT': round(rng.uniform(-10, 25), 1),
+                  'W': round(rng.uniform(0, 25), 1), 'WI': 3, 'D': rng.randint(1, 360), 'DI': 1,
+                  'DCK': 926, 'PT': 5, 'SID': 103}
+        for key in values:
+            rec.data[key] = values[key]
+        records.append(rec)
+    return records
+
+
+def fill_report(rep, rng):
+    """
+    Give a report the QC flags, climatologies and extended variables it has part way through marine_qc.py
+    """
+    for qc_type in BASE_QC_FLAGS:
+        for flag in BASE_QC_FLAGS[qc_type]:
+            rep.set_qc(qc_type, flag, rng.choice([0, 0, 0, 1]))
+    for var in ['SST', 'AT', 'DPT', 'SLP']:
+        rep.add_climate_variable(var, rng.uniform(0, 20), rng.uniform(0.5, 3))
+    for var in EXTENDED_VARIABLES:
+        rep.setext(var, rng.uniform(0, 20))
+
+
+def bytes_per_report(report_class, records):
+    rng = random.Random(1)
+    reps = []
+    for rec in records:
+        rep = report_class(rec)
+        fill_report(rep, rng)
+        reps.append(rep)
+    return deep_size(reps, set()) / float(len(reps)), reps
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure memory used per marine report')
+    parser.add_argument('-n', type=int, default=20000, help='number of reports in the deck')
+    args = parser.parse_args(argv)
+
+    records = make_records(args.n)
+
+    size, reps = bytes_per_report(ex.MarineReportQC, records)
+    print("MarineReportQC:      {:8.0f} bytes per report".format(size))
+
+    size, reps = bytes_per_report(ex.CompactMarineReport, records)
+    print("CompactMarineReport: {:8.0f} bytes per report".format(size))
+
+    deck = ex.ColumnarDeck(capacity=len(reps))
+    for rep in reps:
+        deck.append(rep)
+    print("ColumnarDeck:        {:8.0f} bytes per report".format(deep_size(deck, set()) / float(len(deck))))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
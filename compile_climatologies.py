@@ -0,0 +1,68 @@
+#!/usr/local/sci/bin/python2.7
+"""
+compile_climatologies.py invoked by typing::
+
+  python2.7 compile_climatologies.py -config configuration.txt
+
+This reads the climatologies used by the QC from their NetCDF files and saves them in the climatology store, a
+directory of float32 .npy files which the QC programs open as memory maps instead of reading the NetCDF files. The
+store is the directory given by climatology_store in the parameter file. Climatologies which are already in the
+store, and whose NetCDF files have not changed, are skipped, so it is safe to run again after changing some of the
+files.
+
+Inputs
+
+-config
+  specifies the configuration file to use
+"""
+
+import Climatology as clim
+import argparse
+import ConfigParser
+import json
+import sys
+
+# climatologies named in the Climatologies section of the configuration file, with their NetCDF variable names
+CONFIG_CLIMATOLOGIES = [('Old_SST_stdev_climatology', 'sst'),
+                        ('SST_buddy_one_box_to_buddy_avg', 'sst'),
+                        ('SST_buddy_one_ob_to_box_avg', 'sst'),
+                        ('SST_buddy_avg_sampling', 'sst'),
+                        ('DJF_ostia_background', 'bg_var'),
+                        ('MAM_ostia_background', 'bg_var'),
+                        ('JJA_ostia_background', 'bg_var'),
+                        ('SON_ostia_background', 'bg_var')]
+
+
+def main(argv):
+    """
+    Compile all the climatologies listed in the parameter file and the configuration file into the climatology store
+    """
+    parser = argparse.ArgumentParser(description='Compile climatologies into the climatology store')
+    parser.add_argument('-config', type=str, default='configuration.txt', help='name of config file')
+    args = parser.parse_args(argv)
+
+    config = ConfigParser.ConfigParser()
+    config.read(args.config)
+
+    with open(config.get('Files', 'parameter_file'), 'r') as f:
+        parameters = json.load(f)
+
+    assert 'climatology_store' in parameters, 'no climatology_store directory in the parameter file'
+    store = clim.ClimatologyStore(parameters['climatology_store'])
+
+    sources = [(entry[2], entry[3]) for entry in parameters['climatologies']]
+    for option, var in CONFIG_CLIMATOLOGIES:
+        if config.has_option('Climatologies', option):
+            sources.append((config.get('Climatologies', option), var))
+
+    for infile, var in sources:
+        if infile is None:
+            continue
+        if store.compile(infile, var):
+            print("compiled {} {}".format(infile, var))
+        else:
+            print("up to date {} {}".format(infile, var))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
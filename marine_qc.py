@@ -2,7 +2,7 @@
 """
 marine_qc.py invoked by typing::
 
-  python2.7 marine_qc.py -config configuration.txt -year1 1850 -year2 1855 -month1 1 -month2 1 [-tracking] 
+  python2.7 marine_qc.py -config configuration.txt -year1 1850 -year2 1855 -month1 1 -month2 1 [-tracking] [-prefetch]
 
 This quality controls data for the chosen years. The location of the data and the locations of the climatology files are
 all to be specified in the configuration files:
@@ -28,6 +28,11 @@ Inputs
   switches on the tracking QC output, which produces one file per month per drifter ID in addition to other output and
   performs matches with OSTIA background fields.
 
+-prefetch
+  reads the next month's ICOADS file in a background thread while the current month is being QC'd. OSTIA background
+  values for -tracking are not read ahead: each day's values are read only around that day's reports when the month
+  is read.
+
 Inputs are specified in the configuration file and the parameters file (whose location is specified in the configuration
 file.
 
@@ -36,9 +41,8 @@ an ICOADS UID so that they can be stitched together at a later date.
 
 """
 
-import gzip
 import qc
-from IMMA1 import IMMA
+import ICOADSReader
 import Extended_IMMA as ex
 import Climatology as clim
 import BackgroundField as bf
@@ -46,6 +50,132 @@ import argparse
 import ConfigParser
 import json
 import sys
+import numpy as np
+
+# climatological values added to each report: (variable, statistic, lookup style) for ClimatologyLibrary.annotate
+CLIMATOLOGY_LOOKUPS = [('SST', 'mean', 'mds'), ('AT', 'mean', 'mds'),
+                       ('SLP2', 'mean', 'standard'), ('SHU', 'mean', 'standard'), ('CRH', 'mean', 'standard'),
+                       ('CWB', 'mean', 'standard'), ('DPD', 'mean', 'standard'),
+                       ('DPT', 'mean', 'standard'), ('DPT', 'stdev', 'standard'),
+                       ('AT2', 'mean', 'standard'), ('AT2', 'stdev', 'standard'),
+                       ('SLP', 'mean', 'standard'), ('SLP', 'stdev', 'standard')]
+
+
+def open_month(readyear, readmonth, parameters, ids_to_exclude):
+    """
+    Open the ICOADS file for one month
+
+    :param readyear: year to read
+    :param readmonth: month to read
+    :param parameters: QC parameters read from the parameter file
+    :param ids_to_exclude: IDs of reports that are to be rejected
+    :type readyear: integer
+    :type readmonth: integer
+    :type parameters: dictionary
+    :return: reader for the month or None if there is no file for the month
+    :rtype: :class:`.MonthReader`
+    """
+    filename = bf.icoads_filename_from_stub(parameters['icoads_dir'],
+                                            parameters['icoads_filenames'],
+                                            readyear, readmonth)
+    try:
+        icoads_reader = ICOADSReader.MonthReader(filename, readyear, readmonth, ids_to_exclude,
+                                                 ex.IMMA_ATTACHMENTS, parameters.get('icoads_cache_dir'),
+                                                 parameters.get('icoads_decompression', 'zlib'))
+    except IOError:
+        print("no ICOADS file for {} {}".format(readyear, readmonth))
+        return None
+
+    return icoads_reader
+
+
+def read_month(readyear, readmonth, icoads_reader, parameters, config, climlib, tracking):
+    """
+    Read in one month of ICOADS data and perform the basic QC on each report. The state of each report 
+    after the basic QC is saved alongside it, so that the reports can be reused in the QC of more than 
+    one month.
+
+    :param readyear: year to read
+    :param readmonth: month to read
+    :param icoads_reader: reader for the month from :func:`open_month`, or None if there is no file
+    :param parameters: QC parameters read from the parameter file
+    :param config: configuration
+    :param climlib: library of climatologies used by the basic QC
+    :param tracking: if True, add OSTIA background values to each report
+    :type readyear: integer
+    :type readmonth: integer
+    :type icoads_reader: :class:`.MonthReader` or :class:`.Prefetcher`
+    :type parameters: dictionary
+    :type config: ConfigParser
+    :type climlib: :class:`.ClimatologyLibrary`
+    :type tracking: boolean
+    :return: list of (report, saved state) pairs and the number of records rejected before decoding
+    """
+    reps = []
+    month_deck = ex.Deck()
+    early_rejects = 0
+
+    if icoads_reader is None:
+        return [], 0
+
+    ostia_bg_var = None
+    if tracking:
+        store = clim.ClimatologyStore(parameters.get('climatology_store'),
+                                      parameters.get('dense_climatologies', False))
+        ostia_bg_var = store.open(
+            config.get('Climatologies', qc.season(readmonth) + '_ostia_background'), 'bg_var')
+
+    # reports grouped by day, so that each day's OSTIA field is needed only once
+    reps_by_day = {}
+
+    for rec in icoads_reader:
+
+        rep = ex.MarineReportQC(rec)
+        del rec
+
+        rep.setvar('AT2', rep.getvar('AT'))
+
+        if tracking and readyear >= 1985 and rep.getvar('DY') is not None:
+            if rep.getvar('DY') in reps_by_day:
+                reps_by_day[rep.getvar('DY')].append(rep)
+            else:
+                reps_by_day[rep.getvar('DY')] = [rep]
+
+        month_deck.append(rep)
+
+    early_rejects += icoads_reader.early_rejects
+
+    # append OSTIA SST and sea-ice fraction from the previous day's background field to the observation metadata
+    # only the parts of each OSTIA file around the day's reports are read
+    for day in sorted(reps_by_day.keys()):
+        day_reps = reps_by_day[day]
+        y_year, y_month, y_day = qc.yesterday(readyear, readmonth, day)
+        ofname = bf.get_background_filename(parameters['background_dir'],
+                                            parameters['background_filenames'],
+                                            y_year, y_month, y_day)
+
+        ostia, ice, bgvar = clim.read_ostia_points(ofname, ostia_bg_var,
+                                                   [rep.lat() for rep in day_reps],
+                                                   [rep.lon() for rep in day_reps],
+                                                   [rep.getvar('MO') for rep in day_reps],
+                                                   [rep.getvar('DY') for rep in day_reps])
+        for i, rep in enumerate(day_reps):
+            rep.setext('OSTIA', None if np.isnan(ostia[i]) else ostia[i] - 273.15)
+            rep.setext('ICE', None if np.isnan(ice[i]) else ice[i])
+            rep.setext('BGVAR', None if np.isnan(bgvar[i]) else bgvar[i])
+    del reps_by_day
+
+    climlib.annotate(month_deck, CLIMATOLOGY_LOOKUPS)
+
+    for rep in month_deck.reps:
+        rep.calculate_humidity_variables(['SHU', 'VAP', 'CRH', 'CWB', 'DPD'])
+
+    month_deck.perform_base_qc(parameters, qc.SolarEphemeris())
+
+    for rep in month_deck.reps:
+        reps.append((rep, rep.save_state()))
+
+    return reps, early_rejects
 
 
 def main(argv):
@@ -79,6 +209,8 @@ def main(argv):
     parser.add_argument('-month1', type=int, default=1, help='First month for processing')
     parser.add_argument('-month2', type=int, default=1, help='Final month for processing')
     parser.add_argument('-tracking', action='store_true', help='perform tracking QC')
+    parser.add_argument('-prefetch', action='store_true',
+                        help='read the next ICOADS file (but not OSTIA) in the background')
     args = parser.parse_args()
 
     inputfile = args.config
@@ -87,6 +219,7 @@ def main(argv):
     month1 = args.month1
     month2 = args.month2
     tracking = args.tracking
+    prefetch = args.prefetch
 
     print("running on ICOADS, this is not a test!")
 
@@ -110,21 +243,28 @@ def main(argv):
 
     ids_to_exclude = bf.process_bad_id_file(bad_id_file)
 
-    # read in climatology files
-    sst_pentad_stdev = clim.Climatology.from_filename(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
-
-    sst_stdev_1 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
-    sst_stdev_2 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
-    sst_stdev_3 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
-
     with open(config.get('Files', 'parameter_file'), 'r') as f:
         parameters = json.load(f)
 
+    # climatologies are opened from the climatology store where they have been compiled into it
+    store = clim.ClimatologyStore(parameters.get('climatology_store'),
+                                  parameters.get('dense_climatologies', False))
+
+    # read in climatology files
+    sst_pentad_stdev = store.open(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
+
+    sst_stdev_1 = store.open(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
+    sst_stdev_2 = store.open(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
+    sst_stdev_3 = store.open(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
+
     print("Reading climatologies from parameter file")
     climlib = ex.ClimatologyLibrary()
     for entry in parameters['climatologies']:
         print("{} {}".format(entry[0], entry[1]))
-        climlib.add_field(entry[0], entry[1], clim.Climatology.from_filename(entry[2], entry[3]))
+        climlib.add_field(entry[0], entry[1], store.open(entry[2], entry[3]))
+
+    window = {}
+    prefetched = {}
 
     for year, month in qc.year_month_gen(year1, month1, year2, month2):
 
@@ -135,104 +275,43 @@ def main(argv):
 
         reps = ex.Deck()
         count = 0
-        lastday = -99
-
-        for readyear, readmonth in qc.year_month_gen(last_year, last_month, next_year, next_month):
-
-            print("{} {}".format(readyear, readmonth))
-
-            ostia_bg_var = None
-            if tracking:
-                ostia_bg_var = clim.Climatology.from_filename(
-                    config.get('Climatologies', qc.season(readmonth) + '_ostia_background'), 'bg_var')
-
-            filename = bf.icoads_filename_from_stub(parameters['icoads_dir'],
-                                                    parameters['icoads_filenames'],
-                                                    readyear, readmonth)
-            try:
-                icoads_file = gzip.open(filename, "r")
-            except IOError:
-                print("no ICOADS file for {} {}".format(readyear, readmonth))
-                continue
-
-            rec = IMMA()
-
-            for line in icoads_file:
-
-                try:
-                    rec.readstr(line)
-                    readob = True
-                except:
-                    readob = False
-                    print("Rejected ob {}".format(line))
-
-                if (not (rec.data['ID'] in ids_to_exclude) and
-                        readob and
-                        rec.data['YR'] == readyear and
-                        rec.data['MO'] == readmonth):
-
-                    rep = ex.MarineReportQC(rec)
-                    del rec
-
-                    rep.setvar('AT2', rep.getvar('AT'))
-
-                    # if day has changed then read in OSTIA field if available and append SST and sea-ice fraction
-                    # to the observation metadata
-                    if tracking and readyear >= 1985 and rep.getvar('DY') is not None:
-                        if rep.getvar('DY') != lastday:
-                            lastday = rep.getvar('DY')
-                            y_year, y_month, y_day = qc.yesterday(readyear, readmonth, lastday)
-
-                            #                            ofname = ostia_filename(ostia_dir, y_year, y_month, y_day)
-                            ofname = bf.get_background_filename(parameters['background_dir'],
-                                                                parameters['background_filenames'],
-                                                                y_year, y_month, y_day)
-
-                            climlib.add_field('OSTIA', 'background',
-                                              clim.Climatology.from_filename(ofname, 'analysed_sst'))
-                            climlib.add_field('OSTIA', 'ice',
-                                              clim.Climatology.from_filename(ofname, 'sea_ice_fraction'))
-
-                        rep_clim = climlib.get_field('OSTIA', 'background').get_value_ostia(rep.lat(), rep.lon())
-                        if rep_clim is not None:
-                            rep_clim -= 273.15
-
-                        rep.setext('OSTIA', rep_clim)
-                        rep.setext('ICE', climlib.get_field('OSTIA', 'ice').get_value_ostia(rep.lat(), rep.lon()))
-                        rep.setext('BGVAR', ostia_bg_var.get_value_mds_style(rep.lat(), rep.lon(), rep.getvar('MO'),
-                                                                             rep.getvar('DY')))
-
-                    for varname in ['SST', 'AT']:
-                        rep_clim = climlib.get_field(varname, 'mean').get_value_mds_style(rep.lat(), rep.lon(),
-                                                                                          rep.getvar('MO'),
-                                                                                          rep.getvar('DY'))
-                        rep.add_climate_variable(varname, rep_clim)
-
-                    for varname in ['SLP2', 'SHU', 'CRH', 'CWB', 'DPD']:
-                        rep_clim = climlib.get_field(varname, 'mean').get_value(rep.lat(), rep.lon(), rep.getvar('MO'),
-                                                                                rep.getvar('DY'))
-                        rep.add_climate_variable(varname, rep_clim)
-
-                    for varname in ['DPT', 'AT2', 'SLP']:
-                        rep_clim = climlib.get_field(varname, 'mean').get_value(rep.lat(), rep.lon(), rep.getvar('MO'),
-                                                                                rep.getvar('DY'))
-                        rep_stdev = climlib.get_field(varname, 'stdev').get_value(rep.lat(), rep.lon(),
-                                                                                  rep.getvar('MO'), rep.getvar('DY'))
-                        rep.add_climate_variable(varname, rep_clim, rep_stdev)
-
-                    rep.calculate_humidity_variables(['SHU', 'VAP', 'CRH', 'CWB', 'DPD'])
-
-                    rep.perform_base_qc(parameters)
-                    rep.set_qc('POS', 'month_match', qc.month_match(year, month, rep.getvar('YR'), rep.getvar('MO')))
-
-                    reps.append(rep)
-                    count += 1
-
-                rec = IMMA()
-
-            icoads_file.close()
+        early_rejects = 0
+
+        # months already read in are kept and reused, so only one new month has to be read each time
+        needed = list(qc.year_month_gen(last_year, last_month, next_year, next_month))
+        for key in window.keys():
+            if key not in needed:
+                del window[key]
+
+        for readyear, readmonth in needed:
+
+            if (readyear, readmonth) not in window:
+                print("{} {}".format(readyear, readmonth))
+                if (readyear, readmonth) in prefetched:
+                    icoads_reader = prefetched.pop((readyear, readmonth))
+                else:
+                    icoads_reader = open_month(readyear, readmonth, parameters, ids_to_exclude)
+                window[(readyear, readmonth)] = read_month(readyear, readmonth, icoads_reader, parameters, config,
+                                                           climlib, tracking)
+
+            month_reps, month_rejects = window[(readyear, readmonth)]
+            for rep, state in month_reps:
+                rep.restore_state(state)
+                rep.set_qc('POS', 'month_match', qc.month_match(year, month, rep.getvar('YR'), rep.getvar('MO')))
+                reps.append(rep)
+                count += 1
+            early_rejects += month_rejects
 
         print("Read {} ICOADS records".format(count))
+        print("Rejected {} ICOADS records before decoding".format(early_rejects))
+
+        # start reading the month that will be needed next while this month is QC'd
+        if prefetch and (year, month) != (year2, month2):
+            ahead = qc.next_month_is(next_year, next_month)
+            icoads_reader = open_month(ahead[0], ahead[1], parameters, ids_to_exclude)
+            if icoads_reader is not None:
+                icoads_reader = ICOADSReader.Prefetcher(icoads_reader)
+            prefetched[ahead] = icoads_reader
 
         # filter the obs into passes and fails of basic positional QC
         filt = ex.QC_filter()
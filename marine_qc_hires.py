@@ -30,9 +30,8 @@ Inputs
 
 """
 
-import gzip
 import qc
-from IMMA1 import IMMA
+import ICOADSReader
 import Extended_IMMA as ex
 import Climatology as clim
 import BackgroundField as bf
@@ -103,16 +102,20 @@ def main(argv):
 
     ids_to_exclude = bf.process_bad_id_file(bad_id_file)
 
-    # read in climatology files
-    sst_pentad_stdev = clim.Climatology.from_filename(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
-
-    sst_stdev_1 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
-    sst_stdev_2 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
-    sst_stdev_3 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
-
     with open(config.get('Files', 'parameter_file'), 'r') as f:
         parameters = json.load(f)
 
+    # climatologies are opened from the climatology store where they have been compiled into it
+    store = clim.ClimatologyStore(parameters.get('climatology_store'),
+                                  parameters.get('dense_climatologies', False))
+
+    # read in climatology files
+    sst_pentad_stdev = store.open(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
+
+    sst_stdev_1 = store.open(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
+    sst_stdev_2 = store.open(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
+    sst_stdev_3 = store.open(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
+
     # read in high resolution SST climatology file
     for entry in parameters['hires_climatologies']:
         if entry[0] == 'SST' and entry[1] == 'mean':
@@ -120,7 +123,7 @@ def main(argv):
             print("hires sst climatology file {}".format(sst_climatology_file))
 
     climlib = ex.ClimatologyLibrary()
-    climlib.add_field('SST', 'mean', clim.Climatology.from_filename(sst_climatology_file, 'temperature'))
+    climlib.add_field('SST', 'mean', store.open(sst_climatology_file, 'temperature'))
 
     for year, month in qc.year_month_gen(year1, month1, year2, month2):
 
@@ -131,6 +134,7 @@ def main(argv):
 
         reps = ex.Deck()
         count = 0
+        early_rejects = 0
 
         for readyear, readmonth in qc.year_month_gen(last_year, last_month, next_year, next_month):
 
@@ -140,45 +144,32 @@ def main(argv):
                                                     parameters['icoads_filenames'],
                                                     readyear, readmonth)
             try:
-                icoads_file = gzip.open(filename, "r")
+                icoads_reader = ICOADSReader.MonthReader(filename, readyear, readmonth, ids_to_exclude,
+                                                         ex.IMMA_ATTACHMENTS, parameters.get('icoads_cache_dir'),
+                                                         parameters.get('icoads_decompression', 'zlib'))
             except IOError:
                 print("no ICOADS file for {} {}".format(readyear, readmonth))
                 continue
 
-            rec = IMMA()
-
-            for line in icoads_file:
-
-                try:
-                    rec.readstr(line)
-                    readob = True
-                except:
-                    readob = False
-                    print("Rejected ob {}".format(line))
-
-                if (not (rec.data['ID'] in ids_to_exclude) and
-                        readob and
-                        rec.data['YR'] == readyear and
-                        rec.data['MO'] == readmonth):
-
-                    rep = ex.MarineReportQC(rec)
-                    del rec
+            for rec in icoads_reader:
 
-                    rep_clim = climlib.get_field('SST', 'mean').get_value(rep.lat(), rep.lon(), rep.getvar('MO'),
-                                                                          rep.getvar('DY'))
-                    rep.add_climate_variable('SST', rep_clim)
+                rep = ex.MarineReportQC(rec)
+                del rec
 
-                    rep.perform_base_sst_qc(parameters)
-                    rep.set_qc('POS', 'month_match', qc.month_match(year, month, rep.getvar('YR'), rep.getvar('MO')))
+                rep_clim = climlib.get_field('SST', 'mean').get_value(rep.lat(), rep.lon(), rep.getvar('MO'),
+                                                                      rep.getvar('DY'))
+                rep.add_climate_variable('SST', rep_clim)
 
-                    reps.append(rep)
-                    count += 1
+                rep.perform_base_sst_qc(parameters)
+                rep.set_qc('POS', 'month_match', qc.month_match(year, month, rep.getvar('YR'), rep.getvar('MO')))
 
-                rec = IMMA()
+                reps.append(rep)
+                count += 1
 
-            icoads_file.close()
+            early_rejects += icoads_reader.early_rejects
 
         print("Read {} ICOADS records".format(count))
+        print("Rejected {} ICOADS records before decoding".format(early_rejects))
 
         # filter the obs into passes and fails of basic positional QC
         filt = ex.QC_filter()
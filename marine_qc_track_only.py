@@ -29,9 +29,8 @@ a full QC run). The location of the data and the locations of the climatology fi
 configuration files.
 """
 
-import gzip
 import qc
-from IMMA1 import IMMA
+import ICOADSReader
 import Extended_IMMA as ex
 import Climatology as clim
 import BackgroundField as bf
@@ -104,21 +103,32 @@ def main(argv):
 
     ids_to_exclude = bf.process_bad_id_file(bad_id_file)
 
-    # read in climatology files
-    sst_pentad_stdev = clim.Climatology.from_filename(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
-
-    sst_stdev_1 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
-    sst_stdev_2 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
-    sst_stdev_3 = clim.Climatology.from_filename(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
-
     with open(config.get('Files', 'parameter_file'), 'r') as f:
         parameters = json.load(f)
 
+    # climatologies are opened from the climatology store where they have been compiled into it
+    store = clim.ClimatologyStore(parameters.get('climatology_store'),
+                                  parameters.get('dense_climatologies', False))
+
+    # read in climatology files
+    sst_pentad_stdev = store.open(config.get('Climatologies', 'Old_SST_stdev_climatology'), 'sst')
+
+    sst_stdev_1 = store.open(config.get('Climatologies', 'SST_buddy_one_box_to_buddy_avg'), 'sst')
+    sst_stdev_2 = store.open(config.get('Climatologies', 'SST_buddy_one_ob_to_box_avg'), 'sst')
+    sst_stdev_3 = store.open(config.get('Climatologies', 'SST_buddy_avg_sampling'), 'sst')
+
     print("Reading climatologies from parameter file")
     climlib = ex.ClimatologyLibrary()
     for entry in parameters['climatologies']:
         print("{} {}".format(entry[0], entry[1]))
-        climlib.add_field(entry[0], entry[1], clim.Climatology.from_filename(entry[2], entry[3]))
+        climlib.add_field(entry[0], entry[1], store.open(entry[2], entry[3]))
+
+    # daily OSTIA fields are kept in memory because the reports are not in day order
+    background_cache = None
+    if tracking:
+        background_cache = clim.BackgroundFieldCache(parameters['background_dir'],
+                                                     parameters['background_filenames'],
+                                                     parameters.get('background_cache_bytes', 2 * 1024 ** 3))
 
     for year, month in qc.year_month_gen(year1, month1, year2, month2):
 
@@ -129,6 +139,7 @@ def main(argv):
 
         reps = ex.Deck()
         count = 0
+        early_rejects = 0
         lastday = -99
 
         for readyear, readmonth in qc.year_month_gen(last_year, last_month, next_year, next_month):
@@ -137,83 +148,61 @@ def main(argv):
 
             ostia_bg_var = None
             if tracking:
-                ostia_bg_var = clim.Climatology.from_filename(
+                ostia_bg_var = store.open(
                     config.get('Climatologies', qc.season(readmonth) + '_ostia_background'), 'bg_var')
 
             filename = bf.icoads_filename_from_stub(parameters['icoads_dir'],
                                                     parameters['icoads_filenames'],
                                                     readyear, readmonth)
             try:
-                icoads_file = gzip.open(filename, "r")
+                icoads_reader = ICOADSReader.MonthReader(filename, readyear, readmonth, ids_to_exclude,
+                                                         ex.IMMA_ATTACHMENTS, parameters.get('icoads_cache_dir'),
+                                                         parameters.get('icoads_decompression', 'zlib'))
             except IOError:
                 print("no ICOADS file for {} {}".format(readyear, readmonth))
                 continue
 
-            rec = IMMA()
-
-            for line in icoads_file:
-
-                try:
-                    rec.readstr(line)
-                    readob = True
-                except:
-                    readob = False
-                    print("Rejected ob {}".format(line))
-
-                if (not (rec.data['ID'] in ids_to_exclude) and
-                        readob and
-                        rec.data['YR'] == readyear and
-                        rec.data['MO'] == readmonth):
-
-                    rep = ex.MarineReportQC(rec)
-                    del rec
-
-                    # if day has changed then read in OSTIA field if available and append SST and sea-ice fraction
-                    # to the observation metadata
-                    if tracking and readyear >= 1985 and rep.getvar('DY') is not None:
-                        if rep.getvar('DY') != lastday:
-                            lastday = rep.getvar('DY')
-                            y_year, y_month, y_day = qc.yesterday(readyear, readmonth, lastday)
-
-                            #                            ofname = ostia_filename(ostia_dir, y_year, y_month, y_day)
-                            ofname = bf.get_background_filename(parameters['background_dir'],
-                                                                parameters['background_filenames'],
-                                                                y_year, y_month, y_day)
+            for rec in icoads_reader:
 
-                            climlib.add_field('OSTIA', 'background',
-                                              clim.Climatology.from_filename(ofname, 'analysed_sst'))
-                            climlib.add_field('OSTIA', 'ice',
-                                              clim.Climatology.from_filename(ofname, 'sea_ice_fraction'))
+                rep = ex.MarineReportQC(rec)
+                del rec
 
-                        rep_clim = climlib.get_field('OSTIA', 'background').get_value_ostia(rep.lat(), rep.lon())
-                        if rep_clim is not None:
-                            rep_clim -= 273.15
+                # if day has changed then read in OSTIA field if available and append SST and sea-ice fraction
+                # to the observation metadata
+                if tracking and readyear >= 1985 and rep.getvar('DY') is not None:
+                    if rep.getvar('DY') != lastday:
+                        lastday = rep.getvar('DY')
+                        y_year, y_month, y_day = qc.yesterday(readyear, readmonth, lastday)
+                        background, ice = background_cache.get(y_year, y_month, y_day)
 
-                        rep.setext('OSTIA', rep_clim)
-                        rep.setext('ICE', climlib.get_field('OSTIA', 'ice').get_value_ostia(rep.lat(), rep.lon()))
-                        rep.setext('BGVAR', ostia_bg_var.get_value_mds_style(rep.lat(), rep.lon(), rep.getvar('MO'),
-                                                                             rep.getvar('DY')))
+                    rep_clim = background.get_value_ostia(rep.lat(), rep.lon())
+                    if rep_clim is not None:
+                        rep_clim -= 273.15
 
-                    for varname in ['SST']:
-                        rep_clim = climlib.get_field(varname, 'mean').get_value_mds_style(rep.lat(), rep.lon(),
-                                                                                          rep.getvar('MO'),
-                                                                                          rep.getvar('DY'))
-                        rep.add_climate_variable(varname, rep_clim)
+                    rep.setext('OSTIA', rep_clim)
+                    rep.setext('ICE', ice.get_value_ostia(rep.lat(), rep.lon()))
+                    rep.setext('BGVAR', ostia_bg_var.get_value_mds_style(rep.lat(), rep.lon(), rep.getvar('MO'),
+                                                                         rep.getvar('DY')))
 
-                    rep.perform_base_qc(parameters)
-                    rep.set_qc('POS', 'month_match', qc.month_match(year, month,
-                                                                    rep.getvar('YR'),
-                                                                    rep.getvar('MO')
-                                                                    ))
+                for varname in ['SST']:
+                    rep_clim = climlib.get_field(varname, 'mean').get_value_mds_style(rep.lat(), rep.lon(),
+                                                                                      rep.getvar('MO'),
+                                                                                      rep.getvar('DY'))
+                    rep.add_climate_variable(varname, rep_clim)
 
-                    reps.append(rep)
-                    count += 1
+                rep.perform_base_qc(parameters)
+                rep.set_qc('POS', 'month_match', qc.month_match(year, month,
+                                                                rep.getvar('YR'),
+                                                                rep.getvar('MO')
+                                                                ))
 
-                rec = IMMA()
+                reps.append(rep)
+                count += 1
 
-            icoads_file.close()
+            early_rejects += icoads_reader.early_rejects
 
         print("Read {} ICOADS records".format(count))
+        print("Rejected {} ICOADS records before decoding".format(early_rejects))
 
         # filter the obs into passes and fails of basic positional QC
         filt = ex.QC_filter()
@@ -8,7 +8,33 @@ import numpy as np
 import math
 from datetime import datetime
 from datetime import timedelta
-import calendar
+
+# lengths of the months in a normal year and in a leap year
+MONTH_LENGTHS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+LEAP_MONTH_LENGTHS = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# number of days in a normal year before the first of each month
+MONTH_STARTS = tuple(sum(MONTH_LENGTHS[0:i]) for i in range(12))
+
+# day number in the year (1-365) of each month and day, indexed [month][day], with 0 for days which do
+# not exist. February 29th falls on the same day number as March 1st.
+DAY_IN_YEAR = tuple(tuple(MONTH_STARTS[month - 1] + day if 0 < month and 0 < day <= LEAP_MONTH_LENGTHS[month - 1]
+                          else 0 for day in range(32)) for month in range(13))
+
+# pentad (1-73) of each month and day, indexed [month][day], with 0 for days which do not exist
+PENTADS = tuple(tuple((dindex - 1) / 5 + 1 if dindex > 0 else 0 for dindex in days) for days in DAY_IN_YEAR)
+
+# month and day of the first day of each pentad
+PENTAD_START_MONTHS = (1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2,
+                       3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4,
+                       5, 5, 5, 5, 5, 5, 5, 6, 6, 6, 6, 6, 6,
+                       7, 7, 7, 7, 7, 7, 8, 8, 8, 8, 8, 8,
+                       9, 9, 9, 9, 9, 9, 10, 10, 10, 10, 10, 10,
+                       11, 11, 11, 11, 11, 11, 12, 12, 12, 12, 12, 12)
+PENTAD_START_DAYS = (1, 6, 11, 16, 21, 26, 31, 5, 10, 15, 20, 25, 2, 7, 12, 17, 22,
+                     27, 1, 6, 11, 16, 21, 26, 1, 6, 11, 16, 21, 26, 31, 5, 10, 15, 20,
+                     25, 30, 5, 10, 15, 20, 25, 30, 4, 9, 14, 19, 24, 29, 3, 8, 13, 18,
+                     23, 28, 3, 8, 13, 18, 23, 28, 2, 7, 12, 17, 22, 27, 2, 7, 12, 17, 22, 27)
 
 
 def month_match(y1, m1, y2, m2):
@@ -72,17 +98,21 @@ def pentad_to_month_day(p):
     :rtype: integer   
     """
     assert 0 < p < 74, 'p outside allowed range 1-73 ' + str(p)
-    m = [1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2,
-         3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4,
-         5, 5, 5, 5, 5, 5, 5, 6, 6, 6, 6, 6, 6,
-         7, 7, 7, 7, 7, 7, 8, 8, 8, 8, 8, 8,
-         9, 9, 9, 9, 9, 9, 10, 10, 10, 10, 10, 10,
-         11, 11, 11, 11, 11, 11, 12, 12, 12, 12, 12, 12]
-    d = [1, 6, 11, 16, 21, 26, 31, 5, 10, 15, 20, 25, 2, 7, 12, 17, 22,
-         27, 1, 6, 11, 16, 21, 26, 1, 6, 11, 16, 21, 26, 31, 5, 10, 15, 20,
-         25, 30, 5, 10, 15, 20, 25, 30, 4, 9, 14, 19, 24, 29, 3, 8, 13, 18,
-         23, 28, 3, 8, 13, 18, 23, 28, 2, 7, 12, 17, 22, 27, 2, 7, 12, 17, 22, 27]
-    return m[p - 1], d[p - 1]
+    return PENTAD_START_MONTHS[p - 1], PENTAD_START_DAYS[p - 1]
+
+
+def pentad_to_month_day_array(pentads):
+    """
+    Array version of :func:`pentad_to_month_day`. The pentads are not checked.
+    
+    :param pentads: pentad numbers from 1 to 73
+    :type pentads: numpy array of integers
+    
+    :return: months and days of the first days of the pentads
+    :rtype: numpy arrays of integers
+    """
+    pentads = np.asarray(pentads)
+    return np.asarray(PENTAD_START_MONTHS)[pentads - 1], np.asarray(PENTAD_START_DAYS)[pentads - 1]
 
 
 def which_pentad(inmonth, inday):
@@ -97,19 +127,29 @@ def which_pentad(inmonth, inday):
     :return: pentad (5-day period) containing input day, from 1 (1 Jan-5 Jan) to 73 (27-31 Dec)
     :rtype: integer
 
-    The calculation is rather simple. It just loops through the year and adds up days till it reaches 
-    the day we are interested in. February 29th is treated as though it were March 1st in a regular year.
+    The pentad is looked up in the PENTADS table. February 29th is treated as though it were March 1st 
+    in a regular year.
     """
     assert 12 >= inmonth >= 1
     assert 31 >= inday >= 1
+    assert inday <= LEAP_MONTH_LENGTHS[inmonth - 1]
 
-    pentad = (day_in_year(inmonth, inday) - 1) / 5
-    pentad = pentad + 1
+    return PENTADS[inmonth][inday]
 
-    assert pentad >= 1
-    assert pentad <= 73
 
-    return pentad
+def which_pentad_array(months, days):
+    """
+    Array version of :func:`which_pentad`. The months and days are not checked.
+    
+    :param months: months containing the days for which we want to calculate the pentads
+    :param days: days for which we want to calculate the pentads
+    :type months: numpy array of integers
+    :type days: numpy array of integers
+
+    :return: pentads (5-day periods) containing input days, from 1 (1 Jan-5 Jan) to 73 (27-31 Dec)
+    :rtype: numpy array of integers
+    """
+    return (day_in_year_array(months, days) - 1) // 5 + 1
 
 
 def day_in_year(month, day):
@@ -127,19 +167,26 @@ def day_in_year(month, day):
     """
     assert month >= 1
     assert month <= 12, str(month)
-    month_lengths = get_month_lengths(2004)
     assert day >= 1
-    assert day <= month_lengths[month - 1]
-    month_lengths = get_month_lengths(2003)
+    assert day <= LEAP_MONTH_LENGTHS[month - 1]
 
-    if month == 1:
-        dindex = day
-    elif month == 2 and day == 29:
-        dindex = day_in_year(3, 1)
-    else:
-        dindex = np.sum(month_lengths[0:month - 1]) + day
+    return DAY_IN_YEAR[month][day]
+
+
+def day_in_year_array(months, days):
+    """
+    Array version of :func:`day_in_year`. The months and days are not checked.
+    
+    :param months: months to be processed
+    :param days: days in the months
+    :type months: numpy array of integers
+    :type days: numpy array of integers
 
-    return dindex
+    :return: day numbers in year 1-365
+    :rtype: numpy array of integers
+    """
+    # February 29th falls on the same day number as March 1st
+    return np.asarray(MONTH_STARTS)[np.asarray(months) - 1] + np.asarray(days)
 
 
 def get_hires_sst(lat, lon, month, day, hires_field):
@@ -397,6 +444,73 @@ def get_four_surrounding_points(lat, lon, max90=1):
     return x1, x2, y1, y2
 
 
+def bilinear_interp_array(x1, x2, y1, y2, x, y, q11, q12, q21, q22):
+    """
+    Array version of :func:`bilinear_interp`. Nothing is checked, and the result is NaN 
+    where any of the corner values is NaN.
+    """
+    val = q11 * (x2 - x) * (y2 - y)
+    val += q21 * (x - x1) * (y2 - y)
+    val += q12 * (x2 - x) * (y - y1)
+    val += q22 * (x - x1) * (y - y1)
+    val /= (x2 - x1) * (y2 - y1)
+    return val
+
+
+def missing_mean_array(a, b):
+    """
+    Array version of :func:`missing_mean` for pairs of values, with NaN for missing values
+    """
+    return np.where(np.isnan(a), b, np.where(np.isnan(b), a, (a + b) / 2.0))
+
+
+def fill_missing_vals_array(q11, q12, q21, q22):
+    """
+    Array version of :func:`fill_missing_vals`, with NaN for missing values
+    """
+    outq11 = np.where(np.isnan(q11), missing_mean_array(q12, q21), q11)
+    outq11 = np.where(np.isnan(outq11), q22, outq11)
+
+    outq22 = np.where(np.isnan(q22), missing_mean_array(q12, q21), q22)
+    outq22 = np.where(np.isnan(outq22), q11, outq22)
+
+    outq12 = np.where(np.isnan(q12), missing_mean_array(q11, q22), q12)
+    outq12 = np.where(np.isnan(outq12), q21, outq12)
+
+    outq21 = np.where(np.isnan(q21), missing_mean_array(q11, q22), q21)
+    outq21 = np.where(np.isnan(outq21), q12, outq21)
+
+    return outq11, outq12, outq21, outq22
+
+
+def get_four_surrounding_points_array(lats, lons, max90=1):
+    """
+    Array version of :func:`get_four_surrounding_points`. The latitudes and longitudes are not 
+    checked, so the results are only meaningful where latitude is between -90 and 90 and longitude 
+    is between -180 and 180.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    x2 = lon_to_xindex_array(lons + 0.5) - 180. + 0.5
+    x2 = np.where(x2 < lons, x2 + 360., x2)
+
+    x1 = lon_to_xindex_array(lons - 0.5) - 180. + 0.5
+    x1 = np.where(x1 > lons, x1 - 360., x1)
+
+    if max90 == 0:
+        north_edge = 90.5
+        south_edge = -90.5
+    else:
+        north_edge = 89.5
+        south_edge = -89.5
+
+    y2 = np.where(lats + 0.5 <= 90, 90. - lat_to_yindex_array(lats + 0.5) - 0.5, north_edge)
+    y1 = np.where(lats - 0.5 >= -90, 90. - lat_to_yindex_array(lats - 0.5) - 0.5, south_edge)
+
+    return x1, x2, y1, y2
+
+
 def get_clim_interpolated(rep, clim):
     lat = rep.lat()
     lon = rep.lon()
@@ -525,6 +639,225 @@ def get_sst_single_field(lat, lon, sst):
     return result
 
 
+# The rules used by blacklist. Each rule blacklists the reports which meet all of its conditions, which can be
+#   decks: list of decks
+#   platforms: list of platform types
+#   ids: list of IDs
+#   years: first and last year
+#   months: first and last month, each given as [year, month]
+#   box: [west, south, east, north] edges of a region in degrees, with longitudes between -180 and 180
+# and an optional description. The rules can be replaced by a list of rules under blacklist in the parameter file.
+BLACKLIST_RULES = [
+    {'description': 'all obs at 0,0', 'box': [0, 0, 0, 0]},
+    {'description': 'C-MAN data', 'platforms': [13]},
+    {'ids': ['SUPERIGORINA']},
+    {'description': 'SEAS data', 'decks': [874]},
+    {'description': 'drifters with bad positions', 'months': [[2005, 11], [2006, 1]],
+     'ids': ['53521    ', '53522    ', '53566    ', '53567    ',
+             '53568    ', '53571    ', '53578    ', '53580    ',
+             '53582    ', '53591    ', '53592    ', '53593    ',
+             '53594    ', '53595    ', '53596    ', '53599    ',
+             '53600    ', '53601    ', '53602    ', '53603    ',
+             '53604    ', '53605    ', '53606    ', '53607    ',
+             '53608    ', '53609    ', '53901    ', '53902    ']},
+    # regions in which Deck 732 observations are known to be dubious, numbered as in Rayner et al. 2006
+    {'description': 'Deck 732 region 1', 'decks': [732], 'years': [1958, 1971], 'box': [-175, 40, -170, 55]},
+    {'description': 'Deck 732 region 2', 'decks': [732], 'years': [1958, 1971], 'box': [-165, 40, -160, 60]},
+    {'description': 'Deck 732 region 3', 'decks': [732], 'years': [1958, 1964], 'box': [-145, 40, -140, 50]},
+    {'description': 'Deck 732 region 3', 'decks': [732], 'years': [1968, 1971], 'box': [-145, 40, -140, 50]},
+    {'description': 'Deck 732 region 4', 'decks': [732], 'years': [1958, 1959], 'box': [-140, 30, -135, 40]},
+    {'description': 'Deck 732 region 4', 'decks': [732], 'years': [1969, 1974], 'box': [-140, 30, -135, 40]},
+    {'description': 'Deck 732 region 5', 'decks': [732], 'years': [1958, 1964], 'box': [-140, 50, -130, 55]},
+    {'description': 'Deck 732 region 5', 'decks': [732], 'years': [1967, 1971], 'box': [-140, 50, -130, 55]},
+    {'description': 'Deck 732 region 6', 'decks': [732], 'years': [1958, 1961], 'box': [-70, 35, -60, 40]},
+    {'description': 'Deck 732 region 6', 'decks': [732], 'years': [1963, 1971], 'box': [-70, 35, -60, 40]},
+    {'description': 'Deck 732 region 7', 'decks': [732], 'years': [1969, 1969], 'box': [-50, 45, -40, 50]},
+    {'description': 'Deck 732 region 7', 'decks': [732], 'years': [1971, 1974], 'box': [-50, 45, -40, 50]},
+    {'description': 'Deck 732 region 8', 'decks': [732], 'years': [1969, 1974], 'box': [5, 70, 10, 80]},
+    {'description': 'Deck 732 region 9', 'decks': [732], 'years': [1960, 1960], 'box': [0, -10, 10, 0]},
+    {'description': 'Deck 732 region 9', 'decks': [732], 'years': [1966, 1972], 'box': [0, -10, 10, 0]},
+    {'description': 'Deck 732 region 10', 'decks': [732], 'years': [1965, 1965], 'box': [-30, -25, -25, -20]},
+    {'description': 'Deck 732 region 10', 'decks': [732], 'years': [1969, 1969], 'box': [-30, -25, -25, -20]},
+    {'description': 'Deck 732 region 10', 'decks': [732], 'years': [1972, 1974], 'box': [-30, -25, -25, -20]},
+    {'description': 'Deck 732 region 11', 'decks': [732], 'years': [1972, 1974], 'box': [-60, -50, -55, -45]},
+    {'description': 'Deck 732 region 12', 'decks': [732], 'years': [1962, 1965], 'box': [75, -20, 80, -15]},
+    {'description': 'Deck 732 region 13', 'decks': [732], 'years': [1962, 1965], 'box': [50, -30, 60, -20]},
+    {'description': 'Deck 732 region 13', 'decks': [732], 'years': [1969, 1969], 'box': [50, -30, 60, -20]},
+    {'description': 'Deck 732 region 13', 'decks': [732], 'years': [1971, 1973], 'box': [50, -30, 60, -20]},
+    {'description': 'Deck 732 region 14', 'decks': [732], 'years': [1958, 1971], 'box': [30, -40, 40, -30]},
+    {'description': 'Deck 732 region 15', 'decks': [732], 'years': [1958, 1963], 'box': [20, 60, 25, 65]},
+    {'description': 'Deck 732 region 15', 'decks': [732], 'years': [1965, 1970], 'box': [20, 60, 25, 65]},
+    {'description': 'Deck 732 region 16', 'decks': [732], 'years': [1961, 1966], 'box': [0, -40, 10, -30]},
+    {'description': 'Deck 732 region 16', 'decks': [732], 'years': [1969, 1969], 'box': [0, -40, 10, -30]},
+    {'description': 'Deck 732 region 16', 'decks': [732], 'years': [1971, 1974], 'box': [0, -40, 10, -30]},
+    {'description': 'Deck 732 region 17', 'decks': [732], 'years': [1972, 1974], 'box': [-135, 30, -130, 40]}]
+
+
+class Blacklist:
+    """
+    Blacklist compiled from a list of rules, like those in BLACKLIST_RULES. A report is blacklisted if it 
+    meets all the conditions of any one of the rules. The rules are turned into arrays once, when the 
+    Blacklist is made, so that whole columns of reports can be checked together by :meth:`mask`.
+    """
+
+    conditions = ['description', 'decks', 'platforms', 'ids', 'years', 'months', 'box']
+
+    # the rules most recently compiled by from_parameters and the Blacklist made from them
+    _compiled = (None, None)
+
+    def __init__(self, rules):
+        """
+        :param rules: the blacklisting rules
+        :type rules: list of dictionaries
+        """
+        for rule in rules:
+            for condition in rule:
+                assert condition in self.conditions, 'unknown blacklist condition ' + str(condition)
+        self.rules = rules
+
+        nrules = len(rules)
+        self.has_years = np.array([rule.get('years') is not None for rule in rules], dtype=bool)
+        self.years = np.array([rule.get('years', [np.nan, np.nan]) for rule in rules], dtype=float).reshape(nrules, 2)
+        self.has_months = np.array([rule.get('months') is not None for rule in rules], dtype=bool)
+        self.months = np.array([[year * 12 + month - 1 for year, month in rule.get('months', [[np.nan, 1]] * 2)]
+                                for rule in rules], dtype=float).reshape(nrules, 2)
+        self.has_box = np.array([rule.get('box') is not None for rule in rules], dtype=bool)
+        self.boxes = np.array([rule.get('box', [np.nan] * 4) for rule in rules], dtype=float).reshape(nrules, 4)
+
+        self.decks = [rule.get('decks') for rule in rules]
+        self.platforms = [rule.get('platforms') for rule in rules]
+        self.ids = [None if rule.get('ids') is None else set(rule['ids']) for rule in rules]
+
+        # the other conditions of the rules, by deck and year, for checking one report at a time. Rules which
+        # apply to all decks, or all years, are under None.
+        self.scalar_rules = {}
+        for i, rule in enumerate(rules):
+            months = None
+            if rule.get('months') is not None:
+                months = [year * 12 + month - 1 for year, month in rule['months']]
+            conditions = (months, rule.get('box'), self.platforms[i], self.ids[i])
+            years = [None]
+            if rule.get('years') is not None:
+                years = range(int(rule['years'][0]), int(rule['years'][1]) + 1)
+            for deck in rule.get('decks') or [None]:
+                for year in years:
+                    self.scalar_rules.setdefault(deck, {}).setdefault(year, []).append(conditions)
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """
+        Get the Blacklist for the rules under blacklist in the parameter file, or DEFAULT_BLACKLIST if there 
+        are none. The rules are only compiled the first time they are seen, so this can be called for every 
+        report in a run.
+
+        :param parameters: the QC parameters
+        :type parameters: dictionary
+        :return: the compiled blacklist
+        :rtype: :class:`.Blacklist`
+        """
+        rules = parameters.get('blacklist')
+        if rules is None:
+            return DEFAULT_BLACKLIST
+        if cls._compiled[0] is not rules:
+            cls._compiled = (rules, cls(rules))
+        return cls._compiled[1]
+
+    @staticmethod
+    def _set_table(values, rule_values):
+        """
+        Test which values are in the set of values of each rule, which is None where the rule does not have 
+        the condition. Each unique value is only looked up once.
+
+        :return: array with one row for each rule and one column for each value
+        """
+        unique_values, inverse = np.unique(values, return_inverse=True)
+        table = np.ones((len(rule_values), len(unique_values)), dtype=bool)
+        for i, accepted in enumerate(rule_values):
+            if accepted is not None:
+                table[i] = np.in1d(unique_values, accepted)
+        return table[:, inverse]
+
+    def mask(self, ids, decks, years, months, lats, lons, platforms):
+        """
+        Check a set of reports against the blacklist
+
+        :param ids: IDs of the reports
+        :param decks: Decks of the reports
+        :param years: years of the reports
+        :param months: months of the reports
+        :param lats: latitudes of the reports
+        :param lons: longitudes of the reports
+        :param platforms: platform types of the reports
+        :type ids: list of strings
+        :type decks: numpy array
+        :type years: numpy array
+        :type months: numpy array
+        :type lats: numpy array
+        :type lons: numpy array
+        :type platforms: numpy array
+        :return: array which is True for the reports that are blacklisted
+        :rtype: numpy array of booleans
+        """
+        decks, years, months, lats, lons, platforms = [np.asarray(x, dtype=float) for x in
+                                                       [decks, years, months, lats, lons, platforms]]
+        if len(self.rules) == 0 or len(decks) == 0:
+            return np.zeros(len(decks), dtype=bool)
+
+        with np.errstate(invalid='ignore'):
+            lons = np.where(lons > 180.0, lons - 360.0, lons)
+            month_keys = years * 12 + months - 1
+
+            matches = ((self.years[:, 0:1] <= years) & (years <= self.years[:, 1:2])) | ~self.has_years[:, np.newaxis]
+            matches &= (((self.months[:, 0:1] <= month_keys) & (month_keys <= self.months[:, 1:2])) |
+                        ~self.has_months[:, np.newaxis])
+            matches &= (((self.boxes[:, 0:1] <= lons) & (lons <= self.boxes[:, 2:3]) &
+                         (self.boxes[:, 1:2] <= lats) & (lats <= self.boxes[:, 3:4])) |
+                        ~self.has_box[:, np.newaxis])
+
+        matches &= self._set_table(decks, self.decks)
+        matches &= self._set_table(platforms, self.platforms)
+
+        if any(rule_ids is not None for rule_ids in self.ids):
+            unique_ids = {}
+            inverse = np.array([unique_ids.setdefault(inid, len(unique_ids)) for inid in ids], dtype=int)
+            unique_ids = sorted(unique_ids, key=unique_ids.get)
+            table = np.ones((len(self.rules), len(unique_ids)), dtype=bool)
+            for i, rule_ids in enumerate(self.ids):
+                if rule_ids is not None:
+                    table[i] = [inid in rule_ids for inid in unique_ids]
+            matches &= table[:, inverse]
+
+        return np.any(matches, axis=0)
+
+    def check(self, inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
+        """
+        Check one report against the blacklist, taking the same arguments as :func:`blacklist`
+
+        :return: 1 if the report is blacklisted, 0 otherwise
+        :rtype: integer
+        """
+        if inlon is not None and inlon > 180.0:
+            inlon -= 360
+
+        for deck in set([indeck, None]):
+            rules_by_year = self.scalar_rules.get(deck, {})
+            for year in set([inyear, None]):
+                for months, box, platforms, ids in rules_by_year.get(year, []):
+                    if months is not None and (inyear is None or inmonth is None or
+                                               not months[0] <= inyear * 12 + inmonth - 1 <= months[1]):
+                        continue
+                    if box is not None and (inlat is None or inlon is None or
+                                            not (box[0] <= inlon <= box[2] and box[1] <= inlat <= box[3])):
+                        continue
+                    if platforms is not None and inpt not in platforms:
+                        continue
+                    if ids is not None and inid not in ids:
+                        continue
+                    return 1
+
+        return 0
+
+
 def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
     """
     Blacklisting of observations from Deck 732 and others as needed
@@ -548,85 +881,173 @@ def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
     regions in which Deck 732 observations are known to be dubious - see Rayner et al. 2006 and Kennedy et al. 
     2011b. Observations at 0 degrees latitude 0 degrees longitude are blacklisted as this is a common error. 
     C-MAN stations with platform type 13 are blacklisted. SEAS data from deck 874 are unreliable (SSTs were 
-    often in excess of 50degC) and so the deck was removed.
+    often in excess of 50degC) and so the deck was removed. The rules are those in BLACKLIST_RULES, see 
+    :class:`.Blacklist`.
     """
+    return DEFAULT_BLACKLIST.check(inid, indeck, inyear, inmonth, inlat, inlon, inpt)
 
-    if inlon > 180.0:
-        inlon -= 360
 
-    result = 0
+DEFAULT_BLACKLIST = Blacklist(BLACKLIST_RULES)
 
-    if inlat == 0.0 and inlon == 0.0:
-        result = 1  # blacklist all obs at 0,0
+# platform types whose humidity measurements can be used and decks whose winds cannot be used
+HUMIDITY_PLATFORM_TYPES = [0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 15]
+WIND_BLACKLIST_DECKS = [708, 780]
 
-    if inpt is not None and inpt == 13:
-        result = 1  # C-MAN data
+# regions, [west, south, east, north], in which Deck 193 MATs from 1880-1892 are excluded from MAT processing:
+# the North Atlantic, Suez and the Indian Ocean, see Kent et al. HadNMAT2
+MAT_BLACKLIST_REGIONS = [[-80.0, 40.0, 0.0, 55.0],
+                         [-10.0, 35.0, 30.0, 45.0],
+                         [15.0, -10.0, 45.0, 40.0],
+                         [15.0, -10.0, 95.0, 15.0],
+                         [95.0, -10.0, 105.0, 5.0]]
 
-    if inid == 'SUPERIGORINA':
-        result = 1
 
-    # these are the definitions of the regions which are blacklisted for Deck 732
-    region = {1: [-175, 40, -170, 55],
-              2: [-165, 40, -160, 60],
-              3: [-145, 40, -140, 50],
-              4: [-140, 30, -135, 40],
-              5: [-140, 50, -130, 55],
-              6: [-70, 35, -60, 40],
-              7: [-50, 45, -40, 50],
-              8: [5, 70, 10, 80],
-              9: [0, -10, 10, 0],
-              10: [-30, -25, -25, -20],
-              11: [-60, -50, -55, -45],
-              12: [75, -20, 80, -15],
-              13: [50, -30, 60, -20],
-              14: [30, -40, 40, -30],
-              15: [20, 60, 25, 65],
-              16: [0, -40, 10, -30],
-              17: [-135, 30, -130, 40]}
-
-    # this dictionary contains the regions that are to be excluded for this year
-    year_to_regions = {1958: [1, 2, 3, 4, 5, 6, 14, 15],
-                       1959: [1, 2, 3, 4, 5, 6, 14, 15],
-                       1960: [1, 2, 3, 5, 6, 9, 14, 15],
-                       1961: [1, 2, 3, 5, 6, 14, 15, 16],
-                       1962: [1, 2, 3, 5, 12, 13, 14, 15, 16],
-                       1963: [1, 2, 3, 5, 6, 12, 13, 14, 15, 16],
-                       1964: [1, 2, 3, 5, 6, 12, 13, 14, 16],
-                       1965: [1, 2, 6, 10, 12, 13, 14, 15, 16],
-                       1966: [1, 2, 6, 9, 14, 15, 16],
-                       1967: [1, 2, 5, 6, 9, 14, 15],
-                       1968: [1, 2, 3, 5, 6, 9, 14, 15],
-                       1969: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 13, 14, 15, 16],
-                       1970: [1, 2, 3, 4, 5, 6, 8, 9, 14, 15],
-                       1971: [1, 2, 3, 4, 5, 6, 7, 8, 9, 13, 14, 16],
-                       1972: [4, 7, 8, 9, 10, 11, 13, 16, 17],
-                       1973: [4, 7, 8, 10, 11, 13, 16, 17],
-                       1974: [4, 7, 8, 10, 11, 16, 17]}
-
-    if indeck == 732:
-        if inyear in year_to_regions:
-            regions_to_check = year_to_regions[inyear]
-            for regid in regions_to_check:
-                thisreg = region[regid]
-                if thisreg[0] <= inlon <= thisreg[2] and thisreg[1] <= inlat <= thisreg[3]:
-                    result = 1
-
-    if indeck == 874:
-        result = 1  # SEAS data gets blacklisted
-
-    if ((inyear == 2005 and inmonth == 11) or
-            (inyear == 2005 and inmonth == 12) or
-            (inyear == 2006 and inmonth == 1)):
-        if inid in ["53521    ", "53522    ", "53566    ", "53567    ",
-                    "53568    ", "53571    ", "53578    ", "53580    ",
-                    "53582    ", "53591    ", "53592    ", "53593    ",
-                    "53594    ", "53595    ", "53596    ", "53599    ",
-                    "53600    ", "53601    ", "53602    ", "53603    ",
-                    "53604    ", "53605    ", "53606    ", "53607    ",
-                    "53608    ", "53609    ", "53901    ", "53902    "]:
-            result = 1
+def humidity_blacklist(inpt):
+    """
+    Flag platform types whose humidity measurements are ineligible for humidity QC
+    
+    :param inpt: platform type
+    :type inpt: integer
+    :return: 1 if the platform type is ineligible, 0 otherwise
+    :rtype: integer
+    """
+    if inpt in HUMIDITY_PLATFORM_TYPES:
+        return 0
+    return 1
 
-    return result
+
+def humidity_blacklist_array(inpts):
+    """
+    Array version of :func:`humidity_blacklist`, missing platform types (NaN) are ineligible
+    
+    :param inpts: platform types
+    :type inpts: numpy array
+    :return: array which is 1 where the platform type is ineligible, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    return 1 - np.in1d(inpts, HUMIDITY_PLATFORM_TYPES).astype(int)
+
+
+def wind_blacklist(indeck):
+    """
+    Flag decks which are ineligible for wind QC. Based on Shawn Smith's list
+    
+    :param indeck: deck
+    :type indeck: integer
+    :return: 1 if the deck is ineligible, 0 otherwise
+    :rtype: integer
+    """
+    if indeck in WIND_BLACKLIST_DECKS:
+        return 1
+    return 0
+
+
+def wind_blacklist_array(indecks):
+    """
+    Array version of :func:`wind_blacklist`
+    
+    :param indecks: decks
+    :type indecks: numpy array
+    :return: array which is 1 where the deck is ineligible, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    return np.in1d(indecks, WIND_BLACKLIST_DECKS).astype(int)
+
+
+def mat_blacklist(inpt, indeck, inyear, inlat, inlon):
+    """
+    Flag decks, areas and other sources which are ineligible for MAT QC. These exclusions are based on 
+    Kent et al. HadNMAT2 paper and include Deck 780 which is oceanographic data and the North Atlantic, 
+    Suez, Indian Ocean area in the 19th Century.
+    
+    :param inpt: platform type
+    :param indeck: deck
+    :param inyear: year
+    :param inlat: latitude
+    :param inlon: longitude
+    :type inpt: integer
+    :type indeck: integer
+    :type inyear: integer
+    :type inlat: float
+    :type inlon: float
+    :return: 1 if the report is ineligible, 0 otherwise
+    :rtype: integer
+    """
+    if inpt == 5 and indeck == 780:
+        return 1
+
+    if indeck == 193 and inyear is not None and 1880 <= inyear <= 1892 and inlat is not None and inlon is not None:
+        if inlon > 180.0:
+            inlon -= 360.0
+        for west, south, east, north in MAT_BLACKLIST_REGIONS:
+            if west <= inlon <= east and south <= inlat <= north:
+                return 1
+
+    return 0
+
+
+def mat_blacklist_array(inpts, indecks, inyears, inlats, inlons):
+    """
+    Array version of :func:`mat_blacklist`. Missing values (NaN) do not match any of the conditions.
+    
+    :param inpts: platform types
+    :param indecks: decks
+    :param inyears: years
+    :param inlats: latitudes
+    :param inlons: longitudes
+    :type inpts: numpy array
+    :type indecks: numpy array
+    :type inyears: numpy array
+    :type inlats: numpy array
+    :type inlons: numpy array
+    :return: array which is 1 where the report is ineligible, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    inpts, indecks, inyears, inlats, inlons = [np.asarray(x, dtype=float) for x in
+                                               [inpts, indecks, inyears, inlats, inlons]]
+    with np.errstate(invalid='ignore'):
+        inlons = np.where(inlons > 180.0, inlons - 360.0, inlons)
+        regions = np.zeros(inlats.shape, dtype=bool)
+        for west, south, east, north in MAT_BLACKLIST_REGIONS:
+            regions |= (west <= inlons) & (inlons <= east) & (south <= inlats) & (inlats <= north)
+        result = (((inpts == 5) & (indecks == 780)) |
+                  ((indecks == 193) & (1880 <= inyears) & (inyears <= 1892) & regions))
+    return result.astype(int)
+
+
+def deck_701_missing_hour(indeck, inyear, inhour):
+    """
+    Deck 701 has a whole bunch of otherwise good obs from before 1860 with missing hours. These 
+    can be set to 0000UTC.
+    
+    :param indeck: deck
+    :param inyear: year
+    :param inhour: hour
+    :type indeck: integer
+    :type inyear: integer
+    :type inhour: float
+    :return: True if the hour is missing and should be set to 0
+    :rtype: logical
+    """
+    return indeck == 701 and inyear is not None and inyear < 1860 and inhour is None
+
+
+def deck_701_missing_hour_array(indecks, inyears, inhours):
+    """
+    Array version of :func:`deck_701_missing_hour`, with NaN for missing values
+    
+    :param indecks: decks
+    :param inyears: years
+    :param inhours: hours
+    :type indecks: numpy array
+    :type inyears: numpy array
+    :type inhours: numpy array
+    :return: array which is True where the hour is missing and should be set to 0
+    :rtype: numpy array of booleans
+    """
+    indecks, inyears, inhours = [np.asarray(x, dtype=float) for x in [indecks, inyears, inhours]]
+    with np.errstate(invalid='ignore'):
+        return (indecks == 701) & (inyears < 1860) & np.isnan(inhours)
 
 
 def climatology_plus_stdev_with_lowbar(inval, inclimav, instdev, limit, lowbar):
@@ -655,6 +1076,24 @@ def climatology_plus_stdev_with_lowbar(inval, inclimav, instdev, limit, lowbar):
     return result
 
 
+def climatology_plus_stdev_with_lowbar_array(invals, inclimavs, instdevs, limit, lowbar):
+    """
+    Array version of :func:`climatology_plus_stdev_with_lowbar`, with NaN for missing values
+    :param invals: values to be compared to climatology
+    :param inclimavs: the climatological averages to which they will be compared
+    :param instdevs: the standard deviations which will be used to test the anomalies
+    :param limit: maximum standardised anomaly
+    :param lowbar: the anomaly must be greater than lowbar to fail regardless of standard deviation
+    :return: array which is 1 where the difference is outside the specified range or an input is missing, 0 otherwise.
+    """
+    assert limit > 0, "multiplier must be positive and non-zero"
+    anomalies = np.abs(np.asarray(invals, dtype=float) - inclimavs)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = (anomalies / instdevs > limit) & (anomalies > lowbar)
+    missing = np.isnan(invals) | np.isnan(inclimavs) | np.isnan(instdevs)
+    return (result | missing).astype(int)
+
+
 def climatology_plus_stdev_check(inval, inclimav, instdev,
                                  stdev_limits, limit):
     """
@@ -694,6 +1133,31 @@ def climatology_plus_stdev_check(inval, inclimav, instdev,
     return result
 
 
+def climatology_plus_stdev_check_array(invals, inclimavs, instdevs, stdev_limits, limit):
+    """
+    Array version of :func:`climatology_plus_stdev_check`, with NaN for missing values
+    :param invals: values to be compared to climatology
+    :param inclimavs: the climatological averages to which the values will be compared
+    :param instdevs: the climatological standard deviations which will be used to standardise the anomalies
+    :param stdev_limits: upper and lower limits for standard deviation used in check
+    :param limit: the maximum allowed normalised anomaly
+    :type invals: numpy array
+    :type inclimavs: numpy array
+    :type instdevs: numpy array
+    :type stdev_limits: two-membered list
+    :type limit: float
+    :return: array which is 1 where the difference is outside the specified limit or an input is missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    assert stdev_limits[1] > stdev_limits[0], "limits are awry"
+    assert limit > 0, "multiplier must be positive and non-zero"
+    stdevs = np.clip(instdevs, stdev_limits[0], stdev_limits[1])
+    with np.errstate(invalid='ignore'):
+        result = np.abs(np.asarray(invals, dtype=float) - inclimavs) / stdevs > limit
+    missing = np.isnan(invals) | np.isnan(inclimavs) | np.isnan(instdevs)
+    return (result | missing).astype(int)
+
+
 def climatology_check(inval, inclimav, limit=8.0):
     """
     Simple function to compare a value with a climatological average with some arbitrary limit on the difference
@@ -723,6 +1187,25 @@ def climatology_check(inval, inclimav, limit=8.0):
     return result
 
 
+def climatology_check_array(invals, inclimavs, limit=8.0):
+    """
+    Array version of :func:`climatology_check`, with NaN for missing values
+    :param invals: values to be compared to climatology
+    :param inclimavs: the climatological averages to which the values will be compared
+    :param limit: the maximum allowed difference between the two
+    :type invals: numpy array
+    :type inclimavs: numpy array
+    :type limit: float
+    :return: array which is 1 where the difference is outside the specified limit or an input is missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    if limit is None:
+        return np.ones(np.shape(invals), dtype=int)
+    with np.errstate(invalid='ignore'):
+        result = np.abs(np.asarray(invals, dtype=float) - inclimavs) > limit
+    return (result | np.isnan(invals) | np.isnan(inclimavs)).astype(int)
+
+
 def value_check(inval):
     """
     Check if a value is equal to None
@@ -738,6 +1221,17 @@ def value_check(inval):
     return result
 
 
+def value_check_array(invals):
+    """
+    Array version of :func:`value_check`
+    :param invals: the input values, NaN where missing
+    :type invals: numpy array
+    :return: array which is 1 where the input value is missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    return np.isnan(invals).astype(int)
+
+
 def no_normal_check(inclimav):
     """
     Check if a climatological average is equal to None
@@ -753,6 +1247,17 @@ def no_normal_check(inclimav):
     return result
 
 
+def no_normal_check_array(inclimavs):
+    """
+    Array version of :func:`no_normal_check`
+    :param inclimavs: the input values, NaN where missing
+    :type inclimavs: numpy array
+    :return: array which is 1 where the climatological average is missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    return np.isnan(inclimavs).astype(int)
+
+
 def hard_limit(val, limits):
     """
     Check if a value is outside specified limits
@@ -774,6 +1279,22 @@ def hard_limit(val, limits):
     return result
 
 
+def hard_limit_array(vals, limits):
+    """
+    Array version of :func:`hard_limit`
+    :param vals: values to be tested, NaN where missing
+    :param limits: two membered list of lower and upper limit
+    :type vals: numpy array
+    :type limits: list of floats
+    :return: array which is 1 where the input is outside the limits or missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    assert limits[1] > limits[0], 'limits are not well specified'
+    vals = np.asarray(vals, dtype=float)
+    with np.errstate(invalid='ignore'):
+        return 1 - ((limits[0] <= vals) & (vals <= limits[1])).astype(int)
+
+
 def supersat_check(invaltd, invalt):
     """
     Check if a valid dewpoint temperature is 
@@ -797,6 +1318,22 @@ def supersat_check(invaltd, invalt):
     return result
 
 
+def supersat_check_array(invaltds, invalts):
+    """
+    Array version of :func:`supersat_check`, with NaN for missing values
+    :param invaltds: the input values for dewpoint temperature
+    :param invalts: the input values for air temperature
+    :type invaltds: numpy array
+    :type invalts: numpy array
+    :return: array which is 1 where either input is missing or the dewpoint temperature is greater than the air 
+        temperature, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    with np.errstate(invalid='ignore'):
+        result = np.asarray(invaltds, dtype=float) > invalts
+    return (result | np.isnan(invaltds) | np.isnan(invalts)).astype(int)
+
+
 def sst_freeze_check(insst, sst_uncertainty=0.0, freezing_point=-1.80, n_sigma=2.0):
     """
     Compare an input SST to see if it is above freezing.
@@ -833,6 +1370,26 @@ def sst_freeze_check(insst, sst_uncertainty=0.0, freezing_point=-1.80, n_sigma=2
     return result
 
 
+def sst_freeze_check_array(inssts, sst_uncertainty=0.0, freezing_point=-1.80, n_sigma=2.0):
+    """
+    Array version of :func:`sst_freeze_check`
+    :param inssts: the input SSTs, NaN where missing
+    :param sst_uncertainty: the uncertainty in the SST value, defaults to zero
+    :param freezing_point: the freezing point of the water, defaults to -1.8C
+    :param n_sigma: number of sigma to use in the check
+    :type inssts: numpy array
+    :type sst_uncertainty: float
+    :type freezing_point: float
+    :type n_sigma: float
+    :return: array which is 1 where the input SST is below freezing point by more than n_sigma times the 
+        uncertainty, 0 otherwise (including where the SST is missing)
+    :rtype: numpy array of integers
+    """
+    assert sst_uncertainty is not None and freezing_point is not None
+    with np.errstate(invalid='ignore'):
+        return (np.asarray(inssts, dtype=float) < (freezing_point - n_sigma * sst_uncertainty)).astype(int)
+
+
 def position_check(inlat, inlon):
     """
     Simple check to make sure that the latitude and longitude are within the bounds specified 
@@ -857,6 +1414,24 @@ def position_check(inlat, inlon):
     return result
 
 
+def position_check_array(inlats, inlons):
+    """
+    Array version of :func:`position_check`. Unlike position_check, missing (NaN) latitudes and 
+    longitudes are allowed, and fail the check.
+    :param inlats: latitudes
+    :param inlons: longitudes
+    :type inlats: numpy array
+    :type inlons: numpy array
+    :return: array which is 1 where either latitude or longitude is invalid, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    inlats = np.asarray(inlats, dtype=float)
+    inlons = np.asarray(inlons, dtype=float)
+    with np.errstate(invalid='ignore'):
+        valid = (inlats >= -90) & (inlats <= 90) & (inlons >= -180) & (inlons <= 360)
+    return 1 - valid.astype(int)
+
+
 def time_check(inhour):
     """
     Check that the time is valid
@@ -878,6 +1453,20 @@ def time_check(inhour):
     return result
 
 
+def time_check_array(inhours):
+    """
+    Array version of :func:`time_check`
+    :param inhours: hours of the times to be checked, NaN where missing
+    :type inhours: numpy array
+    :return: array which is 1 where the hour is invalid or missing, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    inhours = np.asarray(inhours, dtype=float)
+    with np.errstate(invalid='ignore'):
+        valid = (inhours >= 0) & (inhours < 24)
+    return 1 - valid.astype(int)
+
+
 def date_check(inyear, inmonth, inday):
     """
     Check that the date is valid
@@ -914,6 +1503,28 @@ def date_check(inyear, inmonth, inday):
     return result
 
 
+def date_check_array(inyears, inmonths, indays):
+    """
+    Array version of :func:`date_check`. Unlike date_check, missing (NaN) years and months are 
+    allowed, and fail the check, as do months outside 1-12.
+    :param inyears: years of the dates to be checked
+    :param inmonths: months of the dates to be checked
+    :param indays: days of the dates to be checked
+    :type inyears: numpy array
+    :type inmonths: numpy array
+    :type indays: numpy array
+    :return: array which is 1 where any one of the inputs (or the combined inputs) is invalid, 0 otherwise
+    :rtype: numpy array of integers
+    """
+    inyears = np.asarray(inyears, dtype=float)
+    inmonths = np.asarray(inmonths, dtype=float)
+    indays = np.asarray(indays, dtype=float)
+    with np.errstate(invalid='ignore'):
+        valid = (inyears <= 2024) & (inyears >= 1850) & (inmonths >= 1) & (inmonths <= 12) & (indays >= 1)
+        valid[valid] = indays[valid] <= month_lengths_array(inyears[valid].astype(int), inmonths[valid].astype(int))
+    return 1 - valid.astype(int)
+
+
 def wind_consistency(windspeed, winddirection, variablelimit):
     """
     Test to compare windspeed to winddirection.
@@ -940,6 +1551,27 @@ def wind_consistency(windspeed, winddirection, variablelimit):
     return result
 
 
+def wind_consistency_array(windspeeds, winddirections, variablelimit):
+    """
+    Array version of :func:`wind_consistency`
+    :param windspeeds: wind speeds, NaN where missing
+    :param winddirections: wind directions in range 1-362, NaN where missing
+    :param variablelimit: maximum wind speed consistent with variable wind direction
+    :type windspeeds: numpy array
+    :type winddirections: numpy array
+    :type variablelimit: float
+    :return: array of pass (0) or fail (1)
+    :rtype: numpy array of integers
+    """
+    windspeeds = np.asarray(windspeeds, dtype=float)
+    winddirections = np.asarray(winddirections, dtype=float)
+    with np.errstate(invalid='ignore'):
+        # direction 361 is Calm i.e. windspeed should be zero, direction 362 is Variable i.e. low windspeed
+        result = (((winddirections == 361) & (windspeeds != 0)) |
+                  ((winddirections == 362) & (windspeeds > variablelimit)))
+    return result.astype(int)
+
+
 def p_data_given_good(x, q, r_hi, r_lo, mu, sigma):
     """
     Calculate the probability of an observed value x given a normal distribution with mean mu 
@@ -1215,6 +1847,157 @@ def sunangle(year, day, hour, minute, sec, zone, dasvtm, lat, lon):
     return azimuth, elevation, rta, hra, sid, declination
 
 
+def sunangle_array(year, day, hour, minute, sec, zone, dasvtm, lat, lon):
+    """
+    Array version of :func:`sunangle`, which calculates the local azimuth and elevation of the sun 
+    for arrays of locations and times. The same calculation is done in the same order, so the results 
+    are the same as from sunangle. The inputs are not checked.
+    
+    :param year: year numbers
+    :param day: day numbers of year starting with 1 for Jan 1st and running up to 365/6
+    :param hour: hours
+    :param minute: minutes
+    :param sec: seconds
+    :param zone: the local international time zone, counted westward from Greenwich
+    :param dasvtm: 1 if daylight saving time is in effect, otherwise 0
+    :param lat: latitudes in degrees, north is positive
+    :param lon: longitudes in degrees, east is positive
+    :type year: numpy array
+    :type day: numpy array
+    :type hour: numpy array
+    :type minute: numpy array
+    :type sec: numpy array
+    :type zone: integer
+    :type dasvtm: integer
+    :type lat: numpy array
+    :type lon: numpy array
+
+    :return:  Azimuth angle of the sun (degrees east of north), Elevation of sun (degrees), 
+              Right ascension of sun (degrees), Hour angle of sun (degrees), Hour angle of 
+              local siderial time (degrees), Declination of sun (degrees)
+    :rtype: numpy arrays
+    """
+    year, day, hour, minute, sec, lat, lon = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in
+                                                                  [year, day, hour, minute, sec, lat, lon]])
+
+    degrad = np.pi / 180.
+
+    time_in_hours = hour + (minute + sec / 60.) / 60. + zone - dasvtm
+    right_ascension, declination, siderial_time = sun_ephemeris_array(year, day, time_in_hours)
+    rta = right_ascension / degrad
+
+    elevation, hour_angle, local_siderial_time = sun_elevation_array(right_ascension, declination, siderial_time,
+                                                                     time_in_hours, lat, lon)
+    sid = local_siderial_time / degrad
+    sid = np.where(sid < 0, 360.0 + sid, sid)
+
+    hra = hour_angle / degrad
+    hra = np.where(hra < 0.0, 360.0 + hra, hra)
+
+    phi = lat * degrad
+
+    # sun north or south of zenith, left as 0 or 180 if the sun is very near the zenith
+    azimuth = np.where((phi - declination) > 0, 0.0, 180.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        val_to_asin = np.clip(np.cos(declination) * np.sin(hour_angle) / np.cos(elevation), -1.0, 1.0)
+        not_zenith_azimuth = np.arcsin(val_to_asin) / degrad
+        wrap = np.sin(elevation) < np.sin(declination) / np.sin(phi)
+    wrapped = 180.0 - np.where(not_zenith_azimuth < 0, not_zenith_azimuth + 360.0, not_zenith_azimuth)
+    not_zenith_azimuth = 180.0 + np.where(wrap, wrapped, not_zenith_azimuth)
+    azimuth = np.where(np.abs(elevation - 2 * np.pi / 4.0) > 0.000001, not_zenith_azimuth, azimuth)
+
+    elevation = elevation / degrad
+    declination = declination / degrad
+
+    return azimuth, elevation, rta, hra, sid, declination
+
+
+def sun_ephemeris_array(year, day, time_in_hours):
+    """
+    Calculate the right ascension and declination of the sun and the siderial time at Greenwich. 
+    These are the parts of the calculation in :func:`sunangle_array` which depend only on the time 
+    and not on the location, done in the same way.
+    
+    :param year: year numbers
+    :param day: day numbers of year starting with 1 for Jan 1st and running up to 365/6
+    :param time_in_hours: time of day in hours
+    :type year: numpy array
+    :type day: numpy array
+    :type time_in_hours: numpy array
+    :return: right ascension of the sun, declination of the sun, siderial time, all in radians
+    :rtype: numpy arrays
+    """
+    delyear = (year - 1980)
+    leap = np.floor(delyear / 4.)
+    time = delyear * 365 + leap + day - 1.0 + time_in_hours / 24.0
+    # leapyear correction
+    time = np.where(delyear == leap * 4.0, time - 1.0, time)
+    time = np.where((delyear < 0) & (delyear != leap * 4.0), time - 1.0, time)
+
+    theta = (360.0 * time / 365.25) * (np.pi / 180.)
+    mean_anomaly = -0.031271 - 4.5396e-7 * time + theta
+    long_of_sun = (4.900968 + 3.6747e-7 * time +
+                   (0.033434 - 2.3e-9 * time) * np.sin(mean_anomaly) +
+                   0.000349 * np.sin(2.0 * mean_anomaly) +
+                   theta)
+    angle_of_elliptic = 0.409140 - 6.2149e-9 * time
+    sin_long_of_sun = np.sin(long_of_sun)
+    a1 = sin_long_of_sun * np.cos(angle_of_elliptic)
+    a2 = np.cos(long_of_sun)
+    right_ascension = np.arctan2(a1, a2)
+    right_ascension = np.where(right_ascension < 0.0, right_ascension + 2 * np.pi, right_ascension)
+
+    declination = np.arcsin(sin_long_of_sun * np.sin(angle_of_elliptic))
+
+    siderial_time = 1.759335 + 2 * np.pi * (time / 365.25 - delyear) + 3.694e-7 * time
+    siderial_time = np.where(siderial_time >= 2 * np.pi, siderial_time - 2 * np.pi, siderial_time)
+
+    return right_ascension, declination, siderial_time
+
+
+def sun_elevation_array(right_ascension, declination, siderial_time, time_in_hours, lat, lon):
+    """
+    Calculate the elevation of the sun at a location from the right ascension and declination 
+    of the sun and the siderial time, as calculated by :func:`sun_ephemeris_array`. This is the 
+    part of the calculation in :func:`sunangle_array` which depends on the location.
+    
+    :param right_ascension: right ascension of the sun in radians
+    :param declination: declination of the sun in radians
+    :param siderial_time: siderial time in radians
+    :param time_in_hours: time of day in hours
+    :param lat: latitudes in degrees, north is positive
+    :param lon: longitudes in degrees, east is positive
+    :type right_ascension: numpy array
+    :type declination: numpy array
+    :type siderial_time: numpy array
+    :type time_in_hours: numpy array
+    :type lat: numpy array
+    :type lon: numpy array
+    :return: elevation of the sun, hour angle of the sun, local siderial time, all in radians
+    :rtype: numpy arrays
+    """
+    degrad = np.pi / 180.
+
+    local_siderial_time = siderial_time + (time_in_hours * 15.0 + lon) * degrad
+    local_siderial_time = np.where(local_siderial_time >= 2 * np.pi, local_siderial_time - 2 * np.pi,
+                                   local_siderial_time)
+
+    hour_angle = local_siderial_time - right_ascension
+    hour_angle = np.where(hour_angle < 0, hour_angle + 2 * np.pi, hour_angle)
+
+    phi = lat * degrad
+
+    sin_elevation = (np.sin(phi) * np.sin(declination) +
+                     np.cos(phi) * np.cos(declination) *
+                     np.cos(hour_angle))
+    sin_elevation = np.clip(sin_elevation, -1.0, 1.0)
+
+    elevation = np.arcsin(sin_elevation)
+
+    return elevation, hour_angle, local_siderial_time
+
+
 def dayinyear(year, month, day):
     """
     Calculate the day in year, running from 1 for Jan 1st to 365 (or 366) for Dec 31st
@@ -1243,6 +2026,25 @@ def dayinyear(year, month, day):
     return result
 
 
+def dayinyear_array(years, months, days):
+    """
+    Array version of :func:`dayinyear`. The dates are not checked.
+    
+    :param years: Years
+    :param months: Months
+    :param days: Days
+    :type years: numpy array of integers
+    :type months: numpy array of integers
+    :type days: numpy array of integers
+    :return: days in year, between 1 and 366
+    :rtype: numpy array of integers
+    """
+    years = np.asarray(years)
+    months = np.asarray(months)
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    return np.asarray(MONTH_STARTS)[months - 1] + np.asarray(days) + (leap & (months > 2))
+
+
 def day_test(year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0):
     """
     Given year month day hour lat and long calculate if the sun was above the horizon an hour ago.
@@ -1311,6 +2113,308 @@ def day_test(year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0)
     return result
 
 
+def day_test_array(years, months, days, hours, lats, lons, time_since_sun_above_horizon=1.0):
+    """
+    Array version of :func:`day_test`, which calculates whether the sun was above the horizon an hour 
+    ago for arrays of times and locations. Going back an hour can take the time into the previous day, 
+    or year, which is handled as in day_test, and the results are the same as from day_test. The inputs 
+    are not checked, but the result is 0 where any of them is missing (NaN).
+    
+    :param years: Years
+    :param months: Months
+    :param days: Days
+    :param hours: Hours
+    :param lats: Latitudes in degrees
+    :param lons: Longitudes in degrees
+    :param time_since_sun_above_horizon: time since sun was above horizon for test
+    :type years: numpy array
+    :type months: numpy array
+    :type days: numpy array
+    :type hours: numpy array
+    :type lats: numpy array
+    :type lons: numpy array
+    :type time_since_sun_above_horizon: float
+    :return: array which is 1 where the sun was above the horizon an hour ago, 0 otherwise.
+    :rtype: numpy array of integers
+    """
+    years, months, days, hours, lats, lons = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in [years, months, days, hours, lats, lons]])
+    result = np.zeros(years.shape, dtype=int)
+
+    valid = ~(np.isnan(years) | np.isnan(months) | np.isnan(days) |
+              np.isnan(hours) | np.isnan(lats) | np.isnan(lons))
+    if not np.any(valid):
+        return result
+    years = years[valid].astype(int)
+    hours = hours[valid]
+
+    year2 = years
+    day2 = dayinyear_array(years, months[valid].astype(int), days[valid].astype(int))
+    hour2 = np.floor(hours)
+    minute2 = (hours - np.floor(hours)) * 60.0
+
+    # go back one hour and test if the sun was above the horizon
+    hour2 = hour2 - time_since_sun_above_horizon
+    previous_day = hour2 < 0
+    hour2 = np.where(previous_day, hour2 + 24.0, hour2)
+    day2 = np.where(previous_day, day2 - 1, day2)
+    previous_year = day2 <= 0
+    year2 = np.where(previous_year, year2 - 1, year2)
+    day2 = np.where(previous_year, dayinyear_array(year2, 12, 31), day2)
+
+    lat2 = np.where(lats[valid] == 0, 0.0001, lats[valid])
+    lon2 = np.where(lons[valid] == 0, 0.0001, lons[valid])
+
+    azimuth, elevation, rta, hra, sid, dec = sunangle_array(year2, day2, hour2, minute2, 0, 0, 0, lat2, lon2)
+
+    result[valid] = elevation > 0
+    return result
+
+
+class SolarEphemeris:
+    """
+    Cache of the parts of the calculation of the position of the sun in :func:`sunangle` which depend 
+    only on the time: the right ascension and declination of the sun and the siderial time. The first 
+    time a month is asked for, these are calculated at steps of 1/steps_per_hour hours through the 
+    month and the day before it. Finding the elevation of the sun for a report then only needs the 
+    hour angle and elevation to be calculated from its position, using the values at the nearest step. 
+    The default step of 0.01 hours is the precision of the hours in ICOADS, so for ICOADS reports the 
+    times fall on the steps and the elevations are the same as from sunangle to within rounding.
+    """
+
+    def __init__(self, steps_per_hour=100):
+        """
+        :param steps_per_hour: number of time steps in each hour
+        :type steps_per_hour: integer
+        """
+        self.steps_per_hour = steps_per_hour
+        self.tables = {}
+
+    def table(self, year, month):
+        """
+        Get the right ascension and declination of the sun and the siderial time for a month, calculating 
+        them the first time the month is asked for. Each is an array with one row for each day, starting 
+        with the day before the first of the month, and one column for each time step in the day.
+        
+        :param year: year
+        :param month: month
+        :type year: integer
+        :type month: integer
+        :return: right ascension, declination and siderial time in radians
+        :rtype: tuple of numpy arrays
+        """
+        if (year, month) not in self.tables:
+            year0, month0, day0 = yesterday(year, month, 1)
+            ndays = get_month_lengths(year)[month - 1]
+            years = np.array([year0] + [year] * ndays, dtype=float)
+            days = np.array([dayinyear(year0, month0, day0)] +
+                            [dayinyear(year, month, day) for day in range(1, ndays + 1)], dtype=float)
+
+            steps = np.arange(24 * self.steps_per_hour) / float(self.steps_per_hour)
+            time_in_hours = np.floor(steps) + ((steps - np.floor(steps)) * 60.0) / 60.
+
+            self.tables[(year, month)] = sun_ephemeris_array(years[:, np.newaxis], days[:, np.newaxis],
+                                                             time_in_hours[np.newaxis, :])
+        return self.tables[(year, month)]
+
+    def _elevation(self, years, months, day_index, time_in_hours, lats, lons):
+        """
+        Calculate the elevation of the sun in radians. day_index is the row of the table for the month, 
+        0 being the day before the first of the month.
+        """
+        elevation = np.zeros(years.shape)
+        keys = years * 12 + months - 1
+        for key in np.unique(keys):
+            selection = keys == key
+            right_ascension, declination, siderial_time = self.table(int(key // 12), int(key % 12) + 1)
+            step = np.minimum(np.round(time_in_hours[selection] * self.steps_per_hour).astype(int),
+                              right_ascension.shape[1] - 1)
+            row = day_index[selection]
+            elevation[selection] = sun_elevation_array(right_ascension[row, step], declination[row, step],
+                                                       siderial_time[row, step], time_in_hours[selection],
+                                                       lats[selection], lons[selection])[0]
+        return elevation
+
+    def _elevation_scalar(self, year, month, day_index, time_in_hours, lat, lon):
+        """
+        Calculate the elevation of the sun in radians for one time and location, in the same way as 
+        :func:`sun_elevation_array`. day_index is the row of the table for the month, 0 being the day 
+        before the first of the month.
+        """
+        right_ascension, declination, siderial_time = self.table(int(year), int(month))
+        row = int(day_index)
+        step = min(int(round(time_in_hours * self.steps_per_hour)), right_ascension.shape[1] - 1)
+        right_ascension = float(right_ascension[row, step])
+        declination = float(declination[row, step])
+
+        local_siderial_time = float(siderial_time[row, step]) + (time_in_hours * 15.0 + lon) * (math.pi / 180.)
+        if local_siderial_time >= 2 * math.pi:
+            local_siderial_time = local_siderial_time - 2 * math.pi
+
+        hour_angle = local_siderial_time - right_ascension
+        if hour_angle < 0:
+            hour_angle = hour_angle + 2 * math.pi
+
+        phi = lat * (math.pi / 180.)
+
+        sin_elevation = (math.sin(phi) * math.sin(declination) +
+                         math.cos(phi) * math.cos(declination) *
+                         math.cos(hour_angle))
+
+        return math.asin(min(max(sin_elevation, -1.0), 1.0))
+
+    def elevation_array(self, years, months, days, hours, lats, lons):
+        """
+        Calculate the elevation of the sun for arrays of times and locations, as from :func:`sunangle_array`. 
+        The inputs are not checked.
+        
+        :param years: Years
+        :param months: Months
+        :param days: Days
+        :param hours: Hours
+        :param lats: Latitudes in degrees
+        :param lons: Longitudes in degrees
+        :type years: numpy array of integers
+        :type months: numpy array of integers
+        :type days: numpy array of integers
+        :type hours: numpy array
+        :type lats: numpy array
+        :type lons: numpy array
+        :return: elevation of the sun in degrees
+        :rtype: numpy array
+        """
+        years, months, days, hours, lats, lons = np.broadcast_arrays(*[np.asarray(x) for x in
+                                                                       [years, months, days, hours, lats, lons]])
+        elevation = self._elevation(years.astype(int), months.astype(int), days.astype(int),
+                                    hours.astype(float), lats.astype(float), lons.astype(float))
+        return elevation / (np.pi / 180.)
+
+    def elevation(self, year, month, day, hour, lat, lon):
+        """
+        Calculate the elevation of the sun for one time and location, as from :func:`sunangle`
+        
+        :param year: Year
+        :param month: Month
+        :param day: Day
+        :param hour: Hour
+        :param lat: Latitude in degrees
+        :param lon: Longitude in degrees
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :type hour: float
+        :type lat: float
+        :type lon: float
+        :return: elevation of the sun in degrees
+        :rtype: float
+        """
+        assert 1 <= month <= 12
+        assert 1 <= day <= get_month_lengths(year)[month - 1]
+        assert 0 <= hour < 24
+        return self._elevation_scalar(year, month, day, hour, lat, lon) / (math.pi / 180.)
+
+    def day_test_array(self, years, months, days, hours, lats, lons, time_since_sun_above_horizon=1.0):
+        """
+        Version of :func:`day_test_array` which uses the cached values. Going back an hour can take the 
+        time into the previous day, or year, which is handled as in day_test. The inputs are not checked, 
+        but the result is 0 where any of them is missing (NaN).
+        
+        :param years: Years
+        :param months: Months
+        :param days: Days
+        :param hours: Hours
+        :param lats: Latitudes in degrees
+        :param lons: Longitudes in degrees
+        :param time_since_sun_above_horizon: time since sun was above horizon for test
+        :type years: numpy array
+        :type months: numpy array
+        :type days: numpy array
+        :type hours: numpy array
+        :type lats: numpy array
+        :type lons: numpy array
+        :type time_since_sun_above_horizon: float
+        :return: array which is 1 where the sun was above the horizon an hour ago, 0 otherwise.
+        :rtype: numpy array of integers
+        """
+        years, months, days, hours, lats, lons = np.broadcast_arrays(
+            *[np.asarray(x, dtype=float) for x in [years, months, days, hours, lats, lons]])
+        result = np.zeros(years.shape, dtype=int)
+
+        valid = ~(np.isnan(years) | np.isnan(months) | np.isnan(days) |
+                  np.isnan(hours) | np.isnan(lats) | np.isnan(lons))
+        if not np.any(valid):
+            return result
+        hours = hours[valid]
+
+        day_index = days[valid].astype(int)
+        hour2 = np.floor(hours)
+        minute2 = (hours - np.floor(hours)) * 60.0
+
+        # go back one hour and test if the sun was above the horizon, row 0 of the table being the day before
+        hour2 = hour2 - time_since_sun_above_horizon
+        previous_day = hour2 < 0
+        hour2 = np.where(previous_day, hour2 + 24.0, hour2)
+        day_index = np.where(previous_day, day_index - 1, day_index)
+
+        lat2 = np.where(lats[valid] == 0, 0.0001, lats[valid])
+        lon2 = np.where(lons[valid] == 0, 0.0001, lons[valid])
+
+        elevation = self._elevation(years[valid].astype(int), months[valid].astype(int), day_index,
+                                    hour2 + minute2 / 60., lat2, lon2)
+
+        result[valid] = elevation > 0
+        return result
+
+    def day_test(self, year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0):
+        """
+        Version of :func:`day_test` which uses the cached values.
+        
+        :param year: Year
+        :param month: Month
+        :param day: Day
+        :param hour: Hour
+        :param lat: Latitude in degrees
+        :param lon: Longitude in degrees
+        :param time_since_sun_above_horizon: time since sun was above horizon for test
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :type hour: float
+        :type lat: float
+        :type lon: float
+        :type time_since_sun_above_horizon: float
+        :return: 1 if the sun was above the horizon an hour ago, 0 otherwise.
+        :rtype: integer
+        """
+        assert 1 <= month <= 12
+        assert 1 <= day <= 31
+        assert 0 <= hour <= 24
+        assert 90 >= lat >= -90
+
+        if year is None or month is None or day is None or hour is None:
+            return 0
+
+        hour2 = math.floor(hour)
+        minute2 = (hour - math.floor(hour)) * 60.0
+
+        # go back one hour and test if the sun was above the horizon, row 0 of the table being the day before
+        hour2 = hour2 - time_since_sun_above_horizon
+        if hour2 < 0:
+            hour2 = hour2 + 24.0
+            day = day - 1
+
+        lat2 = lat
+        lon2 = lon
+        if lat == 0:
+            lat2 = 0.0001
+        if lon == 0:
+            lon2 = 0.0001
+
+        if self._elevation_scalar(year, month, day, hour2 + minute2 / 60., lat2, lon2) > 0:
+            return 1
+        return 0
+
+
 def jul_day(year, month, day):
     """
     Routine to calculate julian day. This is the weird Astronomical thing which counts from 1 Jan 4713 BC.
@@ -1335,6 +2439,26 @@ def jul_day(year, month, day):
     return day + ((153 * m + 2) // 5) + 365 * y + y // 4 - y // 100 + y // 400 - 32045
 
 
+def jul_days(years, months, days):
+    """
+    Array version of :func:`jul_day`, which calculates the julian day of each element of 
+    arrays of years, months and days. Unlike :func:`jul_day`, the months and days are not checked.
+    
+    :param years: Years
+    :param months: Months
+    :param days: Days
+    :type years: numpy array of integers
+    :type months: numpy array of integers
+    :type days: numpy array of integers
+    :return: julian days
+    :rtype: numpy array of integers
+    """
+    a = (14 - months) // 12
+    y = years + 4800 - a
+    m = months + 12 * a - 3
+    return days + ((153 * m + 2) // 5) + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+
+
 def time_difference(year1, month1, day1, hour1, year2, month2, day2, hour2):
     """
     Calculate time difference in hours between any two times
@@ -1482,6 +2606,25 @@ def mds_lat_to_yindex(lat, res=1.0):
     pass
 
 
+def mds_lat_to_yindex_array(lats, res=1.0):
+    """
+    Array version of :func:`mds_lat_to_yindex`
+    
+    :param lats: Latitudes of the points
+    :param res: resolution of grid in degrees
+    :type lats: numpy array
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    lats = np.asarray(lats, dtype=float)
+    lat_local = np.where(lats == -90, lats + 0.001, np.where(lats == 90, lats - 0.001, lats))
+    yindex = np.where(lats > 0.0,
+                      90 / res - 1 - np.trunc(lat_local / res),
+                      90 / res - np.trunc(lat_local / res))
+    return np.trunc(yindex).astype(int)
+
+
 def lat_to_yindex(lat, res=1):
     """
     For a given latitude return the y index in a 1x1x5-day global grid
@@ -1513,6 +2656,22 @@ def lat_to_yindex(lat, res=1):
         return yindex
 
 
+def lat_to_yindex_array(lats, res=1):
+    """
+    Array version of :func:`lat_to_yindex`
+    
+    :param lats: Latitudes of the points
+    :param res: resolution of the grid
+    :type lats: numpy array
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    lats = np.asarray(lats, dtype=float)
+    yindex = np.trunc((90 - lats) / res).astype(int)
+    return np.clip(yindex, 0, int(180 / res - 1))
+
+
 def xindex_to_lon(xindex, res=1):
     assert xindex >= 0
     assert xindex < 360 / res
@@ -1547,6 +2706,25 @@ def mds_lon_to_xindex(lon, res=1.0):
         return int(int(long_local / res) + 180 / res - 1)
 
 
+def mds_lon_to_xindex_array(lons, res=1.0):
+    """
+    Array version of :func:`mds_lon_to_xindex`
+    
+    :param lons: Longitudes of the points
+    :param res: resolution of the field
+    :type lons: numpy array
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    lons = np.asarray(lons, dtype=float)
+    long_local = np.where(lons == -180, lons + 0.001, np.where(lons == 180, lons - 0.001, lons))
+    xindex = np.where(long_local > 0.0,
+                      np.trunc(long_local / res) + 180 / res,
+                      np.trunc(long_local / res) + 180 / res - 1)
+    return np.trunc(xindex).astype(int)
+
+
 def lon_to_xindex(lon, res=1):
     """
     For a given longitude return the x index in a 1x1x5-day global grid
@@ -1585,6 +2763,77 @@ def lon_to_xindex(lon, res=1):
         return int(xindex)
 
 
+def lon_to_xindex_array(lons, res=1):
+    """
+    Array version of :func:`lon_to_xindex`
+    
+    :param lons: Longitudes of the points
+    :param res: resolution of the grid
+    :type lons: numpy array
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    inlon = np.asarray(lons, dtype=float)
+    inlon = np.where(inlon >= 180.0, -180.0 + (inlon - 180.0), inlon)
+    inlon = np.where(inlon < -180.0, inlon + 360., inlon)
+    xindex = np.trunc((inlon + 180.0) / res)
+    nx = 360 / res
+    # equivalent to repeatedly subtracting nx while xindex >= nx
+    xindex = np.where(xindex >= nx, xindex - nx * (np.floor((xindex - nx) / nx) + 1), xindex)
+    return np.trunc(xindex).astype(int)
+
+
+# callsigns which are shared by large numbers of ships, and those which are only generic between certain years
+GENERIC_IDS = frozenset([None,
+                         '1        ',
+                         '58       ',
+                         'RIGG     ',
+                         '     RIGG',
+                         'SHIP     ',
+                         'ship     ',
+                         '     SHIP',
+                         'PLAT     ',
+                         '     PLAT',
+                         '         ',
+                         '0120     ',
+                         '0204     ',
+                         '0205     ',
+                         '0206     ',
+                         '0207     ',
+                         '0208     ',
+                         '0209     ',
+                         'MASKST   ',
+                         'MASKSTID ',
+                         'MASK     ',
+                         'XXXX     ',
+                         '/////    '])
+GENERIC_IDS_BY_YEARS = [(1921, 1941, ['2        ', '00002    ']),
+                        (1930, 1937, ['3        ']),
+                        (1934, 1954, ['7        ', '00007    '])]
+
+# the set of generic IDs for each year, filled in by generic_ids as years are asked for
+_GENERIC_IDS_IN_YEAR = {}
+
+
+def generic_ids(inyear):
+    """
+    Get the set of generic IDs for a year. The set is worked out the first time the year is asked for.
+    
+    :param inyear: year
+    :type inyear: integer
+    :return: the generic IDs
+    :rtype: frozenset of strings
+    """
+    if inyear not in _GENERIC_IDS_IN_YEAR:
+        ids = set(GENERIC_IDS)
+        for first_year, last_year, year_ids in GENERIC_IDS_BY_YEARS:
+            if inyear is not None and first_year <= inyear <= last_year:
+                ids.update(year_ids)
+        _GENERIC_IDS_IN_YEAR[inyear] = frozenset(ids)
+    return _GENERIC_IDS_IN_YEAR[inyear]
+
+
 def id_is_generic(inid, inyear):
     """
     Test to see if an ID is one of the generic IDs
@@ -1600,45 +2849,28 @@ def id_is_generic(inid, inyear):
     MASK, MASKSTID. This simple routine has a list of known generic call signs. 
     Some call signs are only generic between certain years.
     """
-    generic_ids = [None,
-                   '1        ',
-                   '58       ',
-                   'RIGG     ',
-                   '     RIGG',
-                   'SHIP     ',
-                   'ship     ',
-                   '     SHIP',
-                   'PLAT     ',
-                   '     PLAT',
-                   '         ',
-                   '0120     ',
-                   '0204     ',
-                   '0205     ',
-                   '0206     ',
-                   '0207     ',
-                   '0208     ',
-                   '0209     ',
-                   'MASKST   ',
-                   'MASKSTID ',
-                   'MASK     ',
-                   'XXXX     ',
-                   '/////    ']
-
-    if 1921 <= inyear <= 1941:
-        generic_ids.append('2        ')
-        generic_ids.append('00002    ')
-
-    if 1930 <= inyear <= 1937:
-        generic_ids.append('3        ')
-
-    if 1934 <= inyear <= 1954:
-        generic_ids.append('7        ')
-        generic_ids.append('00007    ')
-
-    result = False
-    if inid in generic_ids:
-        result = True
-    return result
+    return inid in generic_ids(inyear)
+
+
+def id_is_generic_array(inids, inyears):
+    """
+    Array version of :func:`id_is_generic`. Each combination of ID and year is only tested once.
+    
+    :param inids: IDs from marine reports
+    :param inyears: years of the reports, NaN where missing
+    :type inids: list of strings
+    :type inyears: numpy array
+    :return: array which is True where the ID is generic
+    :rtype: numpy array of booleans
+    """
+    results = {}
+    flags = np.zeros(len(inids), dtype=bool)
+    for i, (inid, inyear) in enumerate(zip(inids, inyears)):
+        key = (inid, inyear)
+        if key not in results:
+            results[key] = id_is_generic(inid, None if inyear != inyear else inyear)
+        flags[i] = results[key]
+    return flags
 
 
 def last_month_was(year, month):
@@ -1719,12 +2951,27 @@ def get_month_lengths(year):
     :return: list of month lengths
     :rtype: int
     """
-    if calendar.isleap(year):
-        month_lengths = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-    else:
-        month_lengths = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return list(LEAP_MONTH_LENGTHS)
+    return list(MONTH_LENGTHS)
+
 
-    return month_lengths
+def month_lengths_array(years, months):
+    """
+    Return the length of each month in arrays of years and months
+    
+    :param years: Years
+    :param months: Months, which must be between 1 and 12
+    :type years: numpy array of integers
+    :type months: numpy array of integers
+    :return: month lengths
+    :rtype: numpy array of integers
+    """
+    years = np.asarray(years)
+    months = np.asarray(months)
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    month_lengths = np.asarray(MONTH_LENGTHS)[months - 1]
+    return month_lengths + (leap & (months == 2))
 
 
 def imma1_record_to_marine_rep(x, climsst, climnmat):
@@ -1,5 +1,9 @@
 module load scitools/default_legacy-current
 
+echo "Testing IMMA1"
+python test_IMMA1.py
+echo "Testing ICOADSReader"
+python test_ICOADSReader.py
 echo "Testing CalcHums"
 python test_CalcHums.py
 echo "Testing basic QC routines"
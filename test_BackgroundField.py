@@ -1,4 +1,7 @@
 import unittest
+import os
+import tempfile
+import numpy as np
 import BackgroundField as bf
 
 
@@ -153,5 +156,67 @@ class TestIcoadsFilenameFromStub(unittest.TestCase):
         self.assertEqual(testname, correctname)
 
 
+class TestIDExclusionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = bf.IDExclusionIndex(['SHIP', 'BADBUOY12'])
+        self.index.add_glob('MASK*')
+        self.index.add_prefix('D*')
+
+    def test_exact_ids(self):
+        self.assertTrue('SHIP     ' in self.index)
+        self.assertTrue('SHIP' in self.index)
+        self.assertTrue('BADBUOY12' in self.index)
+        self.assertFalse('SHIPS    ' in self.index)
+        self.assertFalse('GOODBUOY1' in self.index)
+
+    def test_patterns(self):
+        self.assertTrue('MASKSTID ' in self.index)
+        self.assertTrue('MASK     ' in self.index)
+        self.assertFalse('AMASK    ' in self.index)
+        # prefixes are not treated as patterns
+        self.assertTrue('D*1234   ' in self.index)
+        self.assertFalse('D1234    ' in self.index)
+
+    def test_missing_ids_never_excluded(self):
+        self.index.add_glob('*')
+        self.assertFalse(None in self.index)
+        self.assertFalse('         ' in self.index)
+
+    def test_mask(self):
+        ids = ['SHIP     ', None, 'MASKSTID ', 'GOODBUOY1', 'SHIP     ', 'D*1234   ', 'D1234    ']
+        mask = self.index.mask(np.array(ids, dtype=object))
+        self.assertEqual(list(mask), [True, False, True, False, True, True, False])
+        for id_string, masked in zip(ids, mask):
+            self.assertEqual(masked, id_string in self.index)
+
+    def test_mask_without_patterns(self):
+        index = bf.IDExclusionIndex(['SHIP'])
+        mask = index.mask(np.array(['SHIP     ', 'BUOY     ', ''], dtype=str))
+        self.assertEqual(list(mask), [True, False, False])
+
+    def test_mask_pads_short_ids(self):
+        index = bf.IDExclusionIndex(['AB'])
+        index.add_prefix('XY')
+        ids = ['AB', 'AB       ', 'ABC', 'XY', 'X', '   ', None]
+        mask = index.mask(ids)
+        self.assertEqual(list(mask), [True, True, False, True, False, False, False])
+        for id_string, masked in zip(ids, mask):
+            self.assertEqual(masked, id_string in index)
+
+    def test_process_bad_id_file(self):
+        handle, filename = tempfile.mkstemp()
+        os.close(handle)
+        with open(filename, 'w') as outfile:
+            outfile.write('SHIP\n\nBADBUOY12\nglob:MASK*\nprefix:D*\n')
+        index = bf.process_bad_id_file(filename)
+        os.remove(filename)
+        self.assertEqual(len(index), 4)
+        self.assertTrue('SHIP     ' in index)
+        self.assertTrue('MASKSTID ' in index)
+        self.assertTrue('D*1234   ' in index)
+        self.assertFalse('         ' in index)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,35 @@
 import unittest
 import numpy as np
 import Climatology as clim
+import qc
 import os
+import shutil
+import tempfile
+from netCDF4 import Dataset
 import subprocess
 import ConfigParser
 
 
+def write_netcdf(filename, lats, lons, variables, chunksizes):
+    dataset = Dataset(filename, 'w')
+    dataset.createDimension('time', 1)
+    dataset.createDimension('lat', len(lats))
+    dataset.createDimension('lon', len(lons))
+    dataset.createVariable('lat', 'f4', ('lat',))[:] = lats
+    dataset.createVariable('lon', 'f4', ('lon',))[:] = lons
+    for varname in variables:
+        contiguous = chunksizes is None
+        variable = dataset.createVariable(varname, 'i2', ('time', 'lat', 'lon'), fill_value=-32768,
+                                          zlib=not contiguous, contiguous=contiguous, chunksizes=chunksizes)
+        variable.scale_factor = np.float32(0.01)
+        variable.add_offset = np.float32(273.15)
+        rows = np.arange(len(lats))[:, np.newaxis]
+        columns = np.arange(len(lons))[np.newaxis, :]
+        values = np.ma.array(-500 + (rows * 7 + columns * 3) % 4000, mask=(rows < len(lats) / 10) & (columns % 3 == 0))
+        variable[0, :, :] = values * 0.01 + 273.15
+    dataset.close()
+
+
 class TestInit(unittest.TestCase):
 
     def setUp(self):
@@ -115,5 +139,308 @@ class TestOstia(unittest.TestCase):
         self.assertAlmostEqual(301.630, testsst, delta=0.001)
 
 
+class TestGetValues(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        pentad = np.ma.array(rng.uniform(-2, 30, (73, 180, 360)))
+        pentad[:, 0:20, :] = np.ma.masked
+        daily = np.ma.array(rng.uniform(-2, 30, (365, 180, 360)).astype(np.float32),
+                            mask=rng.uniform(size=(365, 180, 360)) < 0.1)
+        self.climatologies = [clim.Climatology(pentad),
+                              clim.Climatology(daily),
+                              clim.Climatology(np.full([1, 360, 720], 1.0))]
+
+        npoints = 2000
+        self.lats = np.round(rng.uniform(-90, 90, npoints), 1)
+        self.lons = np.round(rng.uniform(-180, 360, npoints), 1)
+        self.months = rng.randint(0, 14, npoints)
+        self.days = rng.randint(0, 32, npoints)
+        self.lats[0:8] = [90.0, -90.0, 0.0, 0.0, 45.0, -45.0, 12.0, 89.9]
+        self.lons[0:8] = [-180.0, 180.0, 0.0, 360.0, 179.5, -179.5, 72.5, 0.0]
+        self.months[0:8] = [2, 2, 12, 1, 6, 6, 3, 12]
+        self.days[0:8] = [29, 28, 31, 1, 15, 15, 7, 31]
+
+    def assert_matches_scalar(self, values, scalar_method):
+        for i in range(len(self.lats)):
+            try:
+                expected = scalar_method(self.lats[i], self.lons[i], self.months[i], self.days[i])
+            except IndexError:
+                expected = None
+            if expected is None:
+                self.assertTrue(np.isnan(values[i]), i)
+            else:
+                self.assertEqual(values[i], expected, i)
+
+    def test_get_values_matches_get_value(self):
+        for climatology in self.climatologies:
+            values = climatology.get_values(self.lats, self.lons, self.months, self.days)
+            self.assert_matches_scalar(values, climatology.get_value)
+
+    def test_get_values_mds_style_matches_get_value_mds_style(self):
+        for climatology in self.climatologies[0:2]:
+            values = climatology.get_values_mds_style(self.lats, self.lons, self.months, self.days)
+            self.assert_matches_scalar(values, climatology.get_value_mds_style)
+
+    def test_missing_positions_and_dates(self):
+        values = self.climatologies[2].get_values([np.nan, 0.0, 0.0, 0.0], [0.0, np.nan, 0.0, 0.0],
+                                                  [1, 1, np.nan, 2], [1, 1, 1, 30])
+        self.assertTrue(np.all(np.isnan(values)))
+        self.assertEqual(self.climatologies[2].get_values([], [], [], []).shape, (0,))
+
+
+class TestGetInterpolatedValues(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        field = np.ma.array(rng.uniform(-2, 30, (73, 180, 360)), mask=rng.uniform(size=(73, 180, 360)) < 0.3)
+        field[:, 170:180, :] = np.ma.masked
+        self.climatology = clim.Climatology(field)
+
+        npoints = 3000
+        self.lats = rng.uniform(-90, 90, npoints)
+        self.lons = rng.uniform(-180, 180, npoints)
+        self.months = rng.randint(0, 14, npoints)
+        self.days = rng.randint(1, 32, npoints)
+        # poles, the dateline and grid cell borders and centres
+        special = [(90.0, 0.0), (-90.0, 0.0), (89.9995, 12.3), (-89.9995, -12.3), (89.7, 180.0), (-89.2, -180.0),
+                   (0.0, 180.0), (0.0, -180.0), (10.3, 179.9995), (-10.3, -179.9995), (45.0, 179.5), (45.0, -179.5),
+                   (45.5, 0.5), (-45.5, -0.5), (0.0, 0.0), (90.0, 180.0), (-90.0, -180.0), (-85.0, 100.25)]
+        for i, (lat, lon) in enumerate(special):
+            self.lats[i] = lat
+            self.lons[i] = lon
+            self.months[i] = 1 + i % 12
+            self.days[i] = 1 + i
+
+    def test_matches_get_interpolated_value(self):
+        values = self.climatology.get_interpolated_values(self.lats, self.lons, self.months, self.days)
+        nmissing = 0
+        for i in range(len(self.lats)):
+            try:
+                expected = self.climatology.get_interpolated_value(self.lats[i], self.lons[i],
+                                                                   self.months[i], self.days[i])
+            except AssertionError:
+                expected = None
+            if expected is None:
+                self.assertTrue(np.isnan(values[i]), i)
+                nmissing += 1
+            else:
+                self.assertAlmostEqual(values[i], expected, places=10, msg=i)
+        self.assertTrue(0 < nmissing < len(self.lats))
+
+    def test_out_of_range_positions(self):
+        values = self.climatology.get_interpolated_values([90.1, -91.0, 0.0, np.nan, 0.0],
+                                                          [0.0, 0.0, 181.0, 0.0, np.nan], 1, 1)
+        self.assertTrue(np.all(np.isnan(values)))
+
+
+class TestDenseClimatology(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.field = np.ma.array(rng.uniform(-2, 30, (73, 180, 360)), mask=rng.uniform(size=(73, 180, 360)) < 0.2)
+        self.masked = clim.Climatology(self.field)
+        self.dense = clim.Climatology(self.field, dense=True)
+
+    def test_field_is_dense_float32(self):
+        self.assertFalse(isinstance(self.dense.field, np.ma.MaskedArray))
+        self.assertEqual(self.dense.field.dtype, np.float32)
+        self.assertTrue(np.all(np.isnan(self.dense.field) == self.field.mask))
+        self.assertTrue(clim.fields_nbytes([self.dense]) * 2 < clim.fields_nbytes([self.masked]))
+        self.assertTrue(clim.dense_field(self.dense.field) is self.dense.field)
+
+    def test_values_match_masked_field(self):
+        rng = np.random.RandomState(2)
+        lats = rng.uniform(-90, 90, 1000)
+        lons = rng.uniform(-180, 180, 1000)
+        months = rng.randint(1, 13, 1000)
+        days = rng.randint(1, 29, 1000)
+        nmissing = 0
+        for method in ['get_value', 'get_value_mds_style']:
+            for i in range(len(lats)):
+                expected = getattr(self.masked, method)(lats[i], lons[i], months[i], days[i])
+                value = getattr(self.dense, method)(lats[i], lons[i], months[i], days[i])
+                if expected is None:
+                    self.assertEqual(value, None)
+                    nmissing += 1
+                else:
+                    self.assertEqual(value, np.float32(expected))
+        self.assertTrue(nmissing > 0)
+
+        values = self.dense.get_values(lats, lons, months, days)
+        expected = self.masked.get_values(lats, lons, months, days).astype(np.float32)
+        self.assertTrue(np.array_equal(np.isnan(values), np.isnan(expected)))
+        self.assertTrue(np.all(values[~np.isnan(values)] == expected[~np.isnan(expected)]))
+
+
+class TestBackgroundFieldCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.old_scratch = os.environ.get('SCRATCH')
+        os.environ['SCRATCH'] = self.tmpdir
+        for day in range(1, 6):
+            with open(os.path.join(self.tmpdir, 'bg_200301{:02d}.txt'.format(day)), 'w') as outfile:
+                outfile.write(str(day))
+        self.filenames = []
+
+    def tearDown(self):
+        if self.old_scratch is None:
+            del os.environ['SCRATCH']
+        else:
+            os.environ['SCRATCH'] = self.old_scratch
+        shutil.rmtree(self.tmpdir)
+
+    def loader(self, filename):
+        self.filenames.append(filename)
+        if filename is None:
+            raise IOError('no file')
+        with open(filename) as infile:
+            value = float(infile.read())
+        return clim.Climatology(np.full([1, 180, 360], value)), clim.Climatology(np.full([1, 180, 360], -value))
+
+    def make_cache(self, max_days=10):
+        field_bytes = 2 * 180 * 360 * 8
+        return clim.BackgroundFieldCache([self.tmpdir], ['bg_YYYYMMMMDDDD.txt'], max_days * field_bytes,
+                                         self.loader)
+
+    def test_each_day_is_read_once(self):
+        cache = self.make_cache()
+        for day in [1, 2, 1, 1, 2, 3]:
+            background, ice = cache.get(2003, 1, day)
+            self.assertEqual(background.get_value(0.0, 0.0, 1, 1), day)
+            self.assertEqual(ice.get_value(0.0, 0.0, 1, 1), -day)
+        self.assertEqual(len(self.filenames), 3)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.nbytes, 3 * 2 * 180 * 360 * 8)
+
+    def test_least_recently_used_day_is_dropped(self):
+        cache = self.make_cache(max_days=2)
+        for day in [1, 2, 1, 3]:
+            cache.get(2003, 1, day)
+        self.assertEqual(cache.fields.keys(), [(2003, 1, 1), (2003, 1, 3)])
+        self.assertEqual(cache.nbytes, 2 * 2 * 180 * 360 * 8)
+        cache.get(2003, 1, 2)
+        self.assertEqual(len(self.filenames), 4)
+
+
+class TestReadPoints(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.RandomState(5)
+        npoints = 3000
+        self.lats = np.round(rng.uniform(-90, 90, npoints), 3)
+        self.lons = np.round(rng.uniform(-180, 180, npoints), 3)
+        self.lats[0:6] = [90.0, -90.0, 0.0, 0.0, 89.999, -89.999]
+        self.lons[0:6] = [-180.0, 180.0, 0.0, -180.0, -180.0, -180.0]
+        self.lats[6] = np.nan
+        self.months = rng.randint(1, 13, npoints)
+        self.days = rng.randint(1, 29, npoints)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_ostia_points_match_get_value_ostia(self):
+        filename = os.path.join(self.tmpdir, 'ostia.nc')
+        lats = np.arange(-89.975, 90, 0.05)
+        lons = np.arange(-179.975, 180, 0.05)
+        write_netcdf(filename, lats, lons, ['analysed_sst', 'sea_ice_fraction'], (1, 400, 800))
+        bg_var = clim.Climatology(np.ma.array(np.random.RandomState(6).uniform(size=(1, 180, 360)).astype(np.float32)))
+
+        sst, ice, bgvar = clim.read_ostia_points(filename, bg_var, self.lats, self.lons, self.months, self.days)
+        self.assertEqual(sst.dtype, np.float32)
+        ostia = clim.Climatology.from_filename(filename, 'analysed_sst')
+        ostia_ice = clim.Climatology.from_filename(filename, 'sea_ice_fraction')
+        nmasked = 0
+        for i in range(7, len(self.lats)):
+            expected = ostia.get_value_ostia(self.lats[i], self.lons[i])
+            if expected is None:
+                nmasked += 1
+                self.assertTrue(np.isnan(sst[i]))
+                self.assertTrue(np.isnan(ice[i]))
+            else:
+                self.assertEqual(sst[i], expected)
+                self.assertEqual(ice[i], ostia_ice.get_value_ostia(self.lats[i], self.lons[i]))
+            self.assertEqual(bgvar[i], bg_var.get_value_mds_style(self.lats[i], self.lons[i],
+                                                                  self.months[i], self.days[i]))
+        self.assertTrue(nmasked > 0)
+        self.assertTrue(np.isnan(sst[6]))
+
+        sst, ice, bgvar = clim.read_ostia_points(None, bg_var, self.lats, self.lons, self.months, self.days)
+        self.assertTrue(np.all(np.isnan(sst)) and np.all(np.isnan(ice)))
+
+    def test_flipped_and_rolled_grid(self):
+        filename = os.path.join(self.tmpdir, 'field.nc')
+        write_netcdf(filename, np.arange(89.5, -90, -1.0), np.arange(0.5, 360, 1.0), ['sst'], None)
+        values = clim.read_points(filename, ['sst'], self.lats, self.lons, res=1.0)['sst']
+        field = clim.Climatology.from_filename(filename, 'sst').field
+        for i in range(7, len(self.lats)):
+            expected = field[0, qc.mds_lat_to_yindex(self.lats[i]), qc.mds_lon_to_xindex(self.lons[i])]
+            if np.ma.is_masked(expected):
+                self.assertTrue(np.isnan(values[i]))
+            else:
+                self.assertEqual(values[i], expected)
+
+
+class TestClimatologyStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.tmpdir, 'store')
+        os.mkdir(self.store_dir)
+        self.filename = os.path.join(self.tmpdir, 'clim.nc')
+        write_netcdf(self.filename, np.arange(-89.5, 90, 1.0), np.arange(0.5, 360, 1.0), ['sst', 'sst2'], None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_compiled_field_matches_netcdf(self):
+        store = clim.ClimatologyStore(self.store_dir)
+        self.assertTrue(store.compile(self.filename, 'sst'))
+        self.assertFalse(store.compile(self.filename, 'sst'))
+
+        compiled = clim.ClimatologyStore(self.store_dir).open(self.filename, 'sst')
+        self.assertTrue(isinstance(compiled.field, np.memmap))
+        self.assertEqual(compiled.field.dtype, np.float32)
+        original = clim.Climatology.from_filename(self.filename, 'sst')
+        self.assertEqual(compiled.field.shape, original.field.shape)
+        nmissing = 0
+        for lat in np.arange(-89.5, 90, 3.0):
+            for lon in np.arange(-179.5, 180, 7.0):
+                self.assertEqual(compiled.get_value(lat, lon, 1, 1), original.get_value(lat, lon, 1, 1))
+                self.assertEqual(compiled.get_value_mds_style(lat, lon, 1, 1),
+                                 original.get_value_mds_style(lat, lon, 1, 1))
+                if original.get_value(lat, lon, 1, 1) is None:
+                    nmissing += 1
+        self.assertTrue(nmissing > 0)
+
+    def test_changed_file_is_not_used(self):
+        store = clim.ClimatologyStore(self.store_dir)
+        store.compile(self.filename, 'sst')
+        store.compile(self.filename, 'sst2')
+        self.assertEqual(len(os.listdir(self.store_dir)), 3)
+
+        os.utime(self.filename, (0, 0))
+        store = clim.ClimatologyStore(self.store_dir)
+        self.assertFalse(store.is_current(self.filename, 'sst'))
+        self.assertFalse(isinstance(store.open(self.filename, 'sst').field, np.memmap))
+        self.assertTrue(store.compile(self.filename, 'sst'))
+        self.assertTrue(isinstance(store.open(self.filename, 'sst').field, np.memmap))
+        self.assertEqual(len(os.listdir(self.store_dir)), 3)
+
+    def test_no_store(self):
+        store = clim.ClimatologyStore(None)
+        self.assertFalse(isinstance(store.open(self.filename, 'sst').field, np.memmap))
+        self.assertEqual(store.open(None, 'sst').field.shape, (1, 3600, 7200))
+
+    def test_dense_store_reads_uncompiled_fields_as_dense(self):
+        store = clim.ClimatologyStore(None, dense=True)
+        climatology = store.open(self.filename, 'sst')
+        self.assertEqual(climatology.field.dtype, np.float32)
+        self.assertFalse(isinstance(climatology.field, np.ma.MaskedArray))
+        self.assertEqual(climatology.get_value(-85.5, 0.5, 1, 1), None)
+
+
 if __name__ == '__main__':
     unittest.main()
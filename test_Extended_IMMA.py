@@ -1,7 +1,11 @@
 import unittest
+import copy
+import json
 import numpy as np
 import math
+from datetime import datetime
 import Climatology as clim
+import qc
 from SimpleIMMA import IMMA
 import Extended_IMMA as ex
 
@@ -454,6 +458,22 @@ class TestVoyage(unittest.TestCase):
             else:
                 self.assertEqual(self.badreps.get_qc(i, 'POS', 'trk'), 0)
 
+    def test_track_checks_use_generic_flag(self):
+
+        parameters = {"max_direction_change": 60.0,
+                      "max_speed_change": 10.00,
+                      "max_absolute_speed": 40.00,
+                      "max_midpoint_discrepancy": 150.0}
+
+        self.assertFalse(self.badreps.id_is_generic())
+        for rep in self.badreps.rep_feed():
+            rep.set_qc('POS', 'isgeneric', 1)
+        self.assertTrue(self.badreps.id_is_generic())
+
+        self.badreps.track_check(parameters)
+        for i in range(0, len(self.badreps)):
+            self.assertEqual(self.badreps.get_qc(i, 'POS', 'trk'), 0)
+
     def test_repeated_saturated_values(self):
 
         dumval = {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 0, 'LAT': 0.0, 'LON': 0.0, 'SST': 5.0}
@@ -567,6 +587,24 @@ class TestMarineReport(unittest.TestCase):
 
         self.assertEqual(list_of_reps[0].getvar('ID'), 'AAAAAAAAA')
 
+    def test_epoch_hours_and_dt(self):
+        rep = self.reps[4]
+        self.assertEqual(rep.dt, datetime(2003, 12, 1, 10, 0))
+        self.assertEqual(rep.epoch_hours - self.reps[2].epoch_hours, 10.0)
+        rep.setvar('HR', 10.99)
+        self.assertEqual(rep.dt, datetime(2003, 12, 1, 10, 59))
+        rep.setvar('DY', 31)
+        self.assertEqual(rep.dt, datetime(2003, 12, 31, 10, 59))
+        rep.setvar('DY', 32)
+        self.assertEqual(rep.epoch_hours, None)
+        self.assertEqual(rep.dt, None)
+
+    def test_sort_key_puts_missing_times_last(self):
+        self.reps[2].setvar('HR', None)
+        list_of_reps = [self.reps[2], self.reps[4], self.reps[0]]
+        list_of_reps.sort(key=lambda rep: rep.sort_key())
+        self.assertEqual([rep.getvar('HR') for rep in list_of_reps], [0, 10.0, None])
+
     def test_subtract(self):
 
         onedeg = 6371.0088 * 2. * np.pi / 360.
@@ -649,6 +687,21 @@ class TestMarineReport(unittest.TestCase):
         self.assertEqual(outstring, checkheader)
 
 
+    def test_save_and_restore_state(self):
+        state = self.reps[0].save_state()
+        self.reps[0].set_qc('POS', 'pos', 1)
+        self.reps[0].set_qc('POS', 'trk', 1)
+        self.reps[0].setext('speed', 10.0)
+        self.reps[0].restore_state(state)
+        self.assertEqual(self.reps[0].get_qc('POS', 'pos'), 0)
+        self.assertEqual(self.reps[0].get_qc('POS', 'trk'), 9)
+        self.assertRaises(AssertionError, self.reps[0].getext, 'speed')
+        # state can be restored more than once
+        self.reps[0].set_qc('POS', 'pos', 1)
+        self.reps[0].restore_state(state)
+        self.assertEqual(self.reps[0].get_qc('POS', 'pos'), 0)
+
+
 class TestQCFilter(unittest.TestCase):
 
     def setUp(self):
@@ -696,6 +749,568 @@ class TestQCFilter(unittest.TestCase):
         self.assertEqual(afilter.test_report(self.rep), 0)
 
 
+class TestCompactMarineReport(unittest.TestCase):
+
+    def setUp(self):
+        vals = [{'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 0, 'LAT': 0.0, 'LON': 0.0, 'SST': 5.0,
+                 'AT': 10.0, 'DPT': 11.0, 'SLP': 1023.0, 'UID': 'A642D2', 'DS': 3, 'VS': 4, 'PT': 5, 'DCK': 926},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 1, 'LAT': 0.1, 'LON': 359.9, 'SST': 5.0,
+                 'AT': 10.0, 'DPT': 10.0},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 2, 'LAT': 0.2, 'LON': 0.0, 'SST': 5.1},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 3, 'LAT': 0.3, 'LON': 10.0, 'SST': 5.0},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 4, 'LAT': 0.4, 'LON': 0.0, 'SST': 5.0},
+                {'ID': None, 'YR': 2003, 'MO': 12, 'DY': 32, 'HR': None, 'LAT': 91.0, 'LON': 0.0}]
+        self.reps = []
+        self.compact_reps = []
+        for v in vals:
+            rec = IMMA()
+            for key in v:
+                rec.data[key] = v[key]
+            rec.data['UID'] = 'A%05d' % len(self.reps)
+            self.reps.append(ex.MarineReportQC(rec))
+            self.compact_reps.append(ex.CompactMarineReport(rec))
+
+    def test_getvar_matches(self):
+        for rep, compact in zip(self.reps, self.compact_reps):
+            for var in ex.VARLIST + ['ID', 'UID', 'dsi', 'vsi', 'NOTAVARIABLE']:
+                self.assertEqual(rep.getvar(var), compact.getvar(var), var)
+                if compact.getvar(var) is not None and var in ex.VARLIST:
+                    self.assertIn(type(compact.getvar(var)), [int, float])
+            self.assertEqual(rep.dt, compact.dt)
+
+    def test_setvar_and_ext(self):
+        compact = self.compact_reps[0]
+        compact.setvar('SST', 7)
+        compact.setvar('DY', 2.0)
+        compact.setvar('AT', None)
+        self.assertEqual(compact.getvar('SST'), 7.0)
+        self.assertEqual(type(compact.getvar('SST')), float)
+        self.assertEqual(type(compact.getvar('DY')), int)
+        self.assertEqual(compact.dt.day, 2)
+        self.assertEqual(compact.getvar('AT'), None)
+        compact.setext('speed', 12.0)
+        self.assertEqual(compact.getext('speed'), 12.0)
+        self.assertEqual(compact.getvar('speed'), 12.0)
+        self.assertRaises(AssertionError, compact.getext, 'course')
+
+    def test_is_slotted(self):
+        self.compact_reps[0].add_climate_variable('SST', 4.5, 0.5)
+        self.compact_reps[0].reset_ext()
+        self.assertFalse(hasattr(self.compact_reps[0], '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.compact_reps[0], 'unknown_attribute', 1)
+        self.assertEqual(self.compact_reps[0].get_normalised_anom('SST'), 1.0)
+        copied = copy.deepcopy(self.compact_reps[0])
+        self.assertEqual(copied.getnorm('SST', 'stdev'), 0.5)
+        self.assertEqual(copied.getvar('UID'), 'A00000')
+
+    def test_columnar_deck_from_compact_reports(self):
+        deck = ex.ColumnarDeck()
+        for compact in self.compact_reps:
+            compact.add_climate_variable('SST', 4.5, 0.5)
+            compact.setext('OSTIA', 5.5)
+            deck.append(compact)
+        for compact, view in zip(self.compact_reps, deck):
+            for var in ex.VARLIST + ['ID', 'UID', 'dsi', 'vsi', 'OSTIA']:
+                self.assertEqual(compact.getvar(var), view.getvar(var), var)
+            self.assertEqual(compact.getnorm('SST', 'stdev'), view.getnorm('SST', 'stdev'))
+        self.assertEqual(self.compact_reps[0].climate_variable_names(), ['SST'])
+
+    def test_base_qc_matches(self):
+        for rep, compact in zip(self.reps, self.compact_reps):
+            for report in [rep, compact]:
+                report.do_fix_missing_hour()
+                report.is_buoy()
+                report.is_ship()
+                report.is_deck_780()
+                report.do_position_check()
+                report.do_date_check()
+                report.do_time_check()
+                report.do_blacklist()
+                report.do_day_check(1.0)
+                report.humidity_blacklist()
+                report.mat_blacklist()
+                report.wind_blacklist()
+            self.assertEqual(rep.qc, compact.qc)
+            self.assertEqual(rep.getvar('HR'), compact.getvar('HR'))
+
+    def test_output_matches(self):
+        varnames = [['ID'], ['YR'], ['MO'], ['DY'], ['HR'], ['LAT'], ['LON'], ['SST'], ['SST', 'anom'], ['AT']]
+        for rep, compact in zip(self.reps, self.compact_reps):
+            rep.add_climate_variable('SST', 4.37)
+            compact.add_climate_variable('SST', 4.37)
+            self.assertEqual(rep.print_variable_block(varnames), compact.print_variable_block(varnames))
+
+    def test_voyage_checks_match(self):
+        parameters = {"max_direction_change": 60.0,
+                      "max_speed_change": 10.00,
+                      "max_absolute_speed": 40.00,
+                      "max_midpoint_discrepancy": 150.0}
+        voyages = []
+        for reps in [self.reps[0:5], self.compact_reps[0:5]]:
+            voyage = ex.Voyage()
+            for rep in reps:
+                voyage.add_report(rep)
+            voyage.track_check(parameters)
+            voyage.find_repeated_values({'threshold': 0.7, 'min_count': 3})
+            voyages.append(voyage)
+        for rep, compact in zip(voyages[0].reps, voyages[1].reps):
+            self.assertEqual(rep.qc, compact.qc)
+            self.assertEqual(rep.getext('speed'), compact.getext('speed'))
+
+
+class TestQCFlagMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ex.QCFlagRegistry()
+        self.flags = ex.QCFlagMatrix(5, self.registry)
+
+    def test_registry(self):
+        self.assertEqual(self.registry.lookup('POS', 'trk'), None)
+        self.assertEqual(self.registry.register('POS', 'trk'), 0)
+        self.assertEqual(self.registry.register('SST', 'trk'), 1)
+        self.assertEqual(self.registry.register('POS', 'trk'), 0)
+        self.assertEqual(self.registry.lookup('SST', 'trk'), 1)
+        self.assertEqual(self.registry.names, [('POS', 'trk'), ('SST', 'trk')])
+        self.assertRaises(AssertionError, self.registry.register, 'NOTATYPE', 'trk')
+
+    def test_single_flags(self):
+        self.assertEqual(self.flags.get(2, 'POS', 'trk'), 9)
+        self.flags.set(2, 'POS', 'trk', 1)
+        self.assertEqual(self.flags.get(2, 'POS', 'trk'), 1)
+        self.assertEqual(self.flags.get(1, 'POS', 'trk'), 9)
+        self.assertRaises(AssertionError, self.flags.set, 2, 'POS', 'trk', 10)
+
+    def test_bulk_flags(self):
+        self.flags.set_flags('SST', 'clim', 0)
+        self.flags.set_flags('SST', 'clim', 1, np.array([True, False, True, False, False]))
+        self.flags.set_flags('SST', 'clim', [5, 6], [3, 4])
+        self.assertEqual(self.flags.get_flags('SST', 'clim').tolist(), [1, 0, 1, 5, 6])
+        self.assertEqual(self.flags.get_flags('SST', 'clim', slice(1, 3)).tolist(), [0, 1])
+        self.assertEqual(self.flags.get_flags('SST', 'freez').tolist(), [9] * 5)
+        self.assertRaises(AssertionError, self.flags.set_flags, 'SST', 'clim', np.array([1, 11, 1, 1, 1]))
+
+    def test_resize_and_take(self):
+        self.flags.set_flags('SST', 'clim', [0, 1, 2, 3, 4])
+        self.flags.resize(7)
+        self.assertEqual(self.flags.get_flags('SST', 'clim').tolist(), [0, 1, 2, 3, 4, 9, 9])
+        selection = self.flags.take(np.array([4, 0]))
+        self.assertEqual(selection.get_flags('SST', 'clim').tolist(), [4, 0])
+
+    def test_report_flags_match_marine_report(self):
+        rec = IMMA()
+        rec.data['YR'] = 2003
+        rep = ex.MarineReport(rec)
+        rep.set_qc('POS', 'date', 1)
+        rep.set_qc('SST', 'bud', 0)
+        flags = ex.QCFlagMatrix(3)
+        flags.set_report_flags(1, rep.qc)
+        self.assertEqual(flags.get(1, 'POS', 'date'), 1)
+        self.assertEqual(flags.get(1, 'SST', 'bud'), 0)
+        self.assertEqual(flags.get(0, 'SST', 'bud'), 9)
+        self.assertEqual(flags.get_report_flags(1)[0:len(rep.qc)], rep.qc)
+
+
+class TestColumnarDeck(unittest.TestCase):
+
+    def setUp(self):
+        vals = [{'ID': 'BBBBBBBBB', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 3, 'LAT': 0.3, 'LON': 10.0, 'SST': 5.0,
+                 'DS': 2, 'VS': 3, 'UID': 'A00001'},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 1, 'LAT': 0.1, 'LON': 0.0, 'SST': 5.0,
+                 'AT': 10.0, 'DPT': 10.0, 'DS': 9, 'VS': 0, 'UID': 'A00002'},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 0, 'LAT': 0.0, 'LON': 0.0, 'SST': 5.0,
+                 'UID': 'A00003'},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 2, 'LAT': 0.2, 'LON': 0.0, 'SST': 5.0,
+                 'UID': 'A00004'},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 3, 'LAT': 0.3, 'LON': 10.0, 'SST': 5.0,
+                 'UID': 'A00005'},
+                {'ID': 'AAAAAAAAA', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 4, 'LAT': 0.4, 'LON': 0.0, 'SST': 5.0,
+                 'UID': 'A00006'},
+                {'ID': 'BBBBBBBBB', 'YR': 2003, 'MO': 12, 'DY': 1, 'HR': 1, 'LAT': 0.1, 'LON': 10.0, 'SST': 5.0,
+                 'UID': 'A00007'},
+                {'ID': None, 'YR': 1960, 'MO': 12, 'DY': 1, 'HR': 1, 'LAT': -0.1, 'LON': 359.0, 'VS': 2,
+                 'UID': 'A00008'}]
+
+        self.vals = vals
+        self.deck = ex.Deck()
+        self.columnar = ex.ColumnarDeck(capacity=2)
+        for v in vals:
+            rec = IMMA()
+            for key in v:
+                rec.data[key] = v[key]
+            rep = ex.MarineReportQC(rec)
+            rep.add_climate_variable('SST', 4.5, 0.25)
+            self.deck.append(rep)
+            self.columnar.append(rep)
+
+    def test_views_match_reports(self):
+        self.assertEqual(len(self.columnar), len(self.deck))
+        for rep, view in zip(self.deck.reps, self.columnar):
+            for var in ex.VARLIST + ['ID', 'UID', 'dsi', 'vsi']:
+                self.assertEqual(rep.getvar(var), view.getvar(var), var)
+            self.assertEqual(rep.getnorm('SST', 'stdev'), view.getnorm('SST', 'stdev'))
+            self.assertEqual(rep.getanom('SST'), view.getanom('SST'))
+            self.assertEqual(rep.get_normalised_anom('AT'), view.get_normalised_anom('AT'))
+            self.assertEqual(rep.lon(), view.lon())
+            self.assertEqual(rep.dt, view.dt)
+            self.assertEqual(rep.print_variable_block([['ID'], ['SST'], ['SST', 'anom']]),
+                             view.print_variable_block([['ID'], ['SST'], ['SST', 'anom']]))
+
+    def test_view_writes_through_to_columns(self):
+        view = self.columnar[1]
+        self.assertEqual(view.get_qc('POS', 'date'), 9)
+        view.set_qc('POS', 'date', 1)
+        view.setvar('SST', 7.5)
+        view.setext('speed', 12.0)
+        self.assertEqual(self.columnar.get_qc('POS', 'date').tolist(), [9, 1, 9, 9, 9, 9, 9, 9])
+        self.assertEqual(self.columnar.getvar('SST')[1], 7.5)
+        self.assertEqual(self.columnar[1].getext('speed'), 12.0)
+        self.assertEqual(self.columnar[0].getext('speed'), None)
+        self.assertRaises(AssertionError, view.set_qc, 'POS', 'date', 10)
+        self.assertRaises(AssertionError, view.set_qc, 'NOTATYPE', 'date', 1)
+
+    def test_save_and_restore_state(self):
+        view = self.columnar[0]
+        view.set_qc('POS', 'pos', 0)
+        state = view.save_state()
+        view.set_qc('POS', 'pos', 1)
+        view.set_qc('POS', 'trk', 1)
+        view.setext('speed', 10.0)
+        view.restore_state(state)
+        self.assertEqual(view.get_qc('POS', 'pos'), 0)
+        self.assertEqual(view.get_qc('POS', 'trk'), 9)
+        self.assertEqual(view.getext('speed'), None)
+
+    def test_bulk_qc_and_filter(self):
+        self.columnar.set_qc('POS', 'pos', 0)
+        self.columnar.set_qc('POS', 'pos', 1, mask=self.columnar.getvar('LAT') > 0.25)
+        self.assertEqual(self.columnar.get_qc('POS', 'pos').tolist(), [1, 0, 0, 0, 1, 1, 0, 0])
+        self.assertEqual(self.columnar.get_qc('POS', 'unset').tolist(), [9] * 8)
+        self.assertEqual(self.columnar.get_qc('POS', 'pos', mask=[0, 1]).tolist(), [1, 0])
+        self.assertRaises(AssertionError, self.columnar.set_qc, 'POS', 'pos', 10)
+
+        afilter = ex.QC_filter()
+        afilter.add_qc_filter('POS', 'pos', 0)
+        self.columnar.add_filter(afilter)
+        expected = [afilter.test_report(view) == 0 for view in self.columnar]
+        self.assertEqual(self.columnar.filter_mask().tolist(), expected)
+
+    def test_bulk_climatology(self):
+        self.columnar.add_climate_variable('AT', np.arange(8.0))
+        self.assertEqual(self.columnar[1].getanom('AT'), 9.0)
+        self.assertEqual(self.columnar[1].getnorm('AT', 'stdev'), None)
+        anoms = self.columnar.getanom('AT')
+        self.assertEqual(anoms[1], 9.0)
+        self.assertTrue(np.isnan(anoms[0]))
+
+    def test_append_columns_matches_append(self):
+        columns = {}
+        for var in ex.VARLIST + ['ID', 'UID']:
+            column = [v.get(var) for v in self.vals]
+            if var in ['ID', 'UID']:
+                columns[var] = np.array(column, dtype=object)
+            else:
+                columns[var] = np.array([np.nan if x is None else x for x in column])
+        fromcolumns = ex.ColumnarDeck()
+        fromcolumns.append_columns(columns)
+        self.assertEqual(len(fromcolumns), len(self.columnar))
+        for view1, view2 in zip(self.columnar, fromcolumns):
+            for var in ex.VARLIST + ['ID', 'UID', 'dsi', 'vsi']:
+                self.assertEqual(view1.getvar(var), view2.getvar(var), var)
+        self.assertEqual(fromcolumns.idtracker, self.columnar.idtracker)
+
+    def test_track_check_matches_deck(self):
+        parameters = {"max_direction_change": 60.0,
+                      "max_speed_change": 10.00,
+                      "max_absolute_speed": 40.00,
+                      "max_midpoint_discrepancy": 150.0}
+        for deck in [self.deck, self.columnar]:
+            for one_ship in deck.get_one_platform_at_a_time():
+                one_ship.sort()
+                one_ship.calc_alternate_speeds()
+                one_ship.track_check(parameters)
+        for rep, view in zip(self.deck.reps, self.columnar):
+            self.assertEqual(rep.getvar('UID'), view.getvar('UID'))
+            self.assertEqual(rep.get_qc('POS', 'trk'), view.get_qc('POS', 'trk'))
+            self.assertEqual(rep.getext('speed'), view.getext('speed'))
+            self.assertEqual(rep.getext('alt_speed'), view.getext('alt_speed'))
+        self.assertEqual(self.columnar.get_qc('POS', 'trk').tolist().count(1), 1)
+
+    def test_sort_and_index(self):
+        self.columnar.sort()
+        self.assertEqual([view.getvar('UID') for view in self.columnar],
+                         ['A00008', 'A00003', 'A00002', 'A00004', 'A00005', 'A00006', 'A00007', 'A00001'])
+        self.assertEqual(self.columnar.idtracker, {None: [0], 'AAAAAAAAA': [1, 2, 3, 4, 5], 'BBBBBBBBB': [6, 7]})
+        self.assertEqual(self.columnar.getnorm('SST', 'stdev').tolist(), [0.25] * 8)
+
+    def test_deck_sort_matches_columnar_sort(self):
+        self.deck.sort()
+        self.deck.sort()
+        self.columnar.sort()
+        self.assertEqual([rep.getvar('UID') for rep in self.deck.reps],
+                         [view.getvar('UID') for view in self.columnar])
+        self.assertEqual(self.deck.idtracker, self.columnar.idtracker)
+
+    def test_epoch_hours_column(self):
+        self.columnar[3].setvar('DY', 31)
+        self.columnar[4].setvar('DY', 32)
+        self.columnar[5].setvar('HR', None)
+        self.columnar[6].setvar('HR', 23.999)
+        epoch = self.columnar.epoch_hours()
+        for i, view in enumerate(self.columnar):
+            if view.epoch_hours is None:
+                self.assertTrue(np.isnan(epoch[i]))
+            else:
+                self.assertEqual(epoch[i], view.epoch_hours)
+        self.assertEqual(np.isnan(epoch).tolist(), [False, False, False, False, True, True, False, False])
+
+    def test_pop(self):
+        self.columnar[2].set_qc('POS', 'pos', 1)
+        popped = self.columnar.pop(2)
+        self.assertEqual(popped.getvar('UID'), 'A00003')
+        self.assertEqual(popped.get_qc('POS', 'pos'), 1)
+        self.assertEqual(len(self.columnar), 7)
+        self.assertEqual(self.columnar[2].getvar('UID'), 'A00004')
+        self.assertEqual(self.columnar.get_qc('POS', 'pos').tolist(), [9] * 7)
+        self.assertEqual(self.columnar.idtracker['AAAAAAAAA'], [1, 2, 3, 4])
+
+    def test_growth(self):
+        deck = ex.ColumnarDeck(capacity=1)
+        view = self.columnar[0]
+        for i in range(1000):
+            deck.append(view)
+        self.assertEqual(len(deck), 1000)
+        self.assertEqual(deck[-1].getvar('UID'), 'A00001')
+        self.assertEqual(deck.getnorm('SST').tolist(), [4.5] * 1000)
+        self.assertRaises(IndexError, deck.reps.__getitem__, 1000)
+
+
+class TestClimatologyLibraryAnnotate(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        self.climlib = ex.ClimatologyLibrary()
+        for var in ['SST', 'AT', 'DPT']:
+            mean = np.ma.array(rng.uniform(-2, 30, (73, 180, 360)), mask=rng.uniform(size=(73, 180, 360)) < 0.2)
+            self.climlib.add_field(var, 'mean', clim.Climatology(mean))
+        self.climlib.add_field('DPT', 'stdev', clim.Climatology(rng.uniform(0.5, 3, (1, 180, 360))))
+        self.lookups = [('SST', 'mean', 'mds'), ('AT', 'mean', 'standard'),
+                        ('DPT', 'mean', 'standard'), ('DPT', 'stdev', 'standard')]
+
+        self.reps = []
+        for i in range(300):
+            rec = IMMA()
+            values = {'ID': 'SHIP', 'YR': 2004, 'MO': rng.randint(1, 13), 'DY': rng.randint(1, 32), 'HR': 12.0,
+                      'LAT': round(rng.uniform(-90, 90), 1), 'LON': round(rng.uniform(0, 360), 1), 'UID': str(i)}
+            if i == 0:
+                values.update({'LAT': 90.0, 'LON': 180.0})
+            if i == 1:
+                values.update({'LAT': -90.0, 'LON': 0.0})
+            for key in values:
+                rec.data[key] = values[key]
+            self.reps.append(ex.MarineReportQC(rec))
+
+    def test_annotate_matches_per_report_lookups(self):
+        deck = ex.Deck()
+        columnar = ex.ColumnarDeck()
+        for rep in self.reps:
+            deck.append(copy.deepcopy(rep))
+            columnar.append(rep)
+        self.climlib.annotate(deck, self.lookups)
+        self.climlib.annotate(columnar, self.lookups)
+
+        for rep, annotated, view in zip(self.reps, deck.reps, columnar):
+            for var in ['SST', 'AT', 'DPT']:
+                lookup = 'get_value_mds_style' if var == 'SST' else 'get_value'
+                expected_clim = getattr(self.climlib.get_field(var, 'mean'), lookup)(
+                    rep.lat(), rep.lon(), rep.getvar('MO'), rep.getvar('DY'))
+                expected_stdev = None
+                if var == 'DPT':
+                    expected_stdev = self.climlib.get_field(var, 'stdev').get_value(
+                        rep.lat(), rep.lon(), rep.getvar('MO'), rep.getvar('DY'))
+                rep.add_climate_variable(var, expected_clim, expected_stdev)
+                for intype in ['clim', 'stdev']:
+                    self.assertEqual(annotated.getnorm(var, intype), rep.getnorm(var, intype))
+                    self.assertEqual(view.getnorm(var, intype), rep.getnorm(var, intype))
+        self.assertTrue(any(rep.getnorm('SST') is None for rep in self.reps))
+
+    def test_interpolated_lookup(self):
+        deck = ex.Deck()
+        for rep in self.reps:
+            deck.append(copy.deepcopy(rep))
+        self.climlib.annotate(deck, [('AT', 'mean', 'interpolated')])
+
+        field = self.climlib.get_field('AT', 'mean')
+        for rep, annotated in zip(self.reps, deck.reps):
+            lon = rep.lon()
+            if lon > 180:
+                lon -= 360.
+            try:
+                expected = field.get_interpolated_value(rep.lat(), lon, rep.getvar('MO'), rep.getvar('DY'))
+            except AssertionError:
+                expected = None
+            if expected is None:
+                self.assertEqual(annotated.getnorm('AT'), None)
+            else:
+                self.assertAlmostEqual(annotated.getnorm('AT'), expected)
+
+    def test_unknown_lookup(self):
+        deck = ex.Deck()
+        deck.append(self.reps[0])
+        self.assertRaises(AssertionError, self.climlib.annotate, deck, [('SST', 'mean', 'bilinear')])
+        self.assertRaises(AssertionError, self.climlib.annotate, deck, [('SST', 'median', 'mds')])
+
+
+class TestDeckBaseQC(unittest.TestCase):
+
+    def setUp(self):
+        self.parameters = {'base': {'time_since_sun_above_horizon': 1.0},
+                           'SST': {'freezing_point': -1.8, 'freeze_check_n_sigma': 2.0, 'maximum_anomaly': 8.0,
+                                   'hard_limits': [-5.0, 45.0]},
+                           'AT': {'maximum_anomaly': 10.0, 'hard_limits': [-80.0, 65.0],
+                                  'minmax_standard_deviation': [1.0, 4.0], 'maximum_standardised_anomaly': 4.5},
+                           'DPT': {'minmax_standard_deviation': [1.0, 4.0], 'maximum_standardised_anomaly': 5.0,
+                                   'hard_limits': [-80.0, 65.0]},
+                           'SLP': {'maximum_anomaly': 24.0, 'maximum_standardised_anomaly': 3.0, 'lowbar': 10.0},
+                           'W': {'hard_limits': [0.0, 50.0], 'variable_limit': 3.0},
+                           'SHU': {'hard_limits': [0.0, 40.0]},
+                           'RH': {'hard_limits': [0.0, 150.0]}}
+
+        rng = np.random.RandomState(5)
+
+        def maybe(value, missing=0.1):
+            if rng.uniform() < missing:
+                return None
+            return value
+
+        self.reps = []
+        for i in range(2000):
+            rec = IMMA()
+            values = {'ID': rng.choice(['SHIP1', 'SHIP2', 'SUPERIGORINA', None]), 'UID': str(i),
+                      'YR': rng.choice([1845, 1855, 1885, 1960, 2003, 2004, 2030]),
+                      'MO': rng.randint(1, 13), 'DY': maybe(rng.randint(0, 33)),
+                      'HR': maybe(round(rng.uniform(-1, 25), 2)),
+                      'LAT': round(rng.uniform(-95, 95), 1), 'LON': round(rng.uniform(-185, 365), 1),
+                      'DCK': rng.choice([701, 780, 193, 732, 874, 708, 926]),
+                      'PT': maybe(rng.randint(0, 18)),
+                      'SST': maybe(round(rng.uniform(-6, 46), 1)), 'AT': maybe(round(rng.uniform(-10, 40), 1)),
+                      'DPT': maybe(round(rng.uniform(-15, 35), 1)), 'SLP': maybe(round(rng.uniform(950, 1050), 1)),
+                      'W': maybe(rng.choice([0.0, 2.0, 5.0, 55.0])), 'D': maybe(rng.choice([90, 361, 362]))}
+            if i % 7 == 0:
+                values.update({'LAT': 0.0, 'LON': 0.0})
+            if i % 11 == 0:
+                values.update({'DCK': 193, 'YR': 1885, 'LAT': 45.0, 'LON': rng.choice([-40.0, 20.0, 350.0])})
+            for key in values:
+                rec.data[key] = values[key]
+            rep = ex.MarineReportQC(rec)
+            rep.setvar('AT2', maybe(round(rng.uniform(-10, 40), 1), 0.05))
+            rep.setvar('SHU', maybe(round(rng.uniform(-1, 41), 1), 0.05))
+            rep.setext('RH', maybe(round(rng.uniform(0, 155), 1), 0.05))
+            for var in ['SST', 'AT', 'DPT', 'SLP', 'AT2']:
+                rep.add_climate_variable(var, maybe(round(rng.uniform(-5, 1040) if var == 'SLP' else
+                                                          rng.uniform(-5, 30), 2)),
+                                         maybe(round(rng.uniform(0.1, 6), 2)))
+            self.reps.append(rep)
+
+    def test_deck_matches_per_report_base_qc(self):
+        deck = ex.Deck()
+        columnar = ex.ColumnarDeck()
+        for rep in self.reps:
+            deck.append(copy.deepcopy(rep))
+            columnar.append(rep)
+        deck.perform_base_qc(self.parameters)
+        columnar.perform_base_qc(self.parameters)
+        for rep in self.reps:
+            rep.perform_base_qc(self.parameters)
+
+        for rep, deck_rep, view in zip(self.reps, deck.reps, columnar):
+            self.assertEqual(deck_rep.getvar('HR'), rep.getvar('HR'))
+            for qc_type, specific_flag in ex.QC_FLAGS.names:
+                expected = rep.get_qc(qc_type, specific_flag)
+                self.assertEqual(deck_rep.get_qc(qc_type, specific_flag), expected, (qc_type, specific_flag))
+                self.assertEqual(view.get_qc(qc_type, specific_flag), expected, (qc_type, specific_flag))
+
+        for qc_type, specific_flag in [('POS', 'day'), ('POS', 'blklst'), ('AT', 'mat_blacklist'),
+                                       ('DPT', 'hardlimit'), ('W', 'consistency'), ('SLP', 'clim')]:
+            flags = [rep.get_qc(qc_type, specific_flag) for rep in self.reps]
+            self.assertTrue(0 in flags and 1 in flags, (qc_type, specific_flag))
+
+    def test_deck_with_solar_ephemeris(self):
+        deck = ex.Deck()
+        ephemeris_deck = ex.Deck()
+        for rep in self.reps:
+            deck.append(copy.deepcopy(rep))
+            ephemeris_deck.append(copy.deepcopy(rep))
+        deck.perform_base_qc(self.parameters)
+        ephemeris_deck.perform_base_qc(self.parameters, qc.SolarEphemeris())
+        for deck_rep, ephemeris_rep in zip(deck.reps, ephemeris_deck.reps):
+            for qc_type, specific_flag in ex.QC_FLAGS.names:
+                self.assertEqual(ephemeris_rep.get_qc(qc_type, specific_flag), deck_rep.get_qc(qc_type, specific_flag))
+
+    def test_blacklist_rules_from_parameters(self):
+        parameters = dict(self.parameters)
+        parameters['blacklist'] = json.loads('[{"description": "one ship", "ids": ["SHIP1"]}]')
+        deck = ex.Deck()
+        for rep in self.reps:
+            deck.append(copy.deepcopy(rep))
+        deck.perform_base_qc(parameters)
+        for rep in self.reps:
+            rep.perform_base_qc(parameters)
+
+        for rep, deck_rep in zip(self.reps, deck.reps):
+            expected = 1 if rep.getvar('ID') == 'SHIP1' else 0
+            self.assertEqual(rep.get_qc('POS', 'blklst'), expected)
+            self.assertEqual(deck_rep.get_qc('POS', 'blklst'), expected)
+
+    def test_empty_deck(self):
+        ex.Deck().perform_base_qc(self.parameters)
+        ex.ColumnarDeck().perform_base_qc(self.parameters)
+
+
+class TestIDClassification(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(8)
+        self.deck = ex.Deck()
+        self.reps = []
+        for i in range(500):
+            rec = IMMA()
+            for key, value in [('ID', rng.choice(['SHIP     ', '7        ', 'MYSHIP   ', 'BUOY1    ', 'BUOY2    '])),
+                               ('YR', rng.choice([1940, 1960])), ('MO', 1), ('DY', 1), ('HR', 12.0),
+                               ('LAT', 10.0), ('LON', 20.0),
+                               ('DCK', rng.choice([780, 926])), ('PT', rng.choice([1, 5, 6, 7, 13]))]:
+                rec.data[key] = value
+            if i < 10:
+                rec.data['PT'] = None
+                rec.data['ID'] = None
+            rep = ex.MarineReportQC(rec)
+            self.reps.append(rep)
+            self.deck.append(rep)
+
+    def test_matches_per_report_classification(self):
+        classification = ex.IDClassification.from_deck(self.deck)
+        self.assertEqual(len(classification), len(self.reps))
+        for i, rep in enumerate(self.reps):
+            rep.is_buoy()
+            rep.is_ship()
+            rep.is_deck_780()
+            self.assertEqual(classification.isbuoy[i], rep.get_qc('POS', 'isbuoy'))
+            self.assertEqual(classification.isdrifter[i], rep.get_qc('POS', 'isdrifter'))
+            self.assertEqual(classification.isship[i], rep.get_qc('POS', 'isship'))
+            self.assertEqual(classification.is780[i], rep.get_qc('POS', 'is780'))
+            self.assertEqual(classification.generic[i], qc.id_is_generic(rep.getvar('ID'), rep.getvar('YR')))
+        self.assertTrue(0 < np.sum(classification.generic) < len(self.reps))
+
+    def test_missing_ids_and_years(self):
+        classification = ex.IDClassification([None, 'SHIP     ', '7        ', '7        ', '7        '],
+                                             [1960, np.nan, 1940, 1960, np.nan], [1] * 5, [926] * 5)
+        self.assertEqual(classification.generic.tolist(), [True, True, True, False, False])
+
+    def test_empty(self):
+        classification = ex.IDClassification([], [], [], [])
+        self.assertEqual(len(classification), 0)
+        self.assertEqual(classification.generic.tolist(), [])
+
+
 class TestBayesianBuddy(unittest.TestCase):
     pass
 
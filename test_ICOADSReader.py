@@ -0,0 +1,193 @@
+import unittest
+import os
+import gzip
+import shutil
+import tempfile
+import time
+import StringIO
+import IMMA1
+import ICOADSReader
+
+
+def make_record(values, attachments):
+    rec = IMMA1.IMMA()
+    rec.attachments = attachments
+    for i in attachments:
+        for p in IMMA1.getParameters(i):
+            rec.data[p] = None
+    for key in values:
+        rec.data[key] = values[key]
+    outfile = StringIO.StringIO()
+    rec.write(outfile)
+    return outfile.getvalue()
+
+
+class TestOpenIcoadsFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'test.gz')
+        self.lines = ['line {}{}\n'.format(i, 'x' * (i % 200)) for i in range(5000)] + ['no newline at end']
+        outfile = gzip.open(self.filename, 'w')
+        outfile.write(''.join(self.lines))
+        outfile.close()
+        ICOADSReader.EXTERNAL_DECOMPRESSORS['gzip_command'] = ['gzip', '-dc']
+
+    def tearDown(self):
+        del ICOADSReader.EXTERNAL_DECOMPRESSORS['gzip_command']
+        shutil.rmtree(self.tmpdir)
+
+    def read_lines(self, decompression):
+        icoads_file = ICOADSReader.open_icoads_file(self.filename, decompression)
+        lines = list(icoads_file)
+        icoads_file.close()
+        return lines
+
+    def test_all_methods_give_same_lines(self):
+        for decompression in ['gzip', 'zlib', 'auto', 'gzip_command']:
+            self.assertEqual(self.read_lines(decompression), self.lines)
+
+    def test_small_blocks(self):
+        reader = ICOADSReader.ZlibLineReader(self.filename, block_size=100)
+        self.assertEqual(list(reader), self.lines)
+        reader.close()
+
+    def test_several_gzip_members(self):
+        with open(self.filename, 'rb') as infile:
+            member = infile.read()
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(member + member + '\x00' * 8)
+        expected = list(gzip.open(self.filename))
+        self.assertEqual(self.read_lines('zlib'), expected)
+        reader = ICOADSReader.ZlibLineReader(self.filename, block_size=100)
+        self.assertEqual(list(reader), expected)
+        reader.close()
+
+    def test_truncated_file(self):
+        with open(self.filename, 'rb') as infile:
+            member = infile.read()
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(member[0:-100])
+        self.assertRaises(IOError, self.read_lines, 'zlib')
+        self.assertRaises(IOError, self.read_lines, 'gzip_command')
+
+    def test_unknown_method(self):
+        self.assertRaises(AssertionError, ICOADSReader.open_icoads_file, self.filename, 'bzip2')
+
+    def test_missing_program(self):
+        ICOADSReader.EXTERNAL_DECOMPRESSORS['missing'] = ['not_a_real_decompressor', '-dc']
+        try:
+            self.assertRaises(IOError, ICOADSReader.open_icoads_file, self.filename, 'missing')
+        finally:
+            del ICOADSReader.EXTERNAL_DECOMPRESSORS['missing']
+
+
+class TestMonthReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        os.mkdir(self.cache_dir)
+        self.filename = os.path.join(self.tmpdir, 'IMMA1_R3.0.0_2003-01.gz')
+
+        lines = []
+        for i in range(30):
+            values = {'YR': 2003, 'MO': 1 + (i % 3 == 0), 'DY': 1 + i % 28, 'HR': 12.5,
+                      'LAT': 10.0 - i, 'LON': 20.0 + i,
+                      'ID': ['SHIP     ', 'BADSHIP  ', None][i % 3],
+                      'SST': [None, 15.2][i % 2], 'DCK': 926, 'SID': 3, 'PT': i % 8,
+                      'UID': 'A%05d' % i}
+            lines.append(make_record(values, [0, 1, 98, 99]))
+        # a record which cannot be decoded and one from a different month which cannot be decoded
+        lines.append('2003 1' + lines[0][6:15] + 'X' + lines[0][16:])
+        lines.append('2003 2' + lines[0][6:15] + 'X' + lines[0][16:])
+
+        outfile = gzip.open(self.filename, 'w')
+        for line in lines:
+            outfile.write(line)
+        outfile.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_all(self, cache_dir):
+        reader = ICOADSReader.MonthReader(self.filename, 2003, 1, ['BADSHIP  '], [0, 1, 98], cache_dir)
+        return [rec.data for rec in reader], reader.early_rejects
+
+    def assert_same_records(self, recs1, recs2):
+        self.assertEqual(len(recs1), len(recs2))
+        for rec1, rec2 in zip(recs1, recs2):
+            for p in ['YR', 'MO', 'DY', 'HR', 'LAT', 'LON', 'ID', 'SST', 'DCK', 'SID', 'PT', 'UID']:
+                self.assertEqual(rec1.get(p), rec2.get(p))
+                self.assertEqual(type(rec1.get(p)), type(rec2.get(p)))
+
+    def test_line_at_a_time(self):
+        recs, early_rejects = self.read_all(None)
+        self.assertEqual(len(recs), 10)
+        self.assertEqual(early_rejects, 21)
+        for rec in recs:
+            self.assertEqual(rec['MO'], 1)
+            self.assertNotEqual(rec['ID'], 'BADSHIP  ')
+
+    def test_columns_match_lines(self):
+        recs_lines, rejects_lines = self.read_all(None)
+        recs_columns, rejects_columns = self.read_all(self.cache_dir)
+        self.assert_same_records(recs_lines, recs_columns)
+        self.assertEqual(rejects_lines, rejects_columns)
+
+    def test_cache_is_written_and_reused(self):
+        recs1, rejects1 = self.read_all(self.cache_dir)
+        cachefile = ICOADSReader.cache_filename(self.cache_dir, self.filename, [0, 1, 98])
+        self.assertTrue(os.path.isfile(cachefile))
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(cachefile)])
+
+        recs2, rejects2 = self.read_all(self.cache_dir)
+        self.assert_same_records(recs1, recs2)
+        self.assertEqual(rejects1, rejects2)
+
+    def test_cache_filename_changes_with_file(self):
+        name1 = ICOADSReader.cache_filename(self.cache_dir, self.filename, [0, 1, 98])
+        os.utime(self.filename, (0, 0))
+        name2 = ICOADSReader.cache_filename(self.cache_dir, self.filename, [0, 1, 98])
+        name3 = ICOADSReader.cache_filename(self.cache_dir, self.filename, [0, 98])
+        self.assertNotEqual(name1, name2)
+        self.assertNotEqual(name2, name3)
+
+    def test_prefetcher_gives_same_records(self):
+        recs, early_rejects = self.read_all(None)
+        for cache_dir in [None, self.cache_dir]:
+            reader = ICOADSReader.MonthReader(self.filename, 2003, 1, ['BADSHIP  '], [0, 1, 98], cache_dir)
+            prefetcher = ICOADSReader.Prefetcher(reader, chunk_size=3, max_chunks=2)
+            prefetched = [rec.data for rec in prefetcher]
+            self.assert_same_records(recs, prefetched)
+            self.assertEqual(prefetcher.early_rejects, early_rejects)
+
+    def test_full_queue_blocks_reader(self):
+        recs, early_rejects = self.read_all(None)
+        reader = ICOADSReader.MonthReader(self.filename, 2003, 1, ['BADSHIP  '], [0, 1, 98])
+        prefetcher = ICOADSReader.Prefetcher(reader, chunk_size=1, max_chunks=2)
+        for i in range(500):
+            if prefetcher.queue.full():
+                break
+            time.sleep(0.01)
+        time.sleep(0.1)
+        self.assertEqual(prefetcher.queue.qsize(), 2)
+        self.assertTrue(prefetcher.thread.is_alive())
+        self.assert_same_records(recs, [rec.data for rec in prefetcher])
+        self.assertFalse(prefetcher.thread.is_alive())
+
+    def test_prefetcher_passes_on_errors(self):
+        for cache_dir in [None, self.cache_dir]:
+            reader = ICOADSReader.MonthReader(self.filename, 2003, 1, [], [0, 1, 98], cache_dir)
+            os.rename(self.filename, self.filename + '.moved')
+            prefetcher = ICOADSReader.Prefetcher(reader)
+            self.assertRaises(EnvironmentError, list, prefetcher)
+            os.rename(self.filename + '.moved', self.filename)
+
+    def test_missing_file(self):
+        self.assertRaises(IOError, ICOADSReader.MonthReader, None, 2003, 1, [], [0])
+        self.assertRaises(IOError, ICOADSReader.MonthReader, self.filename + 'x', 2003, 1, [], [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
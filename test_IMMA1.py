@@ -0,0 +1,238 @@
+import unittest
+import numpy as np
+import random
+import gzip
+import os
+import tempfile
+import StringIO
+import IMMA1
+
+
+def make_record(values, attachments):
+    """
+    Use the IMMA1 writer to build a record string with the specified values and attachments
+    """
+    rec = IMMA1.IMMA()
+    rec.attachments = attachments
+    for i in attachments:
+        for p in IMMA1.getParameters(i):
+            rec.data[p] = None
+    for key in values:
+        rec.data[key] = values[key]
+    outfile = StringIO.StringIO()
+    rec.write(outfile)
+    return outfile.getvalue()
+
+
+def random_records(nrecords, seed=1):
+    """
+    Make a list of IMMA1 records with random contents including some missing values
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(nrecords):
+        values = {'YR': rng.randint(1850, 2020),
+                  'MO': rng.randint(1, 12),
+                  'DY': rng.randint(1, 28),
+                  'HR': rng.randint(0, 2399) * 0.01,
+                  'LAT': rng.randint(-9000, 9000) * 0.01,
+                  'LON': rng.randint(0, 35999) * 0.01,
+                  'ATTC': rng.randint(0, 3),
+                  'DS': rng.randint(0, 9),
+                  'VS': rng.randint(0, 9),
+                  'ID': rng.choice(['SHIP     ', '12345    ', 'ABCDEFGHI', None]),
+                  'AT': rng.choice([None, rng.randint(1, 300) * 0.1]),
+                  'SST': rng.choice([None, rng.randint(1, 300) * 0.1]),
+                  'SLP': rng.choice([None, rng.randint(9000, 10400) * 0.1]),
+                  'W': rng.choice([None, rng.randint(0, 300) * 0.1]),
+                  'CL': rng.choice([None, 10]),
+                  'DCK': rng.randint(100, 999),
+                  'SID': rng.randint(0, 999),
+                  'PT': rng.choice([None, rng.randint(0, 21)]),
+                  'SQZ': rng.choice([None, rng.randint(1, 35)]),
+                  'UID': 'A%05d' % i,
+                  'RN1': rng.randint(0, 35),
+                  'SUPD': 'supplementary'}
+        attachments = [0, 1, 98]
+        if rng.random() > 0.5:
+            attachments.append(99)
+        lines.append(make_record(values, attachments))
+    return lines
+
+
+class TestSplitAttachments(unittest.TestCase):
+
+    def test_core_and_uid(self):
+        line = make_record({'YR': 2003, 'UID': 'A642D2'}, [0, 98])
+        found = [(i, length) for i, astring, length in IMMA1.split_attachments(line)]
+        self.assertEqual(found, [(0, 108), (98, 11)])
+
+    def test_supplemental_runs_to_end(self):
+        line = make_record({'YR': 2003, 'UID': 'A642D2', 'SUPD': 'xyz'}, [0, 98, 99])
+        found = [(i, length) for i, astring, length in IMMA1.split_attachments(line)]
+        self.assertEqual(found[-1], (99, None))
+
+
+class TestSelectiveReadstr(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = random_records(50)
+
+    def test_selected_attachments_match_full_decode(self):
+        for line in self.lines:
+            full = IMMA1.IMMA()
+            full.readstr(line)
+            partial = IMMA1.IMMA()
+            partial.readstr(line, attachments=[0, 98])
+            self.assertEqual(partial.attachments, [0, 98])
+            for p in list(IMMA1.getParameters(0)) + ['UID']:
+                self.assertEqual(partial.data[p], full.data[p])
+
+    def test_skipped_attachments_not_decoded(self):
+        rec = IMMA1.IMMA()
+        rec.readstr(self.lines[0], attachments=[0, 98])
+        self.assertFalse('DCK' in rec.data)
+        self.assertFalse('SUPD' in rec.data)
+
+    def test_core_can_be_skipped(self):
+        rec = IMMA1.IMMA()
+        rec.readstr(self.lines[0], attachments=[98])
+        self.assertEqual(rec.attachments, [98])
+        self.assertFalse('YR' in rec.data)
+        self.assertEqual(rec.data['UID'], 'A00000')
+
+    def test_default_decodes_everything(self):
+        rec = IMMA1.IMMA()
+        rec.readstr(self.lines[0])
+        self.assertEqual(rec.attachments[0:3], [0, 1, 98])
+
+
+class TestLinePrefilter(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = random_records(100)
+
+    def test_core_field_matches_readstr(self):
+        for line in self.lines:
+            rec = IMMA1.IMMA()
+            rec.readstr(line)
+            for p in ['YR', 'MO', 'DY', 'HR', 'LAT', 'ID', 'SST']:
+                self.assertEqual(IMMA1.core_field(line, p), rec.data[p])
+
+    def test_core_field_bad_value(self):
+        self.assertRaises(ValueError, IMMA1.core_field, '19X1' + self.lines[0][4:], 'YR')
+
+    def test_agrees_with_full_decode(self):
+        exclude = ['SHIP     ']
+        for line in self.lines:
+            rec = IMMA1.IMMA()
+            rec.readstr(line)
+            for year, month in [(rec.data['YR'], rec.data['MO']), (rec.data['YR'], rec.data['MO'] % 12 + 1)]:
+                expected = (rec.data['ID'] not in exclude and
+                            rec.data['YR'] == year and
+                            rec.data['MO'] == month)
+                self.assertEqual(IMMA1.line_could_match(line, year, month, exclude), expected)
+
+    def test_no_ids_to_exclude(self):
+        rec = IMMA1.IMMA()
+        rec.readstr(self.lines[0])
+        self.assertTrue(IMMA1.line_could_match(self.lines[0], rec.data['YR'], rec.data['MO']))
+
+    def test_undecodable_date_is_passed(self):
+        self.assertTrue(IMMA1.line_could_match('19X1' + self.lines[0][4:], 1900, 1))
+
+
+class TestAttachmentsForFields(unittest.TestCase):
+
+    def test_core_only(self):
+        self.assertEqual(IMMA1.attachments_for_fields(['YR', 'MO', 'ID']), [0])
+
+    def test_uid_and_deck(self):
+        self.assertEqual(IMMA1.attachments_for_fields(['YR', 'UID', 'DCK']), [0, 1, 98])
+
+    def test_unknown_field(self):
+        self.assertRaises(AssertionError, IMMA1.attachments_for_fields, ['NOTAFIELD'])
+
+
+class TestReadColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = random_records(200)
+        self.fields = list(IMMA1.getParameters(0)) + ['DCK', 'SID', 'PT', 'SQZ', 'UID', 'RN1']
+
+    def assert_matches_readstr(self, columns, lines):
+        for k, line in enumerate(lines):
+            rec = IMMA1.IMMA()
+            rec.readstr(line)
+            for p in self.fields:
+                expected = rec.data.get(p)
+                got = columns[p][k]
+                if expected is None:
+                    if isinstance(got, float):
+                        self.assertTrue(np.isnan(got), p)
+                    else:
+                        self.assertIsNone(got, p)
+                else:
+                    self.assertEqual(expected, got, p)
+
+    def test_equivalent_to_readstr(self):
+        columns = IMMA1.read_columns(self.lines, self.fields)
+        for p in self.fields:
+            self.assertEqual(len(columns[p]), len(self.lines))
+        self.assert_matches_readstr(columns, self.lines)
+
+    def test_small_chunks(self):
+        columns = IMMA1.read_columns(self.lines, self.fields, chunk_size=7)
+        self.assert_matches_readstr(columns, self.lines)
+
+    def test_gzipped_file(self):
+        handle, filename = tempfile.mkstemp(suffix='.gz')
+        os.close(handle)
+        outfile = gzip.open(filename, 'w')
+        for line in self.lines:
+            outfile.write(line)
+        outfile.close()
+
+        columns = IMMA1.read_columns(filename, self.fields)
+        os.remove(filename)
+        self.assert_matches_readstr(columns, self.lines)
+
+    def test_default_fields_are_core(self):
+        columns = IMMA1.read_columns(self.lines)
+        self.assertEqual(sorted(columns.keys()), sorted(IMMA1.getParameters(0)))
+
+    def test_undecodable_record_is_dropped(self):
+        bad = self.lines[0][0:4] + 'X1' + self.lines[0][6:]
+        columns = IMMA1.read_columns([bad] + self.lines[1:3], ['YR', 'MO', 'UID'])
+        self.assertEqual(len(columns['YR']), 2)
+        self.assertEqual(columns['UID'][0], 'A00001')
+
+    def test_rejected_records_are_returned(self):
+        bad = self.lines[0][0:4] + 'X1' + self.lines[0][6:]
+        rejected = []
+        IMMA1.read_columns([bad] + self.lines[1:3], ['YR', 'MO'], rejected=rejected)
+        self.assertEqual(rejected, [bad])
+
+    def test_columns_to_records(self):
+        columns = IMMA1.read_columns(self.lines, self.fields)
+        for line, rec in zip(self.lines, IMMA1.columns_to_records(columns)):
+            expected = IMMA1.IMMA()
+            expected.readstr(line)
+            for p in self.fields:
+                self.assertEqual(rec.data[p], expected.data.get(p))
+                self.assertEqual(type(rec.data[p]), type(expected.data.get(p)))
+
+    def test_missing_attachment(self):
+        line = make_record({'YR': 2003, 'MO': 1, 'UID': 'A642D2'}, [0, 98])
+        columns = IMMA1.read_columns([line], ['YR', 'DCK', 'UID'])
+        self.assertTrue(np.isnan(columns['DCK'][0]))
+        self.assertEqual(columns['UID'][0], 'A642D2')
+
+    def test_empty_input(self):
+        columns = IMMA1.read_columns([], ['YR', 'UID'])
+        self.assertEqual(len(columns['YR']), 0)
+        self.assertEqual(len(columns['UID']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -573,6 +573,127 @@ class TestQCMethodsBlacklist(unittest.TestCase):
         self.assertEqual(result, 0)
 
 
+class TestBlacklistRules(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        npoints = 5000
+        self.ids = [str(x) for x in rng.choice(['53521    ', '53902    ', 'SUPERIGORINA', 'MYSHIP', '12345'], npoints)]
+        self.ids[0:10] = [None] * 10
+        self.decks = rng.choice([732, 874, 926, 780], npoints)
+        self.years = rng.randint(1955, 1978, npoints)
+        self.months = rng.randint(1, 13, npoints)
+        self.lats = np.round(rng.uniform(-60, 80, npoints), 0)
+        self.lons = np.round(rng.uniform(-180, 360, npoints), 0)
+        self.platforms = rng.choice([1, 5, 13, 7], npoints)
+        self.lats[10:20] = 0.0
+        self.lons[10:20] = 0.0
+        self.years[20:200] = rng.choice([2005, 2006], 180)
+
+    def scalar_flags(self, blacklist):
+        return [blacklist(self.ids[i], self.decks[i], self.years[i], self.months[i],
+                          self.lats[i], self.lons[i], self.platforms[i]) for i in range(len(self.ids))]
+
+    def test_mask_matches_blacklist(self):
+        mask = qc.DEFAULT_BLACKLIST.mask(self.ids, self.decks, self.years, self.months, self.lats, self.lons,
+                                         self.platforms)
+        expected = self.scalar_flags(qc.blacklist)
+        self.assertEqual(mask.astype(int).tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+
+    def test_missing_values(self):
+        mask = qc.DEFAULT_BLACKLIST.mask([None, None], [732, np.nan], [1958, np.nan], [1, np.nan],
+                                         [np.nan, 45], [np.nan, -172], [np.nan, 13])
+        self.assertEqual(mask.tolist(), [False, True])
+        self.assertEqual(qc.blacklist(None, None, None, None, None, None, None), 0)
+        self.assertEqual(qc.DEFAULT_BLACKLIST.mask([], [], [], [], [], [], []).tolist(), [])
+
+    def test_rules_from_parameters(self):
+        rules = [{'description': 'one ship in one region', 'ids': ['MYSHIP'], 'box': [-30, -10, 10, 20]},
+                 {'decks': [926], 'months': [[1960, 11], [1961, 2]], 'platforms': [5]}]
+        blacklist = qc.Blacklist.from_parameters({'blacklist': rules})
+        mask = blacklist.mask(self.ids, self.decks, self.years, self.months, self.lats, self.lons, self.platforms)
+        expected = self.scalar_flags(blacklist.check)
+        self.assertEqual(mask.astype(int).tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+        self.assertEqual(blacklist.check('MYSHIP', 926, 1970, 1, 0.0, 0.0), 1)
+        self.assertEqual(blacklist.check('MYSHIP', 926, 1970, 1, 0.0, 50.0), 0)
+        self.assertEqual(blacklist.check('', 926, 1961, 2, 0.0, 50.0, 5), 1)
+        self.assertEqual(blacklist.check('', 926, 1961, 3, 0.0, 50.0, 5), 0)
+        self.assertEqual(blacklist.check('', 926, 1960, 11, 0.0, 50.0, 5), 1)
+
+        self.assertIs(qc.Blacklist.from_parameters({}).rules, qc.BLACKLIST_RULES)
+        self.assertEqual(qc.Blacklist([]).mask(['A'], [732], [1958], [1], [45], [-172], [1]).tolist(), [False])
+
+    def test_unknown_condition(self):
+        self.assertRaises(AssertionError, qc.Blacklist, [{'deck': [732]}])
+
+
+class TestQCMethodsGenericIDs(unittest.TestCase):
+
+    def test_generic_ids(self):
+        self.assertTrue(qc.id_is_generic('SHIP     ', 1950))
+        self.assertTrue(qc.id_is_generic(None, 1950))
+        self.assertTrue(qc.id_is_generic('MASKSTID ', None))
+        self.assertFalse(qc.id_is_generic('MYSHIP   ', 1950))
+
+    def test_generic_ids_in_some_years(self):
+        self.assertTrue(qc.id_is_generic('2        ', 1921))
+        self.assertTrue(qc.id_is_generic('00002    ', 1941))
+        self.assertFalse(qc.id_is_generic('2        ', 1942))
+        self.assertTrue(qc.id_is_generic('3        ', 1930))
+        self.assertFalse(qc.id_is_generic('3        ', 1938))
+        self.assertTrue(qc.id_is_generic('7        ', 1954))
+        self.assertFalse(qc.id_is_generic('00007    ', 1933))
+        self.assertFalse(qc.id_is_generic('7        ', None))
+        self.assertIs(qc.generic_ids(1935), qc.generic_ids(1935))
+
+    def test_id_is_generic_array(self):
+        ids = ['SHIP     ', '7        ', '7        ', 'MYSHIP   ', None, '7        ']
+        years = [1950, 1950, 1960, 1950, np.nan, np.nan]
+        self.assertEqual(qc.id_is_generic_array(ids, years).tolist(), [True, True, False, False, True, False])
+        self.assertEqual(qc.id_is_generic_array([], []).tolist(), [])
+
+
+class TestQCMethodsSourceBlacklists(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(9)
+        npoints = 3000
+        self.platforms = rng.randint(0, 18, npoints).astype(float)
+        self.decks = rng.choice([193, 701, 708, 780, 926], npoints).astype(float)
+        self.years = rng.choice([1850, 1879, 1880, 1885, 1892, 1893, 1960], npoints).astype(float)
+        self.hours = rng.choice([np.nan, 0.0, 12.5], npoints)
+        self.lats = np.round(rng.uniform(-20, 60, npoints), 0)
+        self.lons = np.round(rng.uniform(-100, 370, npoints), 0)
+        for column in [self.platforms, self.decks, self.years, self.lats, self.lons]:
+            column[rng.uniform(size=npoints) < 0.05] = np.nan
+
+    def scalar(self, function, *columns):
+        return [function(*[None if np.isnan(column[i]) else column[i] for column in columns])
+                for i in range(len(columns[0]))]
+
+    def test_humidity_blacklist_array(self):
+        self.assertEqual(qc.humidity_blacklist_array(self.platforms).tolist(),
+                         self.scalar(qc.humidity_blacklist, self.platforms))
+
+    def test_wind_blacklist_array(self):
+        self.assertEqual(qc.wind_blacklist_array(self.decks).tolist(), self.scalar(qc.wind_blacklist, self.decks))
+
+    def test_mat_blacklist_array(self):
+        expected = self.scalar(qc.mat_blacklist, self.platforms, self.decks, self.years, self.lats, self.lons)
+        self.assertEqual(qc.mat_blacklist_array(self.platforms, self.decks, self.years, self.lats,
+                                                self.lons).tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+        self.assertEqual(qc.mat_blacklist(1, 193, 1885, 45.0, 350.0), 1)
+        self.assertEqual(qc.mat_blacklist(1, 193, 1893, 45.0, 350.0), 0)
+
+    def test_deck_701_missing_hour_array(self):
+        expected = self.scalar(qc.deck_701_missing_hour, self.decks, self.years, self.hours)
+        self.assertEqual(qc.deck_701_missing_hour_array(self.decks, self.years, self.hours).tolist(), expected)
+        self.assertTrue(any(expected))
+
+
 class TestQCMethodsSunangle(unittest.TestCase):
     # sunangle(year,day,hour,min,sec,zone,dasvtm,lat,lon)
     def test_looking_through_window(self):
@@ -612,6 +733,297 @@ class TestQCMethodsDayTest(unittest.TestCase):
         self.assertEqual(0, result)
 
 
+class TestQCMethodsSunangleArrays(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(4)
+        npoints = 3000
+        self.years = rng.randint(1850, 2025, npoints)
+        self.months = rng.randint(1, 13, npoints)
+        self.days = np.array([rng.randint(1, qc.get_month_lengths(year)[month - 1] + 1)
+                              for year, month in zip(self.years, self.months)])
+        self.hours = np.round(rng.uniform(0, 23.99, npoints), 2)
+        self.lats = np.round(rng.uniform(-90, 90, npoints), 1)
+        self.lons = np.round(rng.uniform(-180, 360, npoints), 1)
+        # times in the first hour of the year and of a day, which roll back to the previous year or day
+        self.months[0:40] = 1
+        self.days[0:40] = 1
+        self.years[0:10] = [1900, 1901, 1904, 2000, 2001, 2004, 2005, 1980, 1981, 1979]
+        self.hours[0:40] = np.round(rng.uniform(0, 0.99, 40), 2)
+        self.months[40:50] = 3
+        self.days[40:50] = 1
+        self.hours[40:50] = 0.5
+        self.lats[50:60] = 0.0
+        self.lons[60:70] = 0.0
+        self.lats[70:72] = [90.0, -90.0]
+
+    def test_sunangle_array_matches_sunangle(self):
+        day_numbers = qc.dayinyear_array(self.years, self.months, self.days)
+        lats = np.where(self.lats == 0, 0.0001, self.lats)
+        minutes = (self.hours - np.floor(self.hours)) * 60.0
+        results = qc.sunangle_array(self.years, day_numbers, np.floor(self.hours), minutes, 0, 0, 0, lats, self.lons)
+        for i in range(len(self.years)):
+            self.assertEqual(day_numbers[i], qc.dayinyear(self.years[i], self.months[i], self.days[i]))
+            expected = qc.sunangle(self.years[i], day_numbers[i], math.floor(self.hours[i]), minutes[i], 0, 0, 0,
+                                   lats[i], self.lons[i])
+            self.assertEqual(tuple(result[i] for result in results), expected, i)
+
+    def test_day_test_array_matches_day_test(self):
+        for time_since_sun_above_horizon in [1.0, 3.0]:
+            results = qc.day_test_array(self.years, self.months, self.days, self.hours, self.lats, self.lons,
+                                        time_since_sun_above_horizon)
+            expected = [qc.day_test(self.years[i], self.months[i], self.days[i], self.hours[i],
+                                    self.lats[i], self.lons[i], time_since_sun_above_horizon)
+                        for i in range(len(self.years))]
+            self.assertEqual(results.tolist(), expected)
+            self.assertTrue(0 < sum(expected) < len(expected))
+
+    def test_day_test_array_missing_values(self):
+        results = qc.day_test_array([2003, np.nan, 2003], [6, 6, 6], [21, 21, 21], [12.0, 12.0, np.nan],
+                                    [50.7, 50.7, 50.7], [-3.5, -3.5, -3.5])
+        self.assertEqual(results.tolist(), [1, 0, 0])
+        self.assertEqual(qc.day_test_array([], [], [], [], [], []).tolist(), [])
+
+
+class TestSolarEphemeris(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(5)
+        npoints = 3000
+        # a few years, so that only a few dozen months have to be tabulated
+        self.years = rng.choice([1880, 1980, 2003, 2016], npoints)
+        self.months = rng.randint(1, 13, npoints)
+        self.days = np.array([rng.randint(1, qc.get_month_lengths(year)[month - 1] + 1)
+                              for year, month in zip(self.years, self.months)])
+        self.hours = np.round(rng.uniform(0, 23.99, npoints), 2)
+        self.lats = np.round(rng.uniform(-90, 90, npoints), 1)
+        self.lons = np.round(rng.uniform(-180, 360, npoints), 1)
+        # times in the first hour of the year and of a day, which roll back to the previous year or day
+        self.months[0:40] = 1
+        self.days[0:40] = 1
+        self.years[0:10] = [1900, 1901, 1904, 2000, 2001, 2004, 2005, 1980, 1981, 1979]
+        self.hours[0:40] = np.round(rng.uniform(0, 0.99, 40), 2)
+        self.months[40:50] = 3
+        self.days[40:50] = 1
+        self.lats[50:60] = 0.0
+        self.lons[60:70] = 0.0
+        self.ephemeris = qc.SolarEphemeris()
+
+    def sunangle_elevations(self, hours):
+        day_numbers = qc.dayinyear_array(self.years, self.months, self.days)
+        minutes = (hours - np.floor(hours)) * 60.0
+        return qc.sunangle_array(self.years, day_numbers, np.floor(hours), minutes, 0, 0, 0,
+                                 self.lats, self.lons)[1]
+
+    def test_elevation_array_matches_sunangle(self):
+        elevations = self.ephemeris.elevation_array(self.years, self.months, self.days, self.hours,
+                                                    self.lats, self.lons)
+        self.assertLess(np.max(np.abs(elevations - self.sunangle_elevations(self.hours))), 1e-9)
+
+    def test_elevation_array_between_time_steps(self):
+        hours = np.random.RandomState(6).uniform(0, 23.999, len(self.years))
+        elevations = self.ephemeris.elevation_array(self.years, self.months, self.days, hours,
+                                                    self.lats, self.lons)
+        self.assertLess(np.max(np.abs(elevations - self.sunangle_elevations(hours))), 1e-3)
+
+    def test_elevation_matches_sunangle(self):
+        for i in range(0, len(self.years), 30):
+            lat = self.lats[i] if self.lats[i] != 0 else 0.0001
+            expected = qc.sunangle(self.years[i], qc.dayinyear(self.years[i], self.months[i], self.days[i]),
+                                   math.floor(self.hours[i]), (self.hours[i] - math.floor(self.hours[i])) * 60.0,
+                                   0, 0, 0, lat, self.lons[i])[1]
+            self.assertAlmostEqual(self.ephemeris.elevation(self.years[i], self.months[i], self.days[i],
+                                                            self.hours[i], lat, self.lons[i]),
+                                   expected, 9)
+
+    def test_day_test_array_matches_day_test(self):
+        for time_since_sun_above_horizon in [1.0, 3.0]:
+            results = self.ephemeris.day_test_array(self.years, self.months, self.days, self.hours,
+                                                    self.lats, self.lons, time_since_sun_above_horizon)
+            expected = qc.day_test_array(self.years, self.months, self.days, self.hours, self.lats, self.lons,
+                                         time_since_sun_above_horizon)
+            self.assertEqual(results.tolist(), expected.tolist())
+            self.assertTrue(0 < sum(expected) < len(expected))
+
+    def test_day_test_matches_day_test(self):
+        for i in range(100):
+            self.assertEqual(self.ephemeris.day_test(self.years[i], self.months[i], self.days[i], self.hours[i],
+                                                     self.lats[i], self.lons[i]),
+                             qc.day_test(self.years[i], self.months[i], self.days[i], self.hours[i],
+                                         self.lats[i], self.lons[i]))
+
+    def test_day_test_array_missing_values(self):
+        results = self.ephemeris.day_test_array([2003, np.nan, 2003], [6, 6, 6], [21, 21, 21], [12.0, 12.0, np.nan],
+                                                [50.7, 50.7, 50.7], [-3.5, -3.5, -3.5])
+        self.assertEqual(results.tolist(), [1, 0, 0])
+        self.assertEqual(self.ephemeris.day_test_array([], [], [], [], [], []).tolist(), [])
+
+    def test_table_calculated_once_per_month(self):
+        self.ephemeris.day_test_array([2003, 2003, 2003], [1, 1, 2], [1, 31, 1], [0.5, 12.0, 0.5],
+                                      [50.7, 50.7, 50.7], [-3.5, -3.5, -3.5])
+        self.assertEqual(sorted(self.ephemeris.tables.keys()), [(2003, 1), (2003, 2)])
+        right_ascension, declination, siderial_time = self.ephemeris.table(2003, 1)
+        self.assertEqual(right_ascension.shape, (32, 2400))
+        self.assertIs(self.ephemeris.table(2003, 1)[0], right_ascension)
+
+
+class TestQCMethodsIndexArrays(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.lats = np.concatenate([np.arange(-90, 91, 0.25), rng.uniform(-90, 90, 1000), [99.2, -199.3]])
+        self.lons = np.concatenate([np.arange(-180, 360, 0.25), rng.uniform(-180, 540, 1000), [-180.1, 721.0]])
+
+    def test_lat_to_yindex_array(self):
+        for res in [0.05, 0.25, 0.5, 1, 2.0, 5]:
+            expected = [qc.lat_to_yindex(lat, res) for lat in self.lats]
+            self.assertEqual(qc.lat_to_yindex_array(self.lats, res).tolist(), expected)
+
+    def test_lon_to_xindex_array(self):
+        for res in [0.05, 0.25, 0.5, 1, 2.0, 5]:
+            expected = [qc.lon_to_xindex(lon, res) for lon in self.lons]
+            self.assertEqual(qc.lon_to_xindex_array(self.lons, res).tolist(), expected)
+
+    def test_mds_lat_to_yindex_array(self):
+        for res in [0.05, 1.0]:
+            expected = [qc.mds_lat_to_yindex(lat, res) for lat in self.lats]
+            self.assertEqual(qc.mds_lat_to_yindex_array(self.lats, res).tolist(), expected)
+
+    def test_mds_lon_to_xindex_array(self):
+        for res in [0.05, 1.0]:
+            expected = [qc.mds_lon_to_xindex(lon, res) for lon in self.lons]
+            self.assertEqual(qc.mds_lon_to_xindex_array(self.lons, res).tolist(), expected)
+
+    def test_day_in_year_array(self):
+        months = []
+        days = []
+        for month in range(1, 13):
+            for day in range(1, qc.get_month_lengths(2004)[month - 1] + 1):
+                months.append(month)
+                days.append(day)
+        expected = [qc.day_in_year(month, day) for month, day in zip(months, days)]
+        self.assertEqual(qc.day_in_year_array(months, days).tolist(), expected)
+
+
+class TestQCMethodsInterpolationArrays(unittest.TestCase):
+
+    def test_get_four_surrounding_points_array(self):
+        rng = np.random.RandomState(2)
+        lats = np.concatenate([np.arange(-90, 90.1, 0.25), rng.uniform(-90, 90, 1000), [89.9999, -89.9999]])
+        lons = np.concatenate([np.arange(-180, 180.1, 0.5)[0:len(lats) - 1002], rng.uniform(-180, 180, 1000),
+                               [180.0, -180.0]])
+        for max90 in [0, 1]:
+            points = qc.get_four_surrounding_points_array(lats, lons, max90)
+            for i in range(len(lats)):
+                expected = qc.get_four_surrounding_points(lats[i], lons[i], max90)
+                self.assertEqual(tuple(point[i] for point in points), expected)
+
+    def test_fill_missing_vals_array(self):
+        # every combination of missing corners
+        quads = []
+        for combination in range(16):
+            quads.append([None if combination & (1 << corner) else float(corner + 1) for corner in range(4)])
+        arrays = [np.array([np.nan if quad[corner] is None else quad[corner] for quad in quads])
+                  for corner in range(4)]
+        filled = qc.fill_missing_vals_array(*arrays)
+        for i, quad in enumerate(quads):
+            expected = qc.fill_missing_vals(*quad)
+            for corner in range(4):
+                if expected[corner] is None:
+                    self.assertTrue(np.isnan(filled[corner][i]))
+                else:
+                    self.assertEqual(filled[corner][i], expected[corner])
+
+
+class TestQCMethodsCalendarArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.months = []
+        self.days = []
+        for month in range(1, 13):
+            for day in range(1, qc.get_month_lengths(2004)[month - 1] + 1):
+                self.months.append(month)
+                self.days.append(day)
+
+    def test_which_pentad_array(self):
+        expected = [qc.which_pentad(month, day) for month, day in zip(self.months, self.days)]
+        self.assertEqual(qc.which_pentad_array(self.months, self.days).tolist(), expected)
+
+    def test_pentad_to_month_day_array(self):
+        months, days = qc.pentad_to_month_day_array(range(1, 74))
+        self.assertEqual(zip(months.tolist(), days.tolist()), [qc.pentad_to_month_day(p) for p in range(1, 74)])
+
+    def test_month_lengths_array(self):
+        years = [1900, 2000, 2003, 2004]
+        for year in years:
+            self.assertEqual(qc.month_lengths_array(year, range(1, 13)).tolist(), qc.get_month_lengths(year))
+        self.assertEqual(qc.get_month_lengths(1900)[1], 28)
+        self.assertEqual(qc.get_month_lengths(2000)[1], 29)
+
+    def test_tables_do_not_include_days_which_do_not_exist(self):
+        self.assertEqual(qc.DAY_IN_YEAR[2][30], 0)
+        self.assertEqual(qc.DAY_IN_YEAR[4][31], 0)
+        self.assertEqual(qc.PENTADS[0][1], 0)
+        self.assertEqual(qc.DAY_IN_YEAR[2][29], qc.DAY_IN_YEAR[3][1])
+
+
+class TestQCMethodsCheckArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.values = [None, -100.0, -2.0, -1.8, 0.0, 0.5, 3.0, 7.9, 8.0, 8.1, 24.0, 50.0, 361.0, 362.0]
+
+    def as_array(self, values):
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    def test_single_value_checks(self):
+        for scalar_function, array_function in [
+                (qc.value_check, qc.value_check_array),
+                (qc.no_normal_check, qc.no_normal_check_array),
+                (qc.time_check, qc.time_check_array),
+                (lambda x: qc.hard_limit(x, [-1.8, 24.0]), lambda x: qc.hard_limit_array(x, [-1.8, 24.0])),
+                (lambda x: qc.sst_freeze_check(x, 0.1, -1.8, 2.0),
+                 lambda x: qc.sst_freeze_check_array(x, 0.1, -1.8, 2.0))]:
+            expected = [scalar_function(value) for value in self.values]
+            self.assertEqual(array_function(self.as_array(self.values)).tolist(), expected)
+
+    def test_pair_checks(self):
+        pairs = [(first, second) for first in self.values for second in self.values]
+        firsts = self.as_array([pair[0] for pair in pairs])
+        seconds = self.as_array([pair[1] for pair in pairs])
+        for scalar_function, array_function in [
+                (qc.supersat_check, qc.supersat_check_array),
+                (lambda x, y: qc.climatology_check(x, y, 8.0), lambda x, y: qc.climatology_check_array(x, y, 8.0)),
+                (lambda x, y: qc.wind_consistency(x, y, 3.0), lambda x, y: qc.wind_consistency_array(x, y, 3.0))]:
+            expected = [scalar_function(first, second) for first, second in pairs]
+            self.assertEqual(array_function(firsts, seconds).tolist(), expected)
+
+        valid = [(lat, lon) for lat, lon in pairs if lat is not None and lon is not None]
+        expected = [qc.position_check(lat, lon) for lat, lon in valid]
+        self.assertEqual(qc.position_check_array([pair[0] for pair in valid],
+                                                 [pair[1] for pair in valid]).tolist(), expected)
+
+    def test_standardised_checks(self):
+        triples = [(value, clim, stdev) for value in self.values for clim in [None, 0.0, 5.0]
+                   for stdev in [None, 0.5, 2.0, 10.0]]
+        values, clims, stdevs = [self.as_array([triple[i] for triple in triples]) for i in range(3)]
+        expected = [qc.climatology_plus_stdev_check(value, clim, stdev, [1.0, 4.0], 3.0)
+                    for value, clim, stdev in triples]
+        self.assertEqual(qc.climatology_plus_stdev_check_array(values, clims, stdevs, [1.0, 4.0], 3.0).tolist(),
+                         expected)
+        expected = [qc.climatology_plus_stdev_with_lowbar(value, clim, stdev, 3.0, 10.0)
+                    for value, clim, stdev in triples]
+        self.assertEqual(qc.climatology_plus_stdev_with_lowbar_array(values, clims, stdevs, 3.0, 10.0).tolist(),
+                         expected)
+
+    def test_date_check_array(self):
+        dates = [(year, month, day) for year in [1849, 1850, 1900, 2000, 2003, 2024, 2025]
+                 for month in range(1, 13) for day in [None, 0, 1, 28, 29, 30, 31, 32]]
+        expected = [qc.date_check(year, month, day) for year, month, day in dates]
+        years, months, days = [self.as_array([date[i] for date in dates]) for i in range(3)]
+        self.assertEqual(qc.date_check_array(years, months, days).tolist(), expected)
+        self.assertEqual(qc.date_check_array([np.nan, 2000, 2000], [1, np.nan, 13], [1, 1, 1]).tolist(), [1, 1, 1])
+
+
 class TestQCMethodsYindexToLat(unittest.TestCase):
 
     def test_0_is_89point5(self):
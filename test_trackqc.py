@@ -27,6 +27,22 @@ class TestTrackQC_track_day_test(unittest.TestCase):
             error_return_text='month is invalid'
             self.assertEqual(str(error)[0:len(error_return_text)],error_return_text)
 
+    def test_array_matches_track_day_test(self):
+        rng = np.random.RandomState(6)
+        years = rng.randint(1990, 2025, 2000)
+        months = rng.randint(1, 13, 2000)
+        days = rng.randint(1, 29, 2000)
+        hours = np.round(rng.uniform(0, 23.99, 2000), 2)
+        lats = np.round(rng.uniform(-90, 90, 2000), 1)
+        lons = np.round(rng.uniform(-180, 360, 2000), 1)
+        lats[0:10] = 0.0
+        lons[10:20] = 0.0
+        for elevdlim in [-2.5, 10.0]:
+            daytime = tqc.track_day_test_array(years, months, days, hours, lats, lons, elevdlim)
+            expected = [tqc.track_day_test(years[i], months[i], days[i], hours[i], lats[i], lons[i], elevdlim)
+                        for i in range(2000)]
+            self.assertEqual(daytime.tolist(), expected)
+
 
 class TestTrackQC_trim_mean(unittest.TestCase):
 
@@ -8,7 +8,6 @@ assumed.
 """
 
 import math
-import qc
 import Extended_IMMA as ex
 import numpy as np
 import spherical_geometry as sph
@@ -460,7 +459,7 @@ def mds_track_check(invoyage):
         return []
 
     # Generic ids get a free pass on the track check
-    if qc.id_is_generic(invoyage.getvar(0, 'ID'), invoyage.getvar(0, 'YR')):
+    if invoyage.id_is_generic():
         qcs = []
         nobs = len(invoyage)
         for i in range(0, nobs):
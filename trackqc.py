@@ -1,6 +1,6 @@
 import numpy as np
 from spherical_geometry import sphere_distance
-from qc import sunangle, dayinyear
+from qc import sunangle, dayinyear, sunangle_array, dayinyear_array
 import copy
 import Extended_IMMA as ex
 import math
@@ -89,6 +89,44 @@ def track_day_test(year, month, day, hour, lat, lon, elevdlim=-2.5):
     return daytime
 
 
+def track_day_test_array(years, months, days, hours, lats, lons, elevdlim=-2.5):
+    """
+    Array version of :func:`track_day_test`, for arrays of dates, times and positions. The inputs are 
+    not checked, and the results are the same as from track_day_test.
+
+    :param years: Years
+    :param months: Months
+    :param days: Days
+    :param hours: Hours expressed as decimal fractions (e.g. 20.75 = 20:45 pm)
+    :param lats: Latitudes in degrees
+    :param lons: Longitudes in degrees
+    :param elevdlim: Elevation day/night delimiter in degrees above horizon
+    :type years: numpy array of integers
+    :type months: numpy array of integers
+    :type days: numpy array of integers
+    :type hours: numpy array of floats
+    :type lats: numpy array of floats
+    :type lons: numpy array of floats
+    :type elevdlim: float
+    :return: True where daytime, else False.
+    :rtype: numpy array of booleans
+    """
+    years = np.asarray(years).astype(int)
+    hours = np.asarray(hours, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    day2 = dayinyear_array(years, np.asarray(months).astype(int), np.asarray(days).astype(int))
+    hour2 = np.floor(hours)
+    minute2 = (hours - np.floor(hours)) * 60.0
+    lat2 = np.where(lats == 0, 0.0001, lats)
+    lon2 = np.where(lons == 0, 0.0001, lons)
+
+    azimuth, elevation, rta, hra, sid, dec = sunangle_array(years, day2, hour2, minute2, 0, 0, 0, lat2, lon2)
+
+    return elevation > elevdlim
+
+
 def trim_mean(inarr, trim):
     """
     Calculate a resistant (aka robust) mean of an input array given a trimming criteria.